@@ -0,0 +1,117 @@
+"""
+Envio das respostas ao Zulip: no processamento da mensagem ou em segundo plano.
+
+Contra o servidor Zulip simulado (fake_zulip.py) com atraso em cada envio,
+compara o tempo que o processamento de cada mensagem fica bloqueado no envio:
+client.send_message (como antes) ou common/outbound.py (fila com pool de
+conexões persistentes). Em seguida, com o servidor limitando as requisições
+(429 com Retry-After), confere que todas as mensagens chegam, na ordem de cada
+conversa, e quantas foram reenviadas.
+
+Uso (a partir da raiz do repositório):
+    python benchmarks/bench_outbound.py --messages 100 --delays 0 0.02 0.1
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import zulip
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_zulip import FakeZulipServer  # noqa: E402
+from common.outbound import OutboundSender, outbound_retries_total  # noqa: E402
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def make_requests(messages, conversations):
+    return [{"type": "private", "to": [1 + i % conversations], "content": f"resposta {i}"} for i in range(messages)]
+
+
+def run(server, sender, requests):
+    # O "processamento" de cada mensagem é apenas o envio da resposta
+    latencies = []
+    started = time.perf_counter()
+    for request in requests:
+        call_started = time.perf_counter()
+        sender.send_message(request)
+        latencies.append(time.perf_counter() - call_started)
+    if isinstance(sender, OutboundSender):
+        sender.flush()
+    return latencies, time.perf_counter() - started
+
+
+def check_order(server, requests):
+    # As mensagens unidas chegam como um só conteúdo, separadas por linha em branco
+    received = {}
+    for user_id, content in server.sent_log:
+        received.setdefault(user_id, []).extend(content.split("\n\n"))
+    expected = {}
+    for request in requests:
+        expected.setdefault(request["to"][0], []).append(request["content"])
+    return received == expected
+
+
+def client_for(server, workdir):
+    zuliprc = os.path.join(workdir, "zuliprc")
+    server.write_zuliprc(zuliprc)
+    return zulip.Client(config_file=zuliprc)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--conversations", type=int, default=10)
+    parser.add_argument("--delays", type=float, nargs="+", default=[0.0, 0.02, 0.1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate-limit", type=int, default=20, help="envios por segundo no teste de limite")
+    args = parser.parse_args()
+    requests = make_requests(args.messages, args.conversations)
+
+    print(f"{args.messages} mensagens em {args.conversations} conversas\n")
+    print(f"{'atraso ms':>9} {'envio':<12} {'bloqueio p50 ms':>16} {'p99 ms':>8} {'total s':>8} {'reqs':>5} {'ordem':>6}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for delay in args.delays:
+            for label in ("síncrono", "fila"):
+                server = FakeZulipServer(send_delay=delay)
+                server.start()
+                try:
+                    client = client_for(server, workdir)
+                    sender = OutboundSender(client, workers=args.workers) if label == "fila" else client
+                    latencies, total = run(server, sender, requests)
+                    if label == "fila":
+                        sender.shutdown()
+                finally:
+                    server.stop()
+                print(f"{delay * 1e3:9.0f} {label:<12} {percentile(latencies, 0.5) * 1e3:16.3f} "
+                      f"{percentile(latencies, 0.99) * 1e3:8.3f} {total:8.2f} {server.sent_messages:>5} "
+                      f"{'ok' if check_order(server, requests) else 'ERRO':>6}")
+
+        # Limite de requisições: rajada acima do limite do servidor, uma conversa por
+        # mensagem (sem mensagens a unir)
+        requests = make_requests(args.messages, args.messages)
+        server = FakeZulipServer(rate_limit=args.rate_limit)
+        server.start()
+        retries_before = outbound_retries_total.labels("rate_limit").value
+        try:
+            sender = OutboundSender(client_for(server, workdir), workers=args.workers)
+            latencies, total = run(server, sender, requests)
+            sender.shutdown()
+        finally:
+            server.stop()
+        retries = outbound_retries_total.labels("rate_limit").value - retries_before
+        print(f"\nLimite de {args.rate_limit} envios/s: {args.messages} mensagens em {server.sent_messages} requisições "
+              f"aceitas, {server.rate_limited} respostas 429, {retries:.0f} novas tentativas, {total:.2f}s; "
+              f"ordem por conversa: {'ok' if check_order(server, requests) else 'ERRO'}")
+
+
+if __name__ == "__main__":
+    main()
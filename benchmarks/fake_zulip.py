@@ -0,0 +1,357 @@
+"""
+Servidor Zulip simulado para os testes de carga.
+
+Implementa o subconjunto da API REST usado pelos bots (server_settings,
+users/me, register, events, messages e edição de mensagens), de modo que os
+bots rodem sem alterações, com o cliente `zulip` oficial, apontados para um
+servidor local. As mensagens dos usuários sintéticos são injetadas na fila de
+eventos e as respostas do bot são registradas com os instantes de cada etapa.
+
+Opcionalmente, o servidor simula um Zulip lento (atraso em cada envio) ou com
+limite de requisições (respostas 429 com Retry-After).
+
+Simplificação: as mensagens enviadas pelo próprio bot não são devolvidas a ele
+como eventos.
+"""
+
+import collections
+import itertools
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+BOT_USER_ID = 1000
+BOT_EMAIL = "bot@fake.zulip"
+
+
+class Exchange:
+    """
+    Uma mensagem de usuário sintético e a resposta do bot, com o instante de cada etapa.
+
+    Attributes:
+        user_id (int): ID do usuário sintético.
+        content (str): Mensagem enviada ao bot.
+        injected_at (float): Mensagem colocada na fila de eventos.
+        delivered_at (float | None): Mensagem entregue ao bot pelo long polling.
+        first_response_at (float | None): Primeira mensagem do bot em resposta.
+        completed_at (float | None): Resposta completa (última edição, em modo de fluxo).
+        response (str | None): Conteúdo final da resposta.
+        edits (int): Edições da resposta.
+    """
+    def __init__(self, user_id, content):
+        self.user_id = user_id
+        self.content = content
+        self.injected_at = time.perf_counter()
+        self.delivered_at = None
+        self.first_response_at = None
+        self.completed_at = None
+        self.response = None
+        self.edits = 0
+        self.done = threading.Event()
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Conexões encerradas pelo bot ao final do teste não são erros do teste
+        pass
+
+
+class FakeZulipServer:
+    """
+    Servidor HTTP local que simula o Zulip para um único bot.
+
+    Attributes:
+        complete_when (Callable[[str], bool]): Indica se o conteúdo de uma mensagem ou
+            edição do bot é a resposta completa.
+        registered (threading.Event): Sinalizado quando o bot registra sua fila de eventos.
+        sent_log (list[tuple]): (destinatário, conteúdo) de cada mensagem aceita, em ordem de chegada.
+        rate_limited (int): Envios recusados com 429 pelo limite de requisições.
+    """
+    def __init__(self, host="127.0.0.1", port=0, poll_timeout=10.0, complete_when=None,
+                 send_delay=0.0, rate_limit=None):
+        """
+        Inicializa o servidor (sem iniciá-lo).
+
+        Args:
+            host (str): Endereço de escuta.
+            port (int): Porta (0 escolhe uma porta livre).
+            poll_timeout (float): Tempo máximo de espera de cada long polling.
+            complete_when (Callable[[str], bool]): Critério de resposta completa.
+            send_delay (float): Atraso, em segundos, de cada envio de mensagem (Zulip lento).
+            rate_limit (int | None): Envios aceitos por segundo; os excedentes recebem
+                429 com Retry-After, como no Zulip (None: sem limite).
+        """
+        self.poll_timeout = poll_timeout
+        self.complete_when = complete_when or (lambda content: True)
+        self.send_delay = send_delay
+        self.rate_limit = rate_limit
+        self.registered = threading.Event()
+        self.sent_messages = 0
+        self.edited_messages = 0
+        self.sent_log = []
+        self.rate_limited = 0
+        self._recent_sends = collections.deque()
+        self._condition = threading.Condition()
+        self._events = []
+        self._event_ids = itertools.count()
+        self._message_ids = itertools.count(1)
+        self._users = {}
+        self._pending = {}
+        self._bot_messages = {}
+        self._httpd = _QuietHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def url(self):
+        """
+        URL base do servidor.
+        """
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def write_zuliprc(self, path):
+        """
+        Grava o arquivo zuliprc que aponta o bot para este servidor.
+
+        Args:
+            path (str): Caminho do arquivo.
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"[api]\nemail={BOT_EMAIL}\nkey=fake-key\nsite={self.url}\n")
+
+    def start(self):
+        """
+        Inicia o servidor em uma thread.
+        """
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Encerra o servidor e libera os long pollings pendentes.
+        """
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        with self._condition:
+            self._condition.notify_all()
+
+    def user(self, user_id):
+        """
+        Dados do usuário sintético.
+
+        Args:
+            user_id (int): ID do usuário.
+
+        Returns:
+            dict: ID, e-mail e nome completo.
+        """
+        user = self._users.get(user_id)
+        if user is None:
+            user = {"user_id": user_id, "email": f"user{user_id}@fake.zulip", "full_name": f"Usuário Sintético {user_id}"}
+            self._users[user_id] = user
+        return user
+
+    def inject(self, user_id, content):
+        """
+        Coloca uma mensagem privada do usuário na fila de eventos do bot.
+
+        Args:
+            user_id (int): ID do usuário sintético.
+            content (str): Conteúdo da mensagem.
+
+        Returns:
+            Exchange: Registro da troca, sinalizado quando a resposta estiver completa.
+        """
+        with self._condition:
+            user = self.user(user_id)
+            exchange = Exchange(user_id, content)
+            message_id = next(self._message_ids)
+            event = {
+                "type": "message",
+                "id": next(self._event_ids),
+                "message": {
+                    "id": message_id,
+                    "type": "private",
+                    "sender_id": user_id,
+                    "sender_email": user["email"],
+                    "sender_full_name": user["full_name"],
+                    "content": content,
+                    "timestamp": int(time.time()),
+                    "display_recipient": [
+                        {"id": user_id, "email": user["email"], "full_name": user["full_name"]},
+                        {"id": BOT_USER_ID, "email": BOT_EMAIL, "full_name": "Bot"},
+                    ],
+                },
+            }
+            self._events.append((event, exchange))
+            self._pending[user_id] = exchange
+            self._condition.notify_all()
+        return exchange
+
+    def _recipient(self, to):
+        # O bot de planejamento envia [sender_id]; o de informações, o e-mail do usuário
+        try:
+            to = json.loads(to)
+        except (TypeError, ValueError):
+            pass
+        if isinstance(to, list):
+            to = to[0] if to else None
+        if isinstance(to, int) or (isinstance(to, str) and to.isdigit()):
+            return int(to)
+        for user_id, user in self._users.items():
+            if user["email"] == to:
+                return user_id
+        return None
+
+    def _respond(self, user_id, content, edit):
+        now = time.perf_counter()
+        exchange = self._pending.get(user_id)
+        if exchange is None:
+            return
+        if exchange.first_response_at is None:
+            exchange.first_response_at = now
+        if edit:
+            exchange.edits += 1
+        exchange.response = content
+        if self.complete_when(content):
+            exchange.completed_at = now
+            del self._pending[user_id]
+            exchange.done.set()
+
+    # Endpoints
+
+    def _register(self, params):
+        self.registered.set()
+        with self._condition:
+            last_event_id = self._events[-1][0]["id"] if self._events else -1
+        return {"result": "success", "queue_id": "fake-queue", "last_event_id": last_event_id}
+
+    def _get_events(self, params):
+        last_event_id = int(params.get("last_event_id", -1))
+        deadline = time.monotonic() + self.poll_timeout
+        with self._condition:
+            while True:
+                # Os IDs são sequenciais: os eventos novos estão no fim da lista
+                start = max(last_event_id + 1, 0)
+                pending = self._events[start:]
+                if pending:
+                    now = time.perf_counter()
+                    for _, exchange in pending:
+                        exchange.delivered_at = now
+                    return {"result": "success", "events": [event for event, _ in pending]}
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return {"result": "success", "events": []}
+                self._condition.wait(remaining)
+
+    def _check_rate_limit(self):
+        # Janela deslizante de um segundo; retorna a espera pedida ao bot, ou None
+        if self.rate_limit is None:
+            return None
+        with self._condition:
+            now = time.monotonic()
+            while self._recent_sends and now - self._recent_sends[0] >= 1.0:
+                self._recent_sends.popleft()
+            if len(self._recent_sends) >= self.rate_limit:
+                self.rate_limited += 1
+                return 1.0 - (now - self._recent_sends[0])
+            self._recent_sends.append(now)
+        return None
+
+    def _send_message(self, params):
+        if self.send_delay:
+            time.sleep(self.send_delay)
+        with self._condition:
+            message_id = next(self._message_ids)
+            user_id = self._recipient(params.get("to"))
+            self.sent_messages += 1
+            self.sent_log.append((user_id, params.get("content", "")))
+            self._bot_messages[message_id] = user_id
+            self._respond(user_id, params.get("content", ""), edit=False)
+        return {"result": "success", "id": message_id}
+
+    def _update_message(self, message_id, params):
+        with self._condition:
+            user_id = self._bot_messages.get(message_id)
+            if user_id is None:
+                return {"result": "error", "code": "BAD_REQUEST", "msg": "Mensagem inexistente"}
+            self.edited_messages += 1
+            self._respond(user_id, params.get("content", ""), edit=True)
+        return {"result": "success"}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Cabeçalhos e corpo saem em escritas separadas: sem TCP_NODELAY, o
+                # algoritmo de Nagle somaria dezenas de ms a cada requisição
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def log_message(self, format, *args):
+                pass
+
+            def _params(self):
+                parsed = urlparse(self.path)
+                params = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    body = self.rfile.read(length).decode('utf-8')
+                    params.update({k: v[-1] for k, v in parse_qs(body).items()})
+                return parsed.path, params
+
+            def _reply(self, payload, status=200, headers=None):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _route(self, method):
+                path, params = self._params()
+                path = path.rstrip("/")
+                if path == "/api/v1/server_settings":
+                    return self._reply({"result": "success", "zulip_version": "9.0", "zulip_feature_level": 237})
+                if path == "/api/v1/users/me" and method == "GET":
+                    return self._reply({"result": "success", "user_id": BOT_USER_ID, "email": BOT_EMAIL,
+                                        "full_name": "Bot", "is_bot": True})
+                if path == "/api/v1/register":
+                    return self._reply(server._register(params))
+                if path == "/api/v1/events" and method == "GET":
+                    return self._reply(server._get_events(params))
+                if path == "/api/v1/events" and method == "DELETE":
+                    return self._reply({"result": "success"})
+                if path == "/api/v1/messages" and method == "POST":
+                    retry_after = server._check_rate_limit()
+                    if retry_after is not None:
+                        return self._reply({"result": "error", "code": "RATE_LIMIT_HIT", "msg": "API usage exceeded rate limit",
+                                            "retry-after": retry_after}, 429, {"Retry-After": f"{retry_after:.3f}"})
+                    return self._reply(server._send_message(params))
+                if path.startswith("/api/v1/messages/") and method == "PATCH":
+                    return self._reply(server._update_message(int(path.rsplit("/", 1)[-1]), params))
+                return self._reply({"result": "error", "msg": f"Endpoint não simulado: {method} {path}"}, 404)
+
+            def do_GET(self):
+                self._route("GET")
+
+            def do_POST(self):
+                self._route("POST")
+
+            def do_PATCH(self):
+                self._route("PATCH")
+
+            def do_DELETE(self):
+                self._route("DELETE")
+
+        return Handler
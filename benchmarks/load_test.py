@@ -0,0 +1,340 @@
+"""
+Teste de carga offline dos bots, de ponta a ponta.
+
+O bot escolhido roda sem alterações em um subprocesso, conectado a um servidor
+Zulip simulado (fake_zulip.py) e, no caso do planejamento, aos backends fake de
+LLM e de embeddings. Usuários sintéticos concorrentes executam sessões
+(sessions.py): cada usuário envia uma mensagem, aguarda a resposta do bot e
+envia a seguinte.
+
+Etapas medidas em cada mensagem:
+    entrega     mensagem na fila -> entregue ao bot pelo long polling
+    resposta    entregue ao bot -> primeira mensagem do bot
+    conclusao   entregue ao bot -> resposta completa (última edição, em fluxo)
+    total       mensagem na fila -> resposta completa
+
+O resultado (vazão e p50/p95/p99 por etapa) é gravado em JSON; com --baseline,
+é comparado a uma execução anterior. As métricas internas do bot (endpoint
+/metrics, common/metrics.py) são coletadas ao final e incluídas no resultado.
+
+Uso (a partir da raiz do repositório):
+    python benchmarks/load_test.py informacoes --users 20 --sessions 200
+    python benchmarks/load_test.py planejamento --users 8 --sessions 40 --llm-latency 0.8
+    python benchmarks/load_test.py planejamento --baseline benchmarks/results/anterior.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.request import urlopen
+
+from fake_zulip import FakeZulipServer
+from sessions import (informacoes_sessions, planejamento_sessions, write_informacoes_fixtures,
+                      write_planejamento_source)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGES = ("entrega", "resposta", "conclusao", "total")
+# Indicador de digitação das respostas em fluxo (src/streaming.py)
+TYPING_INDICATOR = "▌"
+
+
+def percentile(sorted_values, q):
+    """
+    Percentil com interpolação linear.
+
+    Args:
+        sorted_values (list[float]): Valores em ordem crescente.
+        q (float): Percentil, entre 0 e 100.
+
+    Returns:
+        float: Valor do percentil.
+    """
+    if not sorted_values:
+        return float("nan")
+    position = (len(sorted_values) - 1) * q / 100
+    lower, upper = math.floor(position), math.ceil(position)
+    weight = position - lower
+    return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+
+
+def summarize(values):
+    """
+    Estatísticas de latência de uma etapa, em milissegundos.
+    """
+    values = sorted(v * 1000 for v in values)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 3),
+        "p50_ms": round(percentile(values, 50), 3),
+        "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3),
+        "max_ms": round(values[-1], 3),
+    }
+
+
+def stage_durations(exchange):
+    """
+    Duração de cada etapa de uma troca concluída.
+    """
+    return {
+        "entrega": exchange.delivered_at - exchange.injected_at,
+        "resposta": exchange.first_response_at - exchange.delivered_at,
+        "conclusao": exchange.completed_at - exchange.delivered_at,
+        "total": exchange.completed_at - exchange.injected_at,
+    }
+
+
+def free_port():
+    """
+    Porta TCP livre para o endpoint de métricas do bot.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def scrape_metrics(ports):
+    """
+    Coleta as métricas do bot e resume os histogramas por série. Com vários
+    processos (supervisor e workers), as séries de mesmo nome são somadas.
+
+    Args:
+        ports (list[int]): Portas dos endpoints de métricas.
+
+    Returns:
+        dict: Série -> valor, com contadores, medidores e, para cada histograma,
+        contagem, soma e média (em ms).
+    """
+    samples = {}
+    for port in ports:
+        try:
+            with urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+                text = response.read().decode('utf-8')
+        except OSError:
+            continue
+        for line in text.splitlines():
+            if not line or line.startswith("#") or "_bucket{" in line:
+                continue
+            name, value = line.rsplit(" ", 1)
+            samples[name] = samples.get(name, 0.0) + float(value)
+    for name in [n for n in samples if n.split("{")[0].endswith("_count")]:
+        total = samples.get(name.replace("_count", "_sum", 1))
+        if samples[name] and total is not None:
+            samples[name.replace("_count", "_mean_ms", 1)] = round(total / samples[name] * 1000, 3)
+    return samples
+
+
+def bot_command(args, workdir, zuliprc):
+    """
+    Prepara os dados, o ambiente e o comando do bot testado.
+
+    Returns:
+        tuple[list[str], dict, str, list[list[str]]]: Comando, ambiente, diretório de
+        trabalho e sessões sintéticas.
+    """
+    env = dict(os.environ, ZULIPRC=zuliprc, PYTHONUNBUFFERED="1", METRICS_PORT=str(args.metrics_port),
+               BOT_PROCESSES=str(args.bot_processes), BOT_WORKERS=str(args.bot_workers),
+               OUTBOUND_ASYNC="0" if args.sync_send else "1")
+    if args.bot == "informacoes":
+        data_dir = os.path.join(workdir, "data")
+        units = write_informacoes_fixtures(data_dir, os.path.join(ROOT, "chat-informacoes", "data", "units.json"))
+        env["DATA_DIR"] = data_dir
+        sessions = informacoes_sessions(units, args.sessions, seed=args.seed)
+        return [sys.executable, os.path.join(ROOT, "chat-informacoes", "main.py")], env, workdir, sessions
+
+    chat_memories = os.path.join(ROOT, "chat_memories.json")
+    source = os.path.join(workdir, "planejamento.pdf")
+    write_planejamento_source(source, chat_memories)
+    env.update({
+        "SOURCE_PATH": source,
+        "INDEX_DIR": os.path.join(workdir, "faiss_index"),
+        "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embeddings.sqlite3"),
+        "CONVERSATION_DB": os.path.join(workdir, "chat_memories.sqlite3"),
+        "EMBEDDING_BACKEND": "fake",
+        "FAKE_EMBEDDING_LATENCY": str(args.embedding_latency),
+        "LLM_BACKEND": "fake",
+        "FAKE_LLM_LATENCY": str(args.llm_latency),
+        "FAKE_LLM_TOKEN_LATENCY": str(args.llm_token_latency),
+        "FAKE_LLM_TOKENS": str(args.llm_tokens),
+        "STREAMING_RESPONSES": "1" if args.streaming else "0",
+        "SEMANTIC_CACHE_ENABLED": "0" if args.no_semantic_cache else "1",
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "sem-chave"),
+    })
+    sessions = planejamento_sessions(chat_memories, args.sessions, seed=args.seed)
+    return ([sys.executable, os.path.join(ROOT, "bot_planejamento", "config_bot.py")], env,
+            os.path.join(ROOT, "bot_planejamento"), sessions)
+
+
+def run_sessions(server, sessions, users, timeout, think_time):
+    """
+    Executa as sessões com `users` usuários concorrentes.
+
+    Returns:
+        tuple[list[Exchange], int, float]: Trocas concluídas, trocas sem resposta e
+        duração total, em segundos.
+    """
+    completed = []
+    timeouts = []
+    lock = threading.Lock()
+    # Cada sessão usa um usuário novo: o estado da conversa começa sempre do zero
+    user_ids = iter(range(1, len(sessions) + 1))
+
+    def run(steps):
+        with lock:
+            user_id = next(user_ids)
+        for content in steps:
+            exchange = server.inject(user_id, content)
+            if not exchange.done.wait(timeout):
+                with lock:
+                    timeouts.append(exchange)
+                # Sem resposta, o estado da conversa é desconhecido: abandona a sessão
+                return
+            with lock:
+                completed.append(exchange)
+            if think_time:
+                time.sleep(think_time)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as executor:
+        list(executor.map(run, sessions))
+    return completed, len(timeouts), time.perf_counter() - started
+
+
+def compare(results, baseline_file):
+    """
+    Imprime a variação em relação a uma execução anterior.
+    """
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    def delta(new, old):
+        return f"{(new - old) / old * 100:+7.1f}%" if old else "    n/a"
+
+    print(f"\nComparação com {baseline_file}:")
+    print(f"  vazão (msg/s)  {baseline['throughput_msgs_per_s']:10.2f} -> "
+          f"{results['throughput_msgs_per_s']:10.2f}  "
+          f"{delta(results['throughput_msgs_per_s'], baseline['throughput_msgs_per_s'])}")
+    for stage in STAGES:
+        old, new = baseline["stages"].get(stage, {}), results["stages"].get(stage, {})
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if key in old and key in new:
+                print(f"  {stage:<10} {key:<7} {old[key]:10.1f} -> {new[key]:10.1f}  {delta(new[key], old[key])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("bot", choices=["informacoes", "planejamento"])
+    parser.add_argument("--users", type=int, default=10, help="usuários simultâneos")
+    parser.add_argument("--sessions", type=int, default=50, help="total de sessões")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--think-time", type=float, default=0.0, help="pausa entre mensagens de um usuário (s)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="espera máxima por resposta (s)")
+    parser.add_argument("--startup-timeout", type=float, default=300.0, help="espera máxima pela inicialização (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="tempo até o primeiro token do LLM fake (s)")
+    parser.add_argument("--llm-token-latency", type=float, default=0.005, help="tempo por token do LLM fake (s)")
+    parser.add_argument("--llm-tokens", type=int, default=150, help="tokens por resposta do LLM fake")
+    parser.add_argument("--embedding-latency", type=float, default=0.02, help="latência do backend fake de embeddings (s)")
+    parser.add_argument("--bot-workers", type=int, default=8, help="threads de atendimento de cada processo do bot")
+    parser.add_argument("--bot-processes", type=int, default=1,
+                        help="processos worker do bot (mensagens distribuídas pelo remetente)")
+    parser.add_argument("--streaming", action="store_true", help="respostas em fluxo (edições de mensagem)")
+    parser.add_argument("--send-delay", type=float, default=0.0, help="atraso de cada envio no Zulip simulado (s)")
+    parser.add_argument("--rate-limit", type=int, help="envios por segundo aceitos pelo Zulip simulado (429 acima)")
+    parser.add_argument("--sync-send", action="store_true", help="envio das respostas no próprio processamento da mensagem")
+    parser.add_argument("--no-semantic-cache", action="store_true")
+    parser.add_argument("--output", help="arquivo JSON de resultados (padrão: benchmarks/results/<bot>-<data>.json)")
+    parser.add_argument("--baseline", help="resultado anterior para comparação")
+    args = parser.parse_args()
+    args.metrics_port = free_port()
+
+    complete_when = (lambda content: not content.endswith(TYPING_INDICATOR)) if args.streaming else None
+    server = FakeZulipServer(complete_when=complete_when, send_delay=args.send_delay, rate_limit=args.rate_limit)
+    server.start()
+
+    with tempfile.TemporaryDirectory(prefix="load-test-") as workdir:
+        zuliprc = os.path.join(workdir, "zuliprc")
+        server.write_zuliprc(zuliprc)
+        command, env, cwd, sessions = bot_command(args, workdir, zuliprc)
+        log_path = os.path.join(workdir, "bot.log")
+
+        with open(log_path, 'w', encoding='utf-8') as log:
+            started = time.perf_counter()
+            process = subprocess.Popen(command, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+            try:
+                while not server.registered.wait(0.2):
+                    if process.poll() is not None or time.perf_counter() - started > args.startup_timeout:
+                        raise RuntimeError("o bot não iniciou")
+                startup = time.perf_counter() - started
+                print(f"{args.bot}: bot iniciado em {startup:.2f}s; {len(sessions)} sessões, {args.users} usuários")
+                completed, timeouts, duration = run_sessions(server, sessions, args.users, args.timeout, args.think_time)
+                # Com BOT_PROCESSES > 1, cada worker exporta as métricas na porta seguinte
+                ports = [args.metrics_port] + [args.metrics_port + 1 + shard for shard in range(args.bot_processes)]
+                bot_metrics = scrape_metrics(ports if args.bot_processes > 1 else ports[:1])
+            except RuntimeError as e:
+                with open(log_path, 'r', encoding='utf-8') as f:
+                    print(f"Erro: {e}. Saída do bot:\n{f.read()[-4000:]}")
+                sys.exit(1)
+            finally:
+                process.terminate()
+                try:
+                    process.wait(10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                server.stop()
+
+    durations = [stage_durations(exchange) for exchange in completed]
+    results = {
+        "bot": args.bot,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "host": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline", "metrics_port")},
+        "startup_s": round(startup, 3),
+        "duration_s": round(duration, 3),
+        "messages": len(completed),
+        "timeouts": timeouts,
+        "sent_messages": server.sent_messages,
+        "edited_messages": server.edited_messages,
+        "throughput_msgs_per_s": round(len(completed) / duration, 3) if duration else 0.0,
+        "stages": {stage: summarize([d[stage] for d in durations]) for stage in STAGES},
+        "bot_metrics": bot_metrics,
+    }
+
+    print(f"{results['messages']} mensagens em {duration:.2f}s ({results['throughput_msgs_per_s']:.1f} msg/s), "
+          f"{timeouts} sem resposta")
+    print(f"{'etapa':<10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'máx ms':>9}")
+    for stage, stats in results["stages"].items():
+        if stats["count"]:
+            print(f"{stage:<10} {stats['p50_ms']:9.1f} {stats['p95_ms']:9.1f} {stats['p99_ms']:9.1f} {stats['max_ms']:9.1f}")
+
+    means = {name: value for name, value in bot_metrics.items() if "_stage_seconds_mean_ms" in name}
+    if means:
+        print("Etapas internas do bot (média):")
+        for name, value in sorted(means.items(), key=lambda item: -item[1]):
+            stage = name.split('stage="')[-1].rstrip('"}')
+            print(f"  {stage:<16} {value:9.1f} ms")
+
+    output = args.output or os.path.join(
+        ROOT, "benchmarks", "results", f"{args.bot}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Resultados gravados em {output}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Sessões sintéticas de usuários e dados de apoio para os testes de carga.
+
+- chat-informacoes: percursos válidos pelos menus (saudação, unidade, indicadores,
+  continuar/encerrar), sorteados de forma reprodutível a partir de uma semente;
+- planejamento: repetição das perguntas reais registradas em chat_memories.json.
+
+Os arquivos de dados ausentes do repositório (indicadores, relatórios) e o
+documento do planejamento são gerados em um diretório temporário.
+"""
+
+import json
+import os
+import random
+import shutil
+
+# Opções do menu "Fhemig em Números" (SIGH) que levam ao estado de feedback
+SIGH_INDICATOR_OPTIONS = [str(i) for i in range(1, 15)]
+GREETINGS = ["Olá", "Oi", "Bom dia", "Boa tarde"]
+
+
+def write_informacoes_fixtures(data_dir, units_file):
+    """
+    Grava os arquivos de dados do chat-informacoes usados no teste de carga.
+    A tabela de fluxos (flows.json) é copiada do mesmo diretório de units.json.
+
+    Args:
+        data_dir (str): Diretório de destino.
+        units_file (str): Arquivo units.json do repositório.
+
+    Returns:
+        list[dict]: Unidades carregadas.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    shutil.copy(units_file, os.path.join(data_dir, "units.json"))
+    shutil.copy(os.path.join(os.path.dirname(units_file), "flows.json"), os.path.join(data_dir, "flows.json"))
+    indicators = ["Taxa de Ocupação Hospitalar", "Tempo Médio de Permanência", "Número de Internações",
+                  "Número de Cirurgias", "Número de Doadores Efetivos"]
+    numeros = ["Pacientes Dia", "Saídas Hospitalares", "Óbitos Hospitalares", "Óbitos Institucionais",
+               "Leitos Dia", "Internações Hospitalares", "Consultas Médicas Eletivas",
+               "Consultas Médicas de Urgência", "Saídas por Clínicas", "Média de Permanência (Dias)",
+               "Taxa de Ocupação (%)", "Taxa de Mortalidade Hospitalar Geral (%)",
+               "Taxa de Mortalidade Institucional (%)", "Índice de Renovação de Leitos"]
+    files = {
+        "indicators.json": {f"indicador_{i}": {"nome": name} for i, name in enumerate(indicators, 1)},
+        "fhemig_numeros.json": {f"indicador_{i}": {"nome": name} for i, name in enumerate(numeros, 1)},
+        "sigh_reports.json": {"pentaho": {"url": "pentaho.fhemig.mg.gov.br", "instrucoes": "Acesse a pasta de relatórios."}},
+        "tasy_reports.json": {"instrucoes_gerais": "Acesse o Tasy e abra o menu de relatórios."},
+    }
+    for name, data in files.items():
+        with open(os.path.join(data_dir, name), 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+    with open(units_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def informacoes_sessions(units, count, seed=0, max_queries=3):
+    """
+    Gera percursos válidos pelos menus do chat-informacoes.
+
+    Args:
+        units (list[dict]): Unidades, na ordem do menu.
+        count (int): Número de sessões.
+        seed (int): Semente do sorteio.
+        max_queries (int): Número máximo de consultas por sessão.
+
+    Returns:
+        list[list[str]]: Mensagens de cada sessão, em ordem.
+    """
+    rng = random.Random(seed)
+    sessions = []
+    for _ in range(count):
+        unit_number = rng.randrange(len(units)) + 1
+        system = units[unit_number - 1]["system"]
+        steps = [rng.choice(GREETINGS), str(unit_number)]
+        queries = rng.randint(1, max_queries)
+        for query in range(queries):
+            if system == "SIGH" and rng.random() < 0.4:
+                steps += ["6", rng.choice(SIGH_INDICATOR_OPTIONS)]
+            elif system == "TASY" and rng.random() < 0.2:
+                # "Outros" no Tasy leva direto às instruções de relatórios
+                steps.append("6")
+            else:
+                steps.append(str(rng.randint(1, 5)))
+            # Feedback: 1 continua a consulta, 2 encerra
+            steps.append("1" if query < queries - 1 else "2")
+        sessions.append(steps)
+    return sessions
+
+
+def load_questions(chat_memories_file):
+    """
+    Carrega as perguntas de cada conversa registrada em chat_memories.json.
+
+    Args:
+        chat_memories_file (str): Arquivo de memórias do bot de planejamento.
+
+    Returns:
+        list[list[str]]: Perguntas de cada usuário, em ordem.
+    """
+    with open(chat_memories_file, 'r', encoding='utf-8') as f:
+        memories = json.load(f)
+    conversations = []
+    for memory_data in memories.values():
+        questions = [m["content"] for m in memory_data["messages"] if m["type"] == "human"]
+        if questions:
+            conversations.append(questions)
+    return conversations
+
+
+def planejamento_sessions(chat_memories_file, count, seed=0, max_turns=5):
+    """
+    Gera sessões de perguntas e respostas a partir das conversas reais.
+
+    Args:
+        chat_memories_file (str): Arquivo de memórias do bot de planejamento.
+        count (int): Número de sessões.
+        seed (int): Semente do sorteio.
+        max_turns (int): Número máximo de perguntas por sessão.
+
+    Returns:
+        list[list[str]]: Perguntas de cada sessão, em ordem.
+    """
+    rng = random.Random(seed)
+    conversations = load_questions(chat_memories_file)
+    sessions = []
+    for index in range(count):
+        questions = conversations[index % len(conversations)]
+        start = rng.randrange(len(questions))
+        sessions.append((questions[start:] + questions[:start])[:max_turns])
+    return sessions
+
+
+def write_planejamento_source(path, chat_memories_file, chars_per_page=2500):
+    """
+    Gera um PDF de base de conhecimento com as respostas registradas em
+    chat_memories.json, para que a recuperação trabalhe sobre texto do domínio.
+
+    Args:
+        path (str): Caminho do PDF gerado.
+        chat_memories_file (str): Arquivo de memórias do bot de planejamento.
+        chars_per_page (int): Caracteres por página.
+    """
+    import fitz
+
+    with open(chat_memories_file, 'r', encoding='utf-8') as f:
+        memories = json.load(f)
+    text = "\n".join(
+        m["content"] for memory_data in memories.values() for m in memory_data["messages"] if m["type"] == "ai"
+    )
+    with fitz.open() as pdf:
+        for start in range(0, len(text), chars_per_page):
+            page = pdf.new_page()
+            page.insert_textbox(page.rect + (36, 36, -36, -36), text[start:start + chars_per_page], fontsize=7)
+        pdf.save(path)
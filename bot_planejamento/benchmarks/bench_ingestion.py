@@ -0,0 +1,84 @@
+"""
+Benchmark offline da vetorização na ingestão de documentos.
+
+Compara a vetorização serial (um chunk por chamada, como numa sequência de
+round-trips) com o pipeline em lotes concorrentes de src/ingestion.py, usando o
+backend FakeEmbeddings com latência configurável no lugar da API real.
+
+Uso (a partir de bot_planejamento/):
+    python benchmarks/bench_ingestion.py --chunks 5000 --latency 0.05
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Componentes compartilhados entre os bots ficam na raiz do repositório
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.embedding_backends import FakeEmbeddings  # noqa: E402
+from src.ingestion import embed_in_batches  # noqa: E402
+
+
+def make_chunks(count, size):
+    """
+    Gera chunks sintéticos com o tamanho aproximado dos chunks reais.
+    """
+    return (f"Chunk {i}: " + "texto do manual consolidado " * (size // 28) for i in range(count))
+
+
+def bench_serial(backend, count, size):
+    started = time.perf_counter()
+    for text in make_chunks(count, size):
+        backend.embed_documents([text])
+    return time.perf_counter() - started
+
+
+def bench_pipeline(backend, count, size, batch_size, workers):
+    started = time.perf_counter()
+    total = 0
+    for batch, vectors in embed_in_batches(make_chunks(count, size), backend,
+                                           batch_size=batch_size, max_workers=workers):
+        total += len(vectors)
+    assert total == count
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=2000, help="número de chunks sintéticos")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="caracteres por chunk")
+    parser.add_argument("--latency", type=float, default=0.02, help="latência por chamada (s)")
+    parser.add_argument("--latency-per-text", type=float, default=0.0005, help="latência por texto (s)")
+    parser.add_argument("--backend-concurrency", type=int, default=8, help="chamadas simultâneas do backend")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--skip-serial", action="store_true", help="não executar a linha de base serial")
+    args = parser.parse_args()
+
+    def backend():
+        return FakeEmbeddings(
+            size=64,
+            latency_per_call=args.latency,
+            latency_per_text=args.latency_per_text,
+            max_concurrency=args.backend_concurrency,
+        )
+
+    print(f"{args.chunks} chunks, latência {args.latency * 1000:.0f} ms/chamada "
+          f"+ {args.latency_per_text * 1000:.2f} ms/texto")
+
+    if not args.skip_serial:
+        elapsed = bench_serial(backend(), args.chunks, args.chunk_size)
+        print(f"serial (1 chunk/chamada):       {elapsed:7.2f}s  {args.chunks / elapsed:9.1f} chunks/s")
+
+    for workers in sorted({1, args.workers}):
+        fake = backend()
+        elapsed = bench_pipeline(fake, args.chunks, args.chunk_size, args.batch_size, workers)
+        print(f"lotes de {args.batch_size}, {workers} worker(s):     {elapsed:7.2f}s  "
+              f"{args.chunks / elapsed:9.1f} chunks/s  ({fake.calls} chamadas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Micro-benchmark da montagem do prompt por mensagem.
+
+Compara a montagem anterior (ChatPromptTemplate.from_template chamado a cada
+mensagem, com o template completo) com src/prompt_builder.py (templates
+compilados uma vez e prefixo estático reutilizado). Mede apenas a montagem:
+nenhum modelo é chamado.
+
+Uso (a partir de bot_planejamento/):
+    python benchmarks/bench_prompt.py --iterations 5000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.prompts import ChatPromptTemplate  # noqa: E402
+from langchain.schema import AIMessage, Document, HumanMessage  # noqa: E402
+
+from memory import format_chat_history  # noqa: E402
+from src.prompt_builder import QUESTION_TEMPLATE, SYSTEM_PROMPT, build_prompt, format_context  # noqa: E402
+
+# Template único, como era montado a cada mensagem
+LEGACY_TEMPLATE = SYSTEM_PROMPT.replace("no contexto", "no `{context}`") + "\n\n---\n\n" + QUESTION_TEMPLATE
+
+
+def legacy_prompt(user_message, sender_full_name, context, chat_history):
+    prompt_template = ChatPromptTemplate.from_template(LEGACY_TEMPLATE)
+    return prompt_template.format_messages(
+        pergunta=user_message,
+        sender_full_name=sender_full_name,
+        context=context,
+        chat_history=chat_history,
+    )
+
+
+def make_inputs():
+    documents = [
+        Document(page_content="Objetivo estratégico: ampliar o acesso à assistência hospitalar. " * 12,
+                 metadata={"source": "planejamento.pdf", "page": page})
+        for page in range(3)
+    ]
+    history = []
+    for turn in range(5):
+        history.append(HumanMessage(content=f"Pergunta {turn} sobre os indicadores do planejamento?"))
+        history.append(AIMessage(content=f"Resposta {turn}: " + "detalhes do indicador. " * 20))
+    return documents, history
+
+
+def bench(label, function, iterations):
+    documents, history = make_inputs()
+    started = time.perf_counter()
+    for i in range(iterations):
+        function(f"Qual é a meta do indicador {i}?", "Maria da Silva",
+                 format_context(documents), format_chat_history(history))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed / iterations * 1e6:9.1f} µs/mensagem")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    legacy = bench("from_template por mensagem", legacy_prompt, args.iterations)
+    compiled = bench("templates pré-compilados", build_prompt, args.iterations)
+    print(f"ganho: {legacy / compiled:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,15 +6,27 @@ uma plataforma de comunicação em equipe.
 
 """
 
+import os
+import sys
+import time
 import zulip
-from langchain_ollama import ChatOllama
-from langchain.chat_models import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from src.retriever import retriever  # Módulo responsável por recuperar informações do contexto
+from types import SimpleNamespace
+
+# Componentes compartilhados entre os bots ficam na raiz do repositório
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.retriever import create_retriever, prepare_index  # Módulo responsável por recuperar informações do contexto
+from src.semantic_cache import SemanticCache, context_fingerprint, is_personalized
+from src.prompt_builder import STATIC_PREFIX_HASH, build_prompt, build_summary_prompt, format_context
+from src.streaming import STREAM_ERROR_NOTE, ZulipStreamWriter
+from src.llm_backends import create_llm
 from memory import ChatbotMemoryManager, format_chat_history
+from common.dispatcher import MessageDispatcher
+from common.supervisor import Supervisor
+from common.metrics import REGISTRY, start_metrics_server_from_env
+from common.outbound import OutboundSender
+from common.config import env_float, env_int
 
 # config.py
-import os
 from dotenv import load_dotenv
 
 # Carregar as variáveis de ambiente do arquivo .env
@@ -23,142 +35,258 @@ load_dotenv(dotenv_path="env\\.env")
 # Acessar a chave da OpenAI
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-# Configurar cliente do Zulip
-client = zulip.Client(config_file="env\\zuliprc")
+# Parâmetros do modelo LLM, validados na inicialização (0 em LLM_TIMEOUT e
+# LLM_MAX_CONCURRENCY usa o padrão do backend)
+LLM_TEMPERATURE = env_float("LLM_TEMPERATURE", 0.5, minimum=0, maximum=2)
+LLM_TIMEOUT = env_float("LLM_TIMEOUT", 0.0, minimum=0)
+LLM_MAX_CONCURRENCY = env_int("LLM_MAX_CONCURRENCY", 0, minimum=0)
+
+# Resumo acumulado das mensagens que saem da janela do histórico
+HISTORY_SUMMARY_MAX_WORDS = int(os.getenv("HISTORY_SUMMARY_MAX_WORDS", "150"))
+
+# Cache semântico de respostas: perguntas equivalentes com o mesmo contexto
+# recuperado são respondidas sem nova chamada ao LLM
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "1") == "1"
+
+# Componentes do bot, criados por connect() e setup() em main() ou, com
+# BOT_PROCESSES > 1, em cada processo worker. Nada é criado na importação: os
+# processos filhos em modo spawn reimportam este módulo
+client = None
+bot_user_id = None
+outbound = None
+llm = None
+memory_manager = None
+retriever = None
+semantic_cache = None
+
+def connect():
+    """
+    Configura o cliente do Zulip e obtém o ID do bot. ZULIPRC permite apontar para
+    outro servidor (ex.: nos testes de carga).
+    """
+    global client, bot_user_id
+    client = zulip.Client(config_file=os.getenv("ZULIPRC", "env\\zuliprc"))
+    # Obter o perfil do bot para capturar o ID dele
+    bot_profile = client.get_profile()
+    bot_user_id = bot_profile['user_id']  # ID do bot
+
+def setup():
+    """
+    Cria os componentes que respondem às mensagens: envio em segundo plano, modelo LLM,
+    memória das conversas, retriever e cache semântico. Requer connect().
+    """
+    global outbound, llm, memory_manager, retriever, semantic_cache
+
+    # Respostas enviadas em segundo plano, com novas tentativas e respeito ao limite de
+    # requisições do Zulip. As respostas em fluxo usam o cliente diretamente, pois
+    # precisam do ID da mensagem para editá-la
+    outbound = OutboundSender(
+        client, workers=env_int("OUTBOUND_WORKERS", 4, minimum=1)
+    ) if os.getenv("OUTBOUND_ASYNC", "1") == "1" else None
+
+    # Inicializar o modelo LLM com configurações específicas. O backend é escolhido
+    # por LLM_BACKEND: openai, ollama, llamacpp ou fake (testes de carga offline)
+    llm = create_llm(
+        os.getenv("LLM_BACKEND", "openai"),
+        model=os.getenv("LLM_MODEL"),
+        temperature=LLM_TEMPERATURE,
+        timeout=LLM_TIMEOUT or None,
+        max_concurrency=LLM_MAX_CONCURRENCY or None,
+    )
 
-# Obter o perfil do bot para capturar o ID dele
-bot_profile = client.get_profile()
-bot_user_id = bot_profile['user_id']  # ID do bot
+    memory_manager = ChatbotMemoryManager(summarize=summarize_history)
 
-# Inicializar o modelo LLM com configurações específicas
-llm = ChatOpenAI(model="gpt-4o", temperature=0.5)
-memory_manager = ChatbotMemoryManager()
+    retriever, embeddings = create_retriever()
+    semantic_cache = SemanticCache(
+        embeddings.embed_query,
+        threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+        ttl=float(os.getenv("SEMANTIC_CACHE_TTL", str(24 * 3600))),
+        max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000")),
+    )
 
-def create_prompt(user_message, sender_full_name, retriever, chat_history):
+def summarize_history(summary, messages):
     """
-    Cria um prompt customizado para o modelo LLM com base na mensagem do usuário, histórico da conversa e contexto.
+    Incorpora mensagens antigas ao resumo acumulado da conversa.
 
     Args:
-        user_message (str): Mensagem enviada pelo usuário.
-        sender_full_name (str): Nome completo do remetente da mensagem.
-        retriever (str): Contexto ou base de conhecimento para embasar a resposta.
-        chat_history (list): Histórico da conversa formatado.
+        summary (str): Resumo atual (vazio na primeira vez).
+        messages (list): Mensagens que saíram da janela do histórico.
 
     Returns:
-        str: Prompt estruturado para o modelo LLM.
+        str: Novo resumo.
     """
-    formatted_history = format_chat_history(chat_history)
-
-    # Prompt Engineering: Define as instruções e formato de resposta para o LLM
-    prompt_template = ChatPromptTemplate.from_template("""
-    Você é **Zé**, um chatbot especializado em responder perguntas sobre o Planejamento Estratégico da Fhemig 2024-2027. Use as informações fornecidas no `{context}` para responder de forma assertiva, clara e objetiva. Caso não encontre informações relevantes no contexto, informe que não pode responder e sugira acessar o planejamento estratégico no site oficial: [Planejamento Estratégico Fhemig](https://www.fhemig.mg.gov.br/sobre-o-orgao/planejamento-estrategico).
-
-        ---
-
-        ### Histórico da Conversa:
-        {chat_history}
-
-        ### Contexto:
-        {context}
-
-        ---
-
-        ### Instruções:
-        1. Utilize o histórico da conversa para garantir consistência e continuidade.
-        2. Baseie-se exclusivamente nas informações do contexto para responder.
-        3. Seja claro e direto, utilizando exemplos práticos quando aplicável.
-        4. Caso a pergunta seja ambígua ou incompleta, solicite esclarecimentos.
-        5. Nunca forneça informações inventadas ou que não estejam no `{context}`.
-        6. Adapte a linguagem para ser acessível, mas mantenha a tecnicidade quando necessário.
-        7. O nome completo do usuário é "{sender_full_name}". Use-o de forma natural e apropriada na interação.
-
-        
-        ---
-
-        ### Formato da Resposta:
-        1. Responda diretamente à pergunta do usuário.
-        2. Forneça explicações ou exemplos adicionais para enriquecer a resposta.
-        3. Quando relevante, conecte a resposta a outros aspectos do Planejamento Estratégico.
-        4. Apresente as respostas organizadas e formatadas em **Markdown**.
-
-        ---
-
-        Agora, responda à seguinte pergunta:
+    prompt = build_summary_prompt(summary, format_chat_history(messages), HISTORY_SUMMARY_MAX_WORDS)
+    return llm.invoke(prompt).content
+
+# Métricas por etapa da resposta, exportadas em /metrics quando METRICS_PORT é configurada
+stage_seconds = REGISTRY.histogram(
+    "planejamento_stage_seconds", "Duração de cada etapa da resposta, em segundos", ["stage"])
+messages_total = REGISTRY.counter(
+    "planejamento_messages_total", "Mensagens processadas, por resultado", ["result"])
+semantic_cache_total = REGISTRY.counter(
+    "planejamento_semantic_cache_total", "Consultas ao cache semântico, por resultado", ["result"])
+# Tokens de entrada das respostas, por versão do prefixo estático do prompt: a razão
+# cached/total mostra se o provedor está reaproveitando o prefixo (cache de prompt)
+prompt_tokens_total = REGISTRY.counter(
+    "planejamento_prompt_tokens_total", "Tokens de entrada das respostas do LLM, por prefixo e tipo",
+    ["prefix", "kind"])
+
+def record_prompt_usage(usage):
+    """
+    Contabiliza os tokens de entrada informados pelo provedor, se disponíveis.
 
-        **Pergunta do Usuário:** {pergunta}
+    Args:
+        usage (dict | None): usage_metadata da resposta do LLM.
+    """
+    if not usage:
+        return
+    prompt_tokens_total.labels(STATIC_PREFIX_HASH, "total").inc(usage.get("input_tokens", 0))
+    cached = (usage.get("input_token_details") or {}).get("cache_read", 0)
+    prompt_tokens_total.labels(STATIC_PREFIX_HASH, "cached").inc(cached)
+
+# Respostas em fluxo: a mensagem é enviada com os primeiros tokens e editada
+# no máximo a cada STREAMING_EDIT_INTERVAL segundos
+STREAMING_RESPONSES = os.getenv("STREAMING_RESPONSES", "1") == "1"
+STREAMING_EDIT_INTERVAL = float(os.getenv("STREAMING_EDIT_INTERVAL", "1.5"))
+
+def create_prompt(user_message, sender_full_name, context, chat_history, summary=""):
+    """
+    Cria o prompt para o modelo LLM com base na mensagem do usuário, histórico da conversa e contexto.
+    Os templates são compilados uma única vez em src/prompt_builder.py.
 
-    """)
+    Args:
+        user_message (str): Mensagem enviada pelo usuário.
+        sender_full_name (str): Nome completo do remetente da mensagem.
+        context (str): Trechos recuperados da base de conhecimento, já formatados.
+        chat_history (list): Mensagens recentes da conversa.
+        summary (str): Resumo das mensagens mais antigas.
 
-    return prompt_template.format_messages(
-        pergunta=user_message,
-        sender_full_name=sender_full_name,
-        context=retriever,
-        chat_history=formatted_history
-    )
+    Returns:
+        list: Mensagens estruturadas para o modelo LLM.
+    """
+    return build_prompt(user_message, sender_full_name, context, format_chat_history(chat_history, summary))
 
-def get_llm_response(user_message, sender_full_name, retriever, memory):
+def get_llm_response(user_message, sender_full_name, retriever, chat_history, summary="", stream_writer=None):
     """
     Processa a mensagem do usuário, criando um prompt para o modelo LLM e retornando a resposta.
+    Perguntas já respondidas com o mesmo contexto são atendidas pelo cache semântico.
 
     Args:
         user_message (str): Mensagem enviada pelo usuário.
         sender_full_name (str): Nome completo do remetente.
-        retriever (str): Contexto ou base de conhecimento.
-        memory (ChatbotMemoryManager): Objeto de memória para gerenciar histórico de conversas.
+        retriever (BaseRetriever): Retriever da base de conhecimento.
+        chat_history (list): Mensagens recentes da conversa, dentro do orçamento de tokens.
+        summary (str): Resumo das mensagens mais antigas.
+        stream_writer (ZulipStreamWriter): Se informado, os tokens da resposta são
+            publicados no Zulip à medida que o modelo os gera.
 
     Returns:
         str: Resposta gerada pelo modelo LLM.
     """
-    # Recuperar histórico da conversa
-    chat_history = memory.load_memory_variables({})["chat_history"]
-    # Criar prompt com histórico
-    prompt = create_prompt(user_message, sender_full_name, retriever, chat_history)
-    # Chamar o modelo para obter a resposta
-    response = llm(prompt)
-    # Salvar a interação na memória
-    memory.save_context(
-        {"input": user_message},
-        {"output": response.content}
-    )
-
-    return response.content
+    # Recuperar os chunks relevantes; o cache só reaproveita respostas do mesmo contexto
+    with stage_seconds.time("retrieval"):
+        documents = retriever.invoke(user_message)
+        context = format_context(documents)
+        fingerprint = context_fingerprint(documents)
+    # Perguntas que dependem da conversa ou do usuário não passam pelo cache
+    personalized = not SEMANTIC_CACHE_ENABLED or is_personalized(user_message, chat_history or summary)
+
+    with stage_seconds.time("cache_lookup"):
+        answer = semantic_cache.lookup(user_message, fingerprint, personalized=personalized)
+    semantic_cache_total.labels("bypass" if personalized else "hit" if answer is not None else "miss").inc()
+    if answer is None:
+        # Criar prompt com histórico
+        with stage_seconds.time("prompt"):
+            prompt = create_prompt(user_message, sender_full_name, context, chat_history, summary)
+        # Chamar o modelo para obter a resposta
+        with stage_seconds.time("llm"):
+            if stream_writer is not None:
+                started = time.perf_counter()
+                try:
+                    for chunk in llm.stream(prompt):
+                        if started is not None:
+                            stage_seconds.labels("llm_first_token").observe(time.perf_counter() - started)
+                            started = None
+                        stream_writer.write(chunk.content)
+                        # O uso de tokens chega no último trecho, quando o provedor o informa
+                        record_prompt_usage(getattr(chunk, "usage_metadata", None))
+                except Exception:
+                    # Finaliza a mensagem parcial, que ficaria com o indicador de digitação
+                    stream_writer.close(error_note=STREAM_ERROR_NOTE)
+                    raise
+                answer = stream_writer.text
+            else:
+                response = llm.invoke(prompt)
+                record_prompt_usage(getattr(response, "usage_metadata", None))
+                answer = response.content
+        with stage_seconds.time("cache_store"):
+            semantic_cache.store(user_message, fingerprint, answer, sender_full_name, personalized=personalized)
+
+    return answer
 
 def respond_to_private_message(event):
     """
-    Responde a mensagens privadas enviadas ao bot.
+    Responde a mensagens privadas enviadas ao bot, registrando a duração total e o resultado.
 
     Args:
         event (dict): Evento contendo informações da mensagem, remetente e tipo.
     """
-    message = event['message']
+    started = time.perf_counter()
+    try:
+        reply_to_message(event['message'])
+    except Exception:
+        messages_total.labels("error").inc()
+        raise
+    messages_total.labels("ok").inc()
+    stage_seconds.labels("total").observe(time.perf_counter() - started)
+
+def reply_to_message(message):
+    """
+    Gera e envia a resposta a uma mensagem privada, medindo cada etapa.
+
+    Args:
+        message (dict): Mensagem recebida (remetente e conteúdo).
+    """
     sender_id = message['sender_id']
     sender_full_name = message['sender_full_name']
     content = message['content']
 
-    # Obter memória específica do usuário
-    user_memory = memory_manager.get_memory(sender_id)
+    # Obter o histórico do usuário dentro do orçamento de tokens
+    with stage_seconds.time("history"):
+        summary, chat_history = memory_manager.get_history(sender_id)
 
     print(f"Mensagem recebida de {sender_full_name} (ID: {sender_id}), mensagem: {content}")
 
+    recipient = {"type": "private", "to": [sender_id]}
+    stream_writer = ZulipStreamWriter(client, recipient, min_interval=STREAMING_EDIT_INTERVAL) if STREAMING_RESPONSES else None
+
     # Chamar o LLM para processar o conteúdo da mensagem
-    llm_response = get_llm_response(content, sender_full_name, retriever, user_memory)
+    llm_response = get_llm_response(content, sender_full_name, retriever, chat_history, summary, stream_writer)
 
-    # Salvar memórias após cada interação
-    memory_manager.save_memories()
+    # Salvar a interação na memória e persistir apenas a nova troca de mensagens
+    with stage_seconds.time("persist"):
+        memory_manager.save_exchange(sender_id, content, llm_response)
 
-    # Enviar a resposta ao usuário
-    client.send_message({
-        "type": "private",
-        "to": [sender_id],
-        "content": f"{llm_response}"
-    })
+    # Enviar a resposta ao usuário, se ela não foi entregue em fluxo
+    with stage_seconds.time("send"):
+        if stream_writer is None or not stream_writer.close():
+            (outbound or client).send_message({
+                **recipient,
+                "content": f"{llm_response}"
+            })
 
-def process_event(event):
+    # Resumir as mensagens antigas depois do envio, fora do tempo de resposta ao usuário
+    with stage_seconds.time("summary"):
+        memory_manager.update_summary(sender_id)
+
+def process_event(event, dispatcher):
     """
-    Processa eventos de mensagem e responde apenas a mensagens diretas.
+    Processa eventos de mensagem e encaminha apenas mensagens diretas ao dispatcher,
+    que as responde em paralelo, mantendo a ordem das mensagens de cada usuário.
 
     Args:
         event (dict): Evento capturado pelo cliente Zulip.
+        dispatcher (MessageDispatcher): Pool de workers que responde às mensagens.
     """
     if event['type'] == 'message':
         message = event['message']
@@ -166,7 +294,54 @@ def process_event(event):
         
         # Responde apenas a mensagens privadas de usuários que não sejam o próprio bot
         if message['type'] == 'private' and sender_id != bot_user_id:
-            respond_to_private_message(event)
+            dispatcher.submit(event)
+
+def create_worker():
+    """
+    Cria o worker de um processo do supervisor (BOT_PROCESSES > 1). Executado em cada
+    processo worker, que cria seu próprio cliente, modelo, memória e retriever.
 
-# Escuta eventos usando long polling e responde a mensagens privadas
-client.call_on_each_event(process_event, ['message'])
+    Returns:
+        SimpleNamespace: Worker com handle_message.
+    """
+    connect()
+    setup()
+    return SimpleNamespace(handle_message=respond_to_private_message)
+
+def main():
+    """
+    Escuta eventos usando long polling e responde a mensagens privadas. Com
+    BOT_PROCESSES > 1, as mensagens são distribuídas entre processos worker pelo
+    remetente; caso contrário, são respondidas por um pool de threads neste processo.
+    """
+    connect()
+    processes = env_int("BOT_PROCESSES", 1, minimum=1)
+    if processes > 1:
+        # Os workers apenas carregam o índice, atualizado aqui uma única vez
+        prepare_index()
+        dispatcher = Supervisor(
+            create_worker,
+            workers=processes,
+            threads_per_worker=env_int("BOT_WORKERS", 8, minimum=1),
+            max_pending=env_int("BOT_MAX_PENDING", 100, minimum=1),
+        )
+    else:
+        setup()
+        dispatcher = MessageDispatcher(
+            respond_to_private_message,
+            max_workers=env_int("BOT_WORKERS", 8, minimum=1),
+            max_pending=env_int("BOT_MAX_PENDING", 100, minimum=1),
+        )
+    REGISTRY.gauge(
+        "planejamento_dispatcher_pending", "Mensagens aguardando ou em processamento no dispatcher"
+    ).set_function(dispatcher.pending)
+    start_metrics_server_from_env()
+    try:
+        client.call_on_each_event(lambda event: process_event(event, dispatcher), ['message'])
+    finally:
+        dispatcher.shutdown()
+        if outbound:
+            outbound.shutdown(timeout=30)
+
+if __name__ == "__main__":
+    main()
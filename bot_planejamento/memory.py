@@ -1,34 +1,69 @@
 
 from langchain.memory import ConversationBufferMemory
-from typing import Dict
-import json
+from collections import OrderedDict
 import os
+import threading
 from langchain.schema import HumanMessage, AIMessage
-from datetime import datetime
+from src.conversation_store import ConversationStore
+from src.history_window import HistoryWindow
 
 class ChatbotMemoryManager:
     """
     Gerenciador de memória para chatbot, permitindo armazenar e recuperar históricos de conversas 
-    personalizados para cada usuário. As memórias são salvas em um arquivo JSON para persistência.
+    personalizados para cada usuário. As memórias são persistidas em um banco SQLite, uma troca de
+    mensagens por vez; o antigo arquivo JSON é importado na primeira inicialização.
+
+    Apenas as mensagens recentes que cabem no orçamento de tokens entram no prompt; as mais
+    antigas são condensadas em um resumo acumulado, salvo junto com o histórico.
 
     Attributes:
-        memory_file (str): Nome do arquivo onde as memórias serão armazenadas.
-        memories (dict): Dicionário contendo objetos de memória para cada usuário.
+        memory_file (str): Arquivo JSON legado com as memórias, importado uma única vez.
+        store (ConversationStore): Armazenamento persistente das conversas.
+        max_users (int): Número máximo de históricos mantidos em memória.
+        memories (OrderedDict): Objetos de memória dos usuários ativos, em ordem de uso (LRU),
+            apenas com as mensagens ainda não resumidas.
+        summaries (dict): Resumo acumulado e número de mensagens resumidas de cada usuário ativo.
+        window (HistoryWindow): Janela do histórico limitada por tokens.
+        summarize (Callable | None): Função que atualiza o resumo com novas mensagens.
     """
-    def __init__(self, memory_file="chat_memories.json"):
+    def __init__(self, memory_file="chat_memories.json", store_file=None, max_users=None,
+                 summarize=None, max_history_tokens=None):
         """
-        Inicializa o gerenciador de memória, carregando as memórias do arquivo JSON, se existente.
+        Inicializa o gerenciador de memória, importando o arquivo JSON legado (se existir).
+        Os históricos são carregados sob demanda, na primeira mensagem de cada usuário.
 
         Args:
-            memory_file (str): Nome do arquivo onde as memórias serão armazenadas.
+            memory_file (str): Arquivo JSON legado com as memórias.
+            store_file (str): Banco SQLite das conversas (padrão: variável CONVERSATION_DB
+                ou chat_memories.sqlite3).
+            max_users (int): Número máximo de históricos mantidos em memória (padrão:
+                variável MEMORY_MAX_USERS ou 500).
+            summarize (Callable[[str, list], str]): Recebe o resumo atual e as mensagens a
+                incorporar e devolve o novo resumo. Se None, as mensagens antigas apenas
+                deixam de entrar no prompt.
+            max_history_tokens (int): Orçamento de tokens do histórico no prompt (padrão:
+                variável HISTORY_MAX_TOKENS ou 1000).
         """
         self.memory_file = memory_file
-        self.memories: Dict[str, ConversationBufferMemory] = {}
-        self.load_memories()
+        self.store = ConversationStore(store_file or os.getenv("CONVERSATION_DB", "chat_memories.sqlite3"))
+        self.max_users = max_users or int(os.getenv("MEMORY_MAX_USERS", "500"))
+        # Históricos em memória, do menos para o mais recentemente usado (LRU)
+        self.memories: "OrderedDict[str, ConversationBufferMemory]" = OrderedDict()
+        self.summaries = {}
+        self.summarize = summarize
+        self.window = HistoryWindow(max_tokens=max_history_tokens or int(os.getenv("HISTORY_MAX_TOKENS", "1000")))
+        # As mensagens são respondidas em paralelo: protege o dicionário de memórias
+        self._lock = threading.RLock()
+        migrated = self.store.migrate_from_json(self.memory_file)
+        if migrated:
+            print(f"{migrated} mensagens importadas de {self.memory_file} para {self.store.path}")
+            self.store.compact()
     
     def get_memory(self, user_id: str) -> ConversationBufferMemory:
         """
-        Obtém ou cria um objeto de memória para o usuário especificado.
+        Obtém o objeto de memória do usuário, carregando o histórico salvo na primeira
+        chamada. Os usuários inativos há mais tempo são descartados da memória quando o
+        limite é atingido; o histórico deles continua salvo no banco.
 
         Args:
             user_id (str): Identificador único do usuário.
@@ -36,31 +71,73 @@ class ChatbotMemoryManager:
         Returns:
             ConversationBufferMemory: Objeto de memória do usuário.
         """
-        if user_id not in self.memories:
-            self.memories[user_id] = ConversationBufferMemory(
-                memory_key="chat_history",
-                return_messages=True,
-                max_token_limit=1000
-            )
-        return self.memories[user_id]
+        # O Zulip envia o ID como inteiro; o histórico salvo usa texto
+        user_id = str(user_id)
+        with self._lock:
+            memory = self.memories.get(user_id)
+            if memory is not None:
+                self.memories.move_to_end(user_id)
+                return memory
+
+            summary, summarized = self.store.load_summary(user_id)
+            memory = self.load_memory(user_id, offset=summarized)
+            self.memories[user_id] = memory
+            self.summaries[user_id] = (summary, summarized)
+            while len(self.memories) > self.max_users:
+                evicted, _ = self.memories.popitem(last=False)
+                self.summaries.pop(evicted, None)
+            return memory
     
-    def message_to_dict(self, message):
+    def get_history(self, user_id):
         """
-        Converte um objeto de mensagem em um dicionário serializável.
+        Obtém o histórico a incluir no prompt: o resumo das mensagens antigas e as
+        mensagens recentes que cabem no orçamento de tokens.
 
         Args:
-            message (HumanMessage | AIMessage): Mensagem do usuário ou do assistente.
+            user_id (str): Identificador único do usuário.
 
         Returns:
-            dict: Dicionário representando a mensagem.
+            tuple[str, list]: Resumo e mensagens recentes, em ordem cronológica.
         """
-        if isinstance(message, (HumanMessage, AIMessage)):
-            return {
-                "type": "human" if isinstance(message, HumanMessage) else "ai",
-                "content": message.content,
-                "timestamp": datetime.now().isoformat()
-            }
-        return None
+        user_id = str(user_id)
+        with self._lock:
+            memory = self.get_memory(user_id)
+            summary, _ = self.summaries[user_id]
+            messages = list(memory.chat_memory.messages)
+        return summary, self.window.select(messages, summary)
+    
+    def update_summary(self, user_id):
+        """
+        Incorpora ao resumo as mensagens mais antigas, se o histórico tiver excedido o
+        orçamento de tokens. As mensagens resumidas saem da memória, mas continuam
+        salvas no banco.
+
+        Args:
+            user_id (str): Identificador único do usuário.
+
+        Returns:
+            bool: True se o resumo foi atualizado.
+        """
+        user_id = str(user_id)
+        with self._lock:
+            memory = self.get_memory(user_id)
+            summary, summarized = self.summaries[user_id]
+            messages = list(memory.chat_memory.messages)
+
+        end = self.window.overflow(messages, summary)
+        if end is None:
+            return False
+        # Chamada ao LLM fora do lock: as mensagens de um mesmo usuário são processadas em ordem
+        if self.summarize is not None:
+            summary = self.summarize(summary, messages[:end])
+        summarized += end
+        self.store.save_summary(user_id, summary, summarized)
+
+        with self._lock:
+            if self.memories.get(user_id) is memory:
+                self.summaries[user_id] = (summary, summarized)
+                del memory.chat_memory.messages[:end]
+        return True
     
     def dict_to_message(self, message_dict):
         """
@@ -77,66 +154,58 @@ class ChatbotMemoryManager:
         else:
             return AIMessage(content=message_dict["content"])
     
-    def save_memories(self):
+    def save_exchange(self, user_id, user_message, ai_message):
         """
-        Salva as memórias no arquivo JSON, garantindo persistência do histórico.
+        Adiciona uma troca de mensagens ao histórico do usuário e a persiste. Apenas as
+        duas mensagens novas são gravadas, em uma única transação.
+
+        Args:
+            user_id (str): Identificador único do usuário.
+            user_message (str): Mensagem enviada pelo usuário.
+            ai_message (str): Resposta do assistente.
         """
-        memories_dict = {}
-        for user_id, memory in self.memories.items():
-            messages = memory.chat_memory.messages
-            serialized_messages = [
-                self.message_to_dict(msg) for msg in messages
-                if msg is not None
-            ]
-            memories_dict[user_id] = {
-                "messages": serialized_messages
-            }
-        
-        with open(self.memory_file, 'w', encoding='utf-8') as f:
-            json.dump(memories_dict, f, ensure_ascii=False, indent=2)
+        memory = self.get_memory(user_id)
+        memory.save_context({"input": user_message}, {"output": ai_message})
+        self.store.append_exchange(str(user_id), user_message, ai_message)
     
-    def load_memories(self):
+    def load_memory(self, user_id, offset=0):
         """
-        Carrega as memórias do arquivo JSON, restaurando os históricos de conversa salvos.
+        Carrega do banco o histórico de conversa de um usuário.
 
-        Raises:
-            Exception: Em caso de falha ao carregar o arquivo JSON.
+        Args:
+            user_id (str): Identificador único do usuário.
+            offset (int): Número de mensagens iniciais a ignorar (já resumidas).
+
+        Returns:
+            ConversationBufferMemory: Memória com as mensagens salvas do usuário.
         """
-        if not os.path.exists(self.memory_file):
-            return
-        
+        memory = ConversationBufferMemory(
+            memory_key="chat_history",
+            return_messages=True
+        )
         try:
-            with open(self.memory_file, 'r', encoding='utf-8') as f:
-                memories_dict = json.load(f)
-                
-            for user_id, memory_data in memories_dict.items():
-                memory = ConversationBufferMemory(
-                    memory_key="chat_history",
-                    return_messages=True,
-                    max_token_limit=1000
-                )
-                
-                # Restaurar mensagens anteriores
-                for message_dict in memory_data["messages"]:
-                    message = self.dict_to_message(message_dict)
-                    memory.chat_memory.messages.append(message)
-                    
-                self.memories[user_id] = memory
-                
+            messages = self.store.load_user(user_id, offset=offset)
         except Exception as e:
             print(f"Erro ao carregar memórias: {e}")
+            return memory
+
+        # Restaurar mensagens anteriores
+        for message_dict in messages:
+            memory.chat_memory.messages.append(self.dict_to_message(message_dict))
+        return memory
 
-def format_chat_history(chat_history):
+def format_chat_history(chat_history, summary=""):
     """
     Formata o histórico do chat em texto, preparado para inclusão no prompt do modelo.
 
     Args:
         chat_history (list): Lista de mensagens do histórico.
+        summary (str): Resumo das mensagens anteriores ao histórico.
 
     Returns:
         str: Histórico formatado como texto.
     """
-    formatted_history = []
+    formatted_history = [f"Resumo da conversa anterior: {summary}"] if summary else []
     for message in chat_history:
         if isinstance(message, HumanMessage):
             formatted_history.append(f"Usuário: {message.content}")
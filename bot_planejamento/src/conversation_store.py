@@ -0,0 +1,185 @@
+"""
+Armazenamento persistente das conversas do chatbot em SQLite.
+
+Cada troca (pergunta do usuário + resposta do assistente) é gravada com um
+único INSERT em uma transação, em vez de reescrever o histórico de todos os
+usuários a cada mensagem. O SQLite em modo WAL garante que uma falha no meio
+da gravação não corrompe o histórico já salvo.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+
+class ConversationStore:
+    """
+    Histórico de mensagens de todos os usuários, gravado de forma incremental.
+
+    Attributes:
+        path (str): Caminho do arquivo SQLite.
+    """
+    def __init__(self, path="chat_memories.sqlite3"):
+        """
+        Abre (ou cria) o banco de conversas.
+
+        Args:
+            path (str): Caminho do arquivo SQLite.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                type TEXT NOT NULL,
+                content TEXT NOT NULL,
+                timestamp TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_messages_user ON messages(user_id, id);
+            CREATE TABLE IF NOT EXISTS summaries (
+                user_id TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                message_count INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def append_exchange(self, user_id, user_message, ai_message):
+        """
+        Grava uma troca de mensagens em uma única transação.
+
+        Args:
+            user_id (str): Identificador do usuário.
+            user_message (str): Mensagem enviada pelo usuário.
+            ai_message (str): Resposta do assistente.
+        """
+        timestamp = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO messages (user_id, type, content, timestamp) VALUES (?, ?, ?, ?)",
+                [
+                    (str(user_id), "human", user_message, timestamp),
+                    (str(user_id), "ai", ai_message, timestamp),
+                ],
+            )
+
+    def load_user(self, user_id, offset=0):
+        """
+        Carrega o histórico de um usuário, em ordem cronológica.
+
+        Args:
+            user_id (str): Identificador do usuário.
+            offset (int): Número de mensagens iniciais a ignorar (já resumidas).
+
+        Returns:
+            list[dict]: Mensagens com type, content e timestamp.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT type, content, timestamp FROM messages WHERE user_id = ? ORDER BY id LIMIT -1 OFFSET ?",
+                (str(user_id), offset),
+            ).fetchall()
+        return [{"type": type_, "content": content, "timestamp": timestamp} for type_, content, timestamp in rows]
+
+    def load_summary(self, user_id):
+        """
+        Carrega o resumo acumulado das mensagens antigas de um usuário.
+
+        Args:
+            user_id (str): Identificador do usuário.
+
+        Returns:
+            tuple[str, int]: Resumo e número de mensagens (desde o início) que ele cobre.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, message_count FROM summaries WHERE user_id = ?", (str(user_id),)
+            ).fetchone()
+        return (row[0], row[1]) if row else ("", 0)
+
+    def save_summary(self, user_id, summary, message_count):
+        """
+        Grava o resumo acumulado das mensagens antigas de um usuário.
+
+        Args:
+            user_id (str): Identificador do usuário.
+            summary (str): Resumo das mensagens.
+            message_count (int): Número de mensagens (desde o início) cobertas pelo resumo.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (user_id, summary, message_count) VALUES (?, ?, ?)",
+                (str(user_id), summary, message_count),
+            )
+
+    def migrate_from_json(self, json_path):
+        """
+        Importa o histórico do antigo arquivo chat_memories.json, uma única vez.
+        A importação acontece em uma só transação: se falhar, nada é gravado e ela
+        é repetida na próxima inicialização. Processos que a iniciem ao mesmo tempo
+        importam o arquivo uma única vez. O arquivo JSON não é alterado.
+
+        Args:
+            json_path (str): Caminho do arquivo JSON legado.
+
+        Returns:
+            int: Número de mensagens importadas.
+        """
+        if not os.path.exists(json_path):
+            return 0
+        with self._lock:
+            migrated = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'migrated_json'"
+            ).fetchone()
+        if migrated is not None:
+            return 0
+
+        with open(json_path, 'r', encoding='utf-8') as f:
+            memories_dict = json.load(f)
+
+        rows = [
+            (str(user_id), message["type"], message["content"], message.get("timestamp") or datetime.now().isoformat())
+            for user_id, memory_data in memories_dict.items()
+            for message in memory_data["messages"]
+        ]
+        with self._lock, self._conn:
+            # Verifica de novo com o bloqueio de escrita: outro processo pode ter
+            # concluído a importação enquanto este lia o arquivo JSON
+            self._conn.execute("BEGIN IMMEDIATE")
+            if self._conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_json'").fetchone():
+                return 0
+            self._conn.executemany(
+                "INSERT INTO messages (user_id, type, content, timestamp) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('migrated_json', ?)",
+                (os.path.abspath(json_path),),
+            )
+        return len(rows)
+
+    def compact(self):
+        """
+        Compacta o banco: incorpora o WAL ao arquivo principal e reescreve as páginas
+        livres. O VACUUM do SQLite é transacional, então uma interrupção no meio da
+        compactação mantém o banco anterior intacto.
+        """
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("VACUUM")
+
+    def close(self):
+        """
+        Fecha a conexão com o banco.
+        """
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,205 @@
+"""
+Carregamento, limpeza e divisão de documentos em fluxo (streaming).
+
+Em vez de carregar todas as páginas do PDF em memória antes do chunking, as
+páginas são processadas em faixas por um pool de processos (criado pelo
+chamador) e os chunks são devolvidos sob demanda, na ordem das páginas. O pico
+de memória depende do tamanho das faixas e do número de workers, não do tamanho
+do PDF. Cada chunk guarda a página de origem nos metadados.
+"""
+
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from langchain.schema import Document
+from langchain.text_splitter import CharacterTextSplitter
+from langchain_community.document_loaders import UnstructuredMarkdownLoader
+
+DEFAULT_PAGES_PER_TASK = 8
+
+
+def make_splitter(chunk_size, chunk_overlap, separator="\n"):
+    """
+    Cria o TextSplitter usado em todas as etapas de chunking.
+
+    Args:
+        chunk_size (int): Tamanho máximo de cada chunk em caracteres.
+        chunk_overlap (int): Sobreposição entre chunks.
+        separator (str): Separador de texto.
+
+    Returns:
+        CharacterTextSplitter: Splitter configurado.
+    """
+    return CharacterTextSplitter(separator=separator, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def clean_text(text, newline_replacement=""):
+    """
+    Remove quebras de linha do conteúdo do chunk.
+
+    Args:
+        text (str): Conteúdo original.
+        newline_replacement (str): Texto que substitui cada quebra de linha.
+
+    Returns:
+        str: Conteúdo limpo.
+    """
+    return text.replace("\n", newline_replacement)
+
+
+def process_pdf_pages(path, start, end, chunk_size, chunk_overlap, newline_replacement):
+    """
+    Extrai, divide e limpa uma faixa de páginas do PDF. Executada nos workers do pool.
+
+    Args:
+        path (str): Caminho do PDF.
+        start (int): Primeira página da faixa (inclusive).
+        end (int): Última página da faixa (exclusive).
+        chunk_size (int): Tamanho máximo de cada chunk.
+        chunk_overlap (int): Sobreposição entre chunks.
+        newline_replacement (str): Texto que substitui cada quebra de linha.
+
+    Returns:
+        list[tuple[str, dict]]: Conteúdo e metadados de cada chunk da faixa.
+    """
+    import fitz
+
+    splitter = make_splitter(chunk_size, chunk_overlap)
+    chunks = []
+    with fitz.open(path) as pdf:
+        total_pages = len(pdf)
+        for page_number in range(start, min(end, total_pages)):
+            text = pdf[page_number].get_text()
+            for chunk in splitter.split_text(text):
+                metadata = {
+                    "source": path,
+                    "file_path": path,
+                    "page": page_number,
+                    "total_pages": total_pages,
+                }
+                chunks.append((clean_text(chunk, newline_replacement), metadata))
+    return chunks
+
+
+def count_pdf_pages(path):
+    """
+    Conta as páginas do PDF sem extrair o texto.
+
+    Args:
+        path (str): Caminho do PDF.
+
+    Returns:
+        int: Número de páginas.
+    """
+    import fitz
+
+    with fitz.open(path) as pdf:
+        return len(pdf)
+
+
+def process_pool(max_workers=None):
+    """
+    Cria o pool de processos para extração das páginas.
+
+    Usa o método "spawn" (como common/supervisor.py), disponível também no
+    Windows: os workers não herdam as threads e conexões do processo que os
+    cria. O pool deve ser criado uma única vez, antes do processamento, e
+    repassado a `iter_chunks`. Os workers reimportam o script principal, que
+    deve proteger o que não pode ser repetido (ex.: a construção do índice)
+    com `if __name__ == "__main__"` ou `multiprocessing.parent_process()`.
+
+    Args:
+        max_workers (int): Número de processos (padrão: número de CPUs).
+
+    Returns:
+        ProcessPoolExecutor | None: Pool de processos, ou None para processar no próprio
+        processo (um único worker ou chamada a partir de um processo filho).
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    # Um processo filho em inicialização não pode criar novos processos
+    if max_workers <= 1 or multiprocessing.parent_process() is not None:
+        return None
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def iter_pdf_chunks(path, chunk_size=1000, chunk_overlap=0, newline_replacement="",
+                    pages_per_task=DEFAULT_PAGES_PER_TASK, executor=None, max_in_flight=None):
+    """
+    Gera os chunks de um PDF em fluxo, processando faixas de páginas em paralelo.
+
+    Args:
+        path (str): Caminho do PDF.
+        chunk_size (int): Tamanho máximo de cada chunk.
+        chunk_overlap (int): Sobreposição entre chunks.
+        newline_replacement (str): Texto que substitui cada quebra de linha.
+        pages_per_task (int): Páginas processadas por tarefa do pool.
+        executor (ProcessPoolExecutor | None): Pool criado por `process_pool`; se None,
+            as páginas são processadas no próprio processo.
+        max_in_flight (int): Faixas em processamento ao mesmo tempo (padrão: 2 por CPU).
+
+    Yields:
+        Document: Chunk limpo, com a página de origem nos metadados.
+    """
+    total_pages = count_pdf_pages(path)
+    ranges = ((start, start + pages_per_task) for start in range(0, total_pages, pages_per_task))
+    args = (chunk_size, chunk_overlap, newline_replacement)
+
+    if executor is None:
+        for start, end in ranges:
+            for text, metadata in process_pdf_pages(path, start, end, *args):
+                yield Document(page_content=text, metadata=metadata)
+        return
+
+    # Janela limitada de faixas em processamento: mantém a memória constante
+    max_in_flight = max_in_flight or 2 * (os.cpu_count() or 1)
+    pending = deque()
+    for start, end in ranges:
+        pending.append(executor.submit(process_pdf_pages, path, start, end, *args))
+        while len(pending) >= max_in_flight:
+            for text, metadata in pending.popleft().result():
+                yield Document(page_content=text, metadata=metadata)
+    while pending:
+        for text, metadata in pending.popleft().result():
+            yield Document(page_content=text, metadata=metadata)
+
+
+def iter_markdown_chunks(path, chunk_size=1000, chunk_overlap=0, newline_replacement=""):
+    """
+    Gera os chunks de um arquivo Markdown em fluxo.
+
+    Args:
+        path (str): Caminho do arquivo Markdown.
+        chunk_size (int): Tamanho máximo de cada chunk.
+        chunk_overlap (int): Sobreposição entre chunks.
+        newline_replacement (str): Texto que substitui cada quebra de linha.
+
+    Yields:
+        Document: Chunk limpo.
+    """
+    splitter = make_splitter(chunk_size, chunk_overlap)
+    for doc in UnstructuredMarkdownLoader(path).lazy_load():
+        for chunk in splitter.split_documents([doc]):
+            chunk.page_content = clean_text(chunk.page_content, newline_replacement)
+            yield chunk
+
+
+def iter_chunks(path, **kwargs):
+    """
+    Gera os chunks de um documento, escolhendo o loader pela extensão do arquivo.
+
+    Args:
+        path (str): Caminho do documento (.pdf ou .md).
+        **kwargs: Parâmetros de chunking repassados ao loader.
+
+    Yields:
+        Document: Chunk limpo.
+    """
+    if path.lower().endswith(".pdf"):
+        yield from iter_pdf_chunks(path, **kwargs)
+    else:
+        kwargs.pop("pages_per_task", None)
+        kwargs.pop("executor", None)
+        kwargs.pop("max_in_flight", None)
+        yield from iter_markdown_chunks(path, **kwargs)
@@ -0,0 +1,136 @@
+"""
+Backends de embeddings disponíveis para os bots e scripts de ingestão.
+
+O backend é escolhido pela variável de ambiente EMBEDDING_BACKEND (openai,
+ollama ou fake). O backend fake gera vetores determinísticos localmente, com
+latência e capacidade configuráveis, para medir a vazão da ingestão offline.
+"""
+
+import hashlib
+import math
+import random
+import threading
+import time
+
+from langchain_core.embeddings import Embeddings
+
+from common.config import env_float, env_int
+
+# Tamanho de lote adequado a cada backend: a API da OpenAI aceita lotes grandes,
+# enquanto o Ollama local processa poucos textos por chamada
+BACKEND_BATCH_SIZES = {
+    "openai": 256,
+    "ollama": 16,
+    "fake": 64,
+}
+
+# Modelo padrão de cada backend
+DEFAULT_MODELS = {
+    "openai": "text-embedding-ada-002",
+    "ollama": "llama3.2:1b",
+    "fake": "fake-embedding",
+}
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Backend de embeddings local e determinístico, usado em benchmarks e testes de carga.
+    Simula a latência de rede e o limite de requisições simultâneas de um backend real.
+
+    Attributes:
+        size (int): Dimensão dos vetores gerados.
+        latency_per_call (float): Latência fixa de cada chamada, em segundos.
+        latency_per_text (float): Latência adicional por texto do lote, em segundos.
+        calls (int): Número de chamadas recebidas.
+        texts (int): Número de textos vetorizados.
+    """
+    def __init__(self, size=256, latency_per_call=0.0, latency_per_text=0.0, max_concurrency=None):
+        """
+        Inicializa o backend fake.
+
+        Args:
+            size (int): Dimensão dos vetores gerados.
+            latency_per_call (float): Latência fixa de cada chamada, em segundos.
+            latency_per_text (float): Latência adicional por texto, em segundos.
+            max_concurrency (int): Chamadas simultâneas atendidas; as demais aguardam.
+        """
+        self.size = size
+        self.latency_per_call = latency_per_call
+        self.latency_per_text = latency_per_text
+        self.calls = 0
+        self.texts = 0
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self._lock = threading.Lock()
+
+    def _vector(self, text):
+        seed = int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:8], 'big')
+        rng = random.Random(seed)
+        vector = [rng.gauss(0, 1) for _ in range(self.size)]
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    def _simulate(self, count):
+        delay = self.latency_per_call + self.latency_per_text * count
+        if self._slots is None:
+            time.sleep(delay)
+            return
+        with self._slots:
+            time.sleep(delay)
+
+    def embed_documents(self, texts):
+        """
+        Gera vetores determinísticos para uma lista de textos.
+
+        Args:
+            texts (list[str]): Textos a vetorizar.
+
+        Returns:
+            list[list[float]]: Vetores normalizados.
+        """
+        self._simulate(len(texts))
+        with self._lock:
+            self.calls += 1
+            self.texts += len(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        """
+        Gera o vetor determinístico de uma pergunta.
+
+        Args:
+            text (str): Pergunta a vetorizar.
+
+        Returns:
+            list[float]: Vetor normalizado.
+        """
+        return self.embed_documents([text])[0]
+
+
+def create_embeddings(backend, model=None, api_key=None):
+    """
+    Cria o backend de embeddings configurado.
+
+    Args:
+        backend (str): Nome do backend (openai, ollama ou fake).
+        model (str): Modelo a usar (por padrão, o modelo padrão do backend).
+        api_key (str): Chave da API, usada apenas pelo backend OpenAI.
+
+    Returns:
+        Embeddings: Backend de embeddings.
+
+    Raises:
+        ValueError: Se o backend não for reconhecido.
+    """
+    model = model or DEFAULT_MODELS.get(backend)
+    if backend == "openai":
+        from langchain.embeddings.openai import OpenAIEmbeddings
+        return OpenAIEmbeddings(model=model, api_key=api_key)
+    if backend == "ollama":
+        from langchain_ollama import OllamaEmbeddings
+        return OllamaEmbeddings(model=model)
+    if backend == "fake":
+        return FakeEmbeddings(
+            size=env_int("FAKE_EMBEDDING_SIZE", 256, minimum=1),
+            latency_per_call=env_float("FAKE_EMBEDDING_LATENCY", 0.0, minimum=0),
+        )
+    raise ValueError(f"Backend de embeddings desconhecido: {backend}")
@@ -0,0 +1,255 @@
+"""
+Cache persistente de embeddings, compartilhado pelos bots e pelos scripts de ingestão.
+
+Cada vetor é endereçado pelo hash de (modelo, texto normalizado) e salvo em um
+arquivo SQLite local como float32 binário. O cache tem tamanho limitado e
+descarta as entradas usadas há mais tempo (LRU). Tanto a construção do índice
+quanto o embedding das perguntas consultam o cache antes de chamar o backend.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+
+from langchain_core.embeddings import Embeddings
+
+from common.config import env_int
+
+# Local padrão do cache, fora do diretório de cada bot para ser compartilhado
+DEFAULT_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "fhemig-chatbots", "embeddings.sqlite3"),
+)
+
+# Número máximo de vetores mantidos no cache
+DEFAULT_MAX_ENTRIES = env_int("EMBEDDING_CACHE_MAX_ENTRIES", 200000, minimum=1)
+
+# Ao exceder o limite, o cache é reduzido para esta fração do máximo
+EVICTION_TARGET = 0.9
+
+# Limite de parâmetros por consulta do SQLite
+SQLITE_BATCH = 500
+
+
+def normalize_text(text):
+    """
+    Normaliza o texto antes do hash: forma Unicode NFC e espaços colapsados.
+
+    Args:
+        text (str): Texto original.
+
+    Returns:
+        str: Texto normalizado.
+    """
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def cache_key(model, text):
+    """
+    Calcula a chave de cache de um texto para um modelo de embeddings.
+
+    Args:
+        model (str): Nome do modelo de embeddings.
+        text (str): Texto a ser vetorizado.
+
+    Returns:
+        bytes: Digest SHA-256 de (modelo, texto normalizado).
+    """
+    return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode('utf-8')).digest()
+
+
+class EmbeddingCache:
+    """
+    Armazenamento dos vetores em SQLite, com política de descarte LRU.
+
+    Attributes:
+        path (str): Caminho do arquivo SQLite.
+        max_entries (int): Número máximo de vetores mantidos.
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        Abre (ou cria) o arquivo de cache.
+
+        Args:
+            path (str): Caminho do arquivo SQLite.
+            max_entries (int): Número máximo de vetores mantidos.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key BLOB PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " last_access REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON embeddings(last_access)")
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, model, texts):
+        """
+        Busca os vetores de vários textos e atualiza o instante do último acesso.
+
+        Args:
+            model (str): Nome do modelo de embeddings.
+            texts (list[str]): Textos a buscar.
+
+        Returns:
+            list[list[float] | None]: Vetor de cada texto, ou None se ausente.
+        """
+        keys = [cache_key(model, text) for text in texts]
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), SQLITE_BATCH):
+                batch = list(set(keys[start:start + SQLITE_BATCH]))
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+                if rows:
+                    hit_keys = [row[0] for row in rows]
+                    self._conn.execute(
+                        f"UPDATE embeddings SET last_access = ? WHERE key IN ({','.join('?' * len(hit_keys))})",
+                        [time.time(), *hit_keys],
+                    )
+            self._conn.commit()
+
+        vectors = []
+        for key in keys:
+            blob = found.get(key)
+            vectors.append(array('f', blob).tolist() if blob is not None else None)
+        return vectors
+
+    def put_many(self, model, texts, vectors):
+        """
+        Grava os vetores de vários textos, descartando entradas antigas se necessário.
+
+        Args:
+            model (str): Nome do modelo de embeddings.
+            texts (list[str]): Textos vetorizados.
+            vectors (list[list[float]]): Vetores correspondentes.
+        """
+        now = time.time()
+        rows = [
+            (cache_key(model, text), array('f', vector).tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            # Apenas as linhas realmente novas entram na contagem: as chaves já gravadas
+            # (ex.: por outro processo) são ignoradas aqui e atualizadas em seguida
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)", rows
+            )
+            inserted = self._conn.total_changes - before
+            if inserted < len(rows):
+                self._conn.executemany(
+                    "UPDATE embeddings SET vector = ?, last_access = ? WHERE key = ?",
+                    [(vector, last_access, key) for key, vector, last_access in rows],
+                )
+            self._conn.commit()
+            self._count += inserted
+            if self._count > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        """
+        Remove as entradas acessadas há mais tempo até o cache voltar abaixo do limite.
+        Deve ser chamado com o lock adquirido.
+        """
+        # Outros processos também escrevem no arquivo: recontar antes de descartar
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = self._count - int(self.max_entries * EVICTION_TARGET)
+        if excess <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_access LIMIT ?)",
+            (excess,),
+        )
+        self._conn.commit()
+        self._count -= excess
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        """
+        Fecha a conexão com o arquivo de cache.
+        """
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings que consultam o cache persistente antes de chamar o backend.
+    Apenas os textos ausentes do cache são enviados ao modelo.
+
+    Attributes:
+        embeddings (Embeddings): Backend de embeddings (OpenAI, Ollama, ...).
+        model_name (str): Nome do modelo, parte da chave do cache.
+        cache (EmbeddingCache): Cache persistente.
+    """
+    def __init__(self, embeddings, model_name, cache=None):
+        """
+        Inicializa o wrapper de cache.
+
+        Args:
+            embeddings (Embeddings): Backend de embeddings.
+            model_name (str): Nome do modelo, parte da chave do cache.
+            cache (EmbeddingCache): Cache a usar (por padrão, o arquivo compartilhado).
+        """
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache if cache is not None else EmbeddingCache()
+
+    def embed_documents(self, texts):
+        """
+        Vetoriza uma lista de textos, usando o cache sempre que possível.
+
+        Args:
+            texts (list[str]): Textos a vetorizar.
+
+        Returns:
+            list[list[float]]: Vetores na mesma ordem dos textos.
+        """
+        vectors = self.cache.get_many(self.model_name, texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            computed = self.embeddings.embed_documents([texts[i] for i in missing])
+            self.cache.put_many(self.model_name, [texts[i] for i in missing], computed)
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+        return vectors
+
+    def embed_query(self, text):
+        """
+        Vetoriza a pergunta do usuário, usando o cache sempre que possível.
+
+        Args:
+            text (str): Pergunta a vetorizar.
+
+        Returns:
+            list[float]: Vetor da pergunta.
+        """
+        vector = self.cache.get_many(self.model_name, [text])[0]
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put_many(self.model_name, [text], [vector])
+        return vector
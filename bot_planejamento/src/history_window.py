@@ -0,0 +1,150 @@
+"""
+Janela do histórico da conversa limitada por número de tokens.
+
+Apenas as mensagens mais recentes que cabem no orçamento de tokens entram no
+prompt. As mensagens mais antigas são condensadas em um resumo acumulado, que é
+atualizado de forma incremental (só as mensagens novas são resumidas, junto com
+o resumo anterior) e apenas quando a janela estoura o orçamento. Ao resumir,
+a janela é reduzida a uma fração do orçamento, de modo que o resumo não precise
+ser refeito a cada nova mensagem.
+"""
+
+from langchain.schema import HumanMessage
+
+# Tokens extras de cada mensagem no formato de chat (papel e separadores)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def _load_encoder(encoding_name):
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(encoding_name)
+    except Exception:
+        # Sem tiktoken ou sem acesso ao arquivo do encoding: usa a estimativa
+        return None
+
+
+class TokenCounter:
+    """
+    Conta tokens com o tokenizer do modelo (tiktoken) ou, na falta dele, com uma
+    estimativa de 4 caracteres por token.
+
+    Attributes:
+        encoding_name (str): Nome do encoding do tiktoken.
+    """
+    def __init__(self, encoding_name="o200k_base"):
+        """
+        Inicializa o contador. O encoding é carregado na primeira contagem.
+
+        Args:
+            encoding_name (str): Nome do encoding do tiktoken (o200k_base para o gpt-4o).
+        """
+        self.encoding_name = encoding_name
+        self._encoder = None
+        self._loaded = False
+
+    def __call__(self, text):
+        """
+        Conta os tokens do texto.
+
+        Args:
+            text (str): Texto a ser contado.
+
+        Returns:
+            int: Número de tokens.
+        """
+        if not self._loaded:
+            self._encoder = _load_encoder(self.encoding_name)
+            self._loaded = True
+        if self._encoder is None:
+            return (len(text) + 3) // 4
+        return len(self._encoder.encode(text, disallowed_special=()))
+
+
+class HistoryWindow:
+    """
+    Seleciona as mensagens do histórico que cabem no orçamento de tokens do prompt.
+
+    Attributes:
+        max_tokens (int): Orçamento de tokens do histórico (resumo + mensagens recentes).
+        target_ratio (float): Fração do orçamento ocupada pelas mensagens recentes
+            depois de uma atualização do resumo.
+        count_tokens (Callable[[str], int]): Função de contagem de tokens.
+    """
+    def __init__(self, max_tokens=1000, target_ratio=0.5, count_tokens=None):
+        """
+        Inicializa a janela.
+
+        Args:
+            max_tokens (int): Orçamento de tokens do histórico.
+            target_ratio (float): Fração do orçamento mantida após resumir.
+            count_tokens (Callable[[str], int]): Função de contagem de tokens.
+        """
+        self.max_tokens = max_tokens
+        self.target_ratio = target_ratio
+        self.count_tokens = count_tokens or TokenCounter()
+
+    def message_tokens(self, message):
+        """
+        Conta os tokens de uma mensagem do histórico.
+
+        Args:
+            message (BaseMessage): Mensagem do usuário ou do assistente.
+
+        Returns:
+            int: Número de tokens.
+        """
+        return self.count_tokens(message.content) + MESSAGE_OVERHEAD_TOKENS
+
+    def _fit(self, messages, start, budget):
+        # Índice da primeira mensagem do maior sufixo de messages[start:] que cabe no orçamento
+        index = len(messages)
+        used = 0
+        while index > start:
+            tokens = self.message_tokens(messages[index - 1])
+            if used + tokens > budget:
+                break
+            used += tokens
+            index -= 1
+        return index
+
+    def select(self, messages, summary="", start=0):
+        """
+        Seleciona as mensagens recentes que cabem no orçamento, descontados os tokens
+        do resumo.
+
+        Args:
+            messages (list[BaseMessage]): Histórico completo do usuário.
+            summary (str): Resumo das mensagens anteriores a `start`.
+            start (int): Número de mensagens já incluídas no resumo.
+
+        Returns:
+            list[BaseMessage]: Mensagens recentes, em ordem cronológica.
+        """
+        budget = self.max_tokens - (self.count_tokens(summary) if summary else 0)
+        return messages[self._fit(messages, start, max(budget, 0)):]
+
+    def overflow(self, messages, summary="", start=0):
+        """
+        Indica quais mensagens devem ser incorporadas ao resumo. Só há mensagens a
+        resumir quando o resumo e as mensagens não resumidas excedem o orçamento; nesse
+        caso, as mais antigas são separadas até que as restantes ocupem `target_ratio`
+        do orçamento, sem dividir uma pergunta de sua resposta.
+
+        Args:
+            messages (list[BaseMessage]): Histórico completo do usuário.
+            summary (str): Resumo atual.
+            start (int): Número de mensagens já incluídas no resumo.
+
+        Returns:
+            int | None: Índice final (exclusive) das mensagens a resumir, ou None se a
+            janela ainda cabe no orçamento.
+        """
+        summary_tokens = self.count_tokens(summary) if summary else 0
+        if self._fit(messages, start, max(self.max_tokens - summary_tokens, 0)) == start:
+            return None
+        end = self._fit(messages, start, int(self.max_tokens * self.target_ratio))
+        # A janela recente começa sempre em uma pergunta do usuário
+        while end < len(messages) and not isinstance(messages[end], HumanMessage):
+            end += 1
+        return end if end > start else None
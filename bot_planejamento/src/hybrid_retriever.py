@@ -0,0 +1,89 @@
+"""
+Retriever híbrido: busca lexical (BM25) combinada com a busca vetorial (FAISS).
+
+As duas listas de resultados são combinadas por Reciprocal Rank Fusion. Quando
+o melhor resultado lexical é confiável (contém os termos da pergunta e se
+destaca dos demais), a resposta é dada só com o índice lexical, sem a chamada
+de embedding da pergunta.
+"""
+
+from typing import List
+
+from langchain.schema import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from pydantic import field_validator
+
+from .lexical_index import BM25Index
+
+# Modos de recuperação aceitos em RETRIEVER_MODE
+MODES = ("hybrid", "lexical", "dense")
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever que combina o índice BM25 e a base vetorial FAISS.
+
+    Attributes:
+        vectorstore (VectorStore): Base vetorial com os chunks.
+        lexical (BM25Index): Índice lexical sobre os mesmos chunks.
+        k (int): Número de documentos retornados.
+        fetch_k (int): Candidatos buscados em cada índice antes da fusão.
+        rrf_k (int): Constante do Reciprocal Rank Fusion.
+        mode (str): "hybrid", "lexical" (só BM25) ou "dense" (só FAISS).
+        min_coverage (float): Cobertura mínima dos termos para responder só com BM25.
+        min_margin (float): Vantagem mínima do primeiro resultado BM25 sobre o segundo.
+    """
+    vectorstore: VectorStore
+    lexical: BM25Index
+    k: int = 3
+    fetch_k: int = 10
+    rrf_k: int = 60
+    mode: str = "hybrid"
+    min_coverage: float = 0.8
+    min_margin: float = 1.5
+
+    @field_validator("mode")
+    @classmethod
+    def _check_mode(cls, mode):
+        # Um valor inválido (ex.: RETRIEVER_MODE="bm25") não pode cair silenciosamente no modo híbrido
+        if mode not in MODES:
+            raise ValueError(f"Modo de recuperação inválido: {mode!r}. Use um de: {', '.join(MODES)}")
+        return mode
+
+    def _documents(self, doc_ids):
+        return [self.vectorstore.docstore.search(doc_id) for doc_id in doc_ids]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        """
+        Recupera os chunks mais relevantes para a pergunta.
+
+        Args:
+            query (str): Pergunta do usuário.
+            run_manager (CallbackManagerForRetrieverRun): Gerenciador de callbacks.
+
+        Returns:
+            list[Document]: Chunks mais relevantes.
+        """
+        if self.mode == "dense":
+            return self.vectorstore.similarity_search(query, k=self.k)
+
+        lexical_results = self.lexical.search(query, k=self.fetch_k)
+        lexical_ids = [doc_id for doc_id, _ in lexical_results]
+        if self.mode == "lexical" or self.lexical.is_confident(
+            query, lexical_results, min_coverage=self.min_coverage, min_margin=self.min_margin
+        ):
+            return self._documents(lexical_ids[:self.k])
+
+        dense_ids = [doc.id for doc in self.vectorstore.similarity_search(query, k=self.fetch_k)]
+
+        # Reciprocal Rank Fusion: cada lista contribui 1 / (rrf_k + posição)
+        fused = {}
+        for ranking in (lexical_ids, dense_ids):
+            for rank, doc_id in enumerate(ranking):
+                fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+        best = sorted(fused, key=fused.get, reverse=True)[:self.k]
+        return self._documents(best)
@@ -0,0 +1,358 @@
+"""
+Persistência do índice FAISS em disco.
+
+O índice vetorial é construído uma única vez e salvo junto com um manifesto
+contendo o hash do documento de origem, o modelo de embeddings e os parâmetros
+de chunking. Nas inicializações seguintes, se o manifesto ainda corresponde ao
+documento e ao modelo, os vetores são carregados por memory-map, sem chunking
+e sem nenhuma chamada à API de embeddings.
+
+Quando o documento muda, a atualização é incremental: cada chunk é identificado
+pelo hash do seu conteúdo, apenas chunks novos ou alterados são vetorizados e os
+chunks que deixaram de existir são removidos do índice FAISS.
+
+Junto com o índice vetorial é salvo um índice lexical BM25 dos mesmos chunks.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import faiss
+import numpy as np
+from langchain.schema import Document
+from langchain.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
+
+from .ingestion import ProgressReporter, embed_in_batches
+from .lexical_index import BM25Index
+
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.json"
+LEXICAL_FILE = "lexical.json"
+MANIFEST_FILE = "manifest.json"
+
+# Incrementar sempre que o formato dos arquivos salvos mudar
+MANIFEST_VERSION = 3
+
+# Flag de leitura por memory-map (IO_FLAG_MMAP_IFC mapeia também índices flat)
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+def file_sha256(path):
+    """
+    Calcula o hash SHA-256 do conteúdo de um arquivo, lendo-o em blocos.
+
+    Args:
+        path (str): Caminho do arquivo.
+
+    Returns:
+        str: Hash hexadecimal do conteúdo.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_hash(text):
+    """
+    Calcula o hash do conteúdo de um chunk, usado como seu identificador no índice.
+
+    Args:
+        text (str): Conteúdo do chunk.
+
+    Returns:
+        str: Hash hexadecimal do conteúdo.
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def write_atomic(path, data):
+    """
+    Escreve um arquivo de forma atômica (arquivo temporário + os.replace).
+
+    Args:
+        path (str): Caminho final do arquivo.
+        data (str | bytes): Conteúdo a ser escrito.
+    """
+    tmp_path = f"{path}.tmp"
+    mode = 'wb' if isinstance(data, bytes) else 'w'
+    encoding = None if isinstance(data, bytes) else 'utf-8'
+    with open(tmp_path, mode, encoding=encoding) as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class IndexStore:
+    """
+    Gerencia o artefato do índice FAISS em disco (índice, docstore e manifesto).
+
+    Attributes:
+        index_dir (str): Diretório onde o artefato é salvo.
+        embeddings (Embeddings): Modelo de embeddings usado na construção e nas consultas.
+        embedding_model (str): Nome do modelo de embeddings, registrado no manifesto.
+        source_path (str): Documento de origem indexado.
+        chunk_params (dict): Parâmetros de chunking, registrados no manifesto.
+        batch_size (int | None): Chunks por chamada ao backend (padrão: adequado ao backend).
+        max_workers (int): Chamadas simultâneas ao backend de embeddings.
+    """
+    def __init__(self, index_dir, embeddings, embedding_model, source_path, chunk_params=None,
+                 batch_size=None, max_workers=4):
+        """
+        Inicializa o gerenciador do índice.
+
+        Args:
+            index_dir (str): Diretório onde o artefato é salvo.
+            embeddings (Embeddings): Modelo de embeddings.
+            embedding_model (str): Nome do modelo de embeddings.
+            source_path (str): Documento de origem indexado.
+            chunk_params (dict): Parâmetros de chunking (ex.: chunk_size, chunk_overlap).
+            batch_size (int | None): Chunks por chamada ao backend.
+            max_workers (int): Chamadas simultâneas ao backend de embeddings.
+        """
+        self.index_dir = index_dir
+        self.embeddings = embeddings
+        self.embedding_model = embedding_model
+        self.source_path = source_path
+        self.chunk_params = chunk_params or {}
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+
+    def _path(self, name):
+        return os.path.join(self.index_dir, name)
+
+    def expected_manifest(self):
+        """
+        Monta o manifesto correspondente ao estado atual do documento e do modelo.
+
+        Returns:
+            dict: Campos que identificam univocamente o artefato.
+        """
+        return {
+            "version": MANIFEST_VERSION,
+            "source_sha256": file_sha256(self.source_path),
+            "embedding_model": self.embedding_model,
+            "chunk_params": self.chunk_params,
+        }
+
+    def read_manifest(self):
+        """
+        Lê o manifesto salvo em disco.
+
+        Returns:
+            dict | None: Manifesto salvo, ou None se inexistente ou corrompido.
+        """
+        try:
+            with open(self._path(MANIFEST_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def is_fresh(self, expected=None, saved=None):
+        """
+        Verifica se o artefato salvo corresponde ao documento e ao modelo atuais.
+
+        Args:
+            expected (dict): Manifesto esperado (calculado se não informado).
+            saved (dict): Manifesto salvo (lido do disco se não informado).
+
+        Returns:
+            bool: True se o índice em disco pode ser reutilizado.
+        """
+        saved = saved or self.read_manifest()
+        if saved is None:
+            return False
+        expected = expected or self.expected_manifest()
+        return all(saved.get(key) == value for key, value in expected.items())
+
+    def read_entries(self):
+        """
+        Lê a docstore salva em disco.
+
+        Returns:
+            list[dict]: Entradas com id (hash do chunk), faiss_id, conteúdo e metadados.
+        """
+        with open(self._path(DOCSTORE_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load(self):
+        """
+        Carrega o índice salvo, mapeando os vetores em memória (memory-map).
+
+        Returns:
+            FAISS: Base vetorial pronta para consultas.
+        """
+        try:
+            index = faiss.read_index(self._path(INDEX_FILE), MMAP_FLAGS)
+        except RuntimeError:
+            # Tipos de índice sem suporte a mmap são lidos normalmente
+            index = faiss.read_index(self._path(INDEX_FILE))
+
+        entries = self.read_entries()
+        docstore = InMemoryDocstore({
+            entry["id"]: Document(id=entry["id"], page_content=entry["page_content"], metadata=entry["metadata"])
+            for entry in entries
+        })
+        # Com IndexIDMap2 o FAISS devolve o faiss_id de cada vetor, não a posição
+        index_to_docstore_id = {entry["faiss_id"]: entry["id"] for entry in entries}
+
+        return FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id,
+        )
+
+    def load_lexical(self):
+        """
+        Carrega o índice lexical BM25 salvo ao lado do índice FAISS.
+
+        Returns:
+            BM25Index: Índice lexical dos chunks.
+        """
+        with open(self._path(LEXICAL_FILE), 'r', encoding='utf-8') as f:
+            return BM25Index.from_dict(json.load(f))
+
+    def save(self, index, entries, manifest):
+        """
+        Salva o índice, a docstore, o índice lexical e o manifesto. O manifesto é removido antes e
+        escrito por último, de modo que uma gravação interrompida força a
+        reconstrução na próxima inicialização.
+
+        Args:
+            index (faiss.Index): Índice FAISS com os vetores.
+            entries (list[dict]): Entradas da docstore.
+            manifest (dict): Manifesto correspondente ao índice.
+        """
+        os.makedirs(self.index_dir, exist_ok=True)
+        if os.path.exists(self._path(MANIFEST_FILE)):
+            os.remove(self._path(MANIFEST_FILE))
+
+        write_atomic(self._path(INDEX_FILE), faiss.serialize_index(index).tobytes())
+        write_atomic(self._path(DOCSTORE_FILE), json.dumps(entries, ensure_ascii=False))
+        lexical = BM25Index.build((entry["id"], entry["page_content"]) for entry in entries)
+        write_atomic(self._path(LEXICAL_FILE), json.dumps(lexical.to_dict(), ensure_ascii=False))
+
+        manifest = dict(manifest, num_chunks=len(entries), created_at=datetime.now().isoformat())
+        write_atomic(self._path(MANIFEST_FILE), json.dumps(manifest, ensure_ascii=False, indent=2))
+
+    def can_update_incrementally(self, saved, expected):
+        """
+        Verifica se o artefato salvo pode ser atualizado chunk a chunk. Isso só é
+        possível se o formato, o modelo e os parâmetros de chunking não mudaram.
+
+        Args:
+            saved (dict | None): Manifesto salvo em disco.
+            expected (dict): Manifesto esperado.
+
+        Returns:
+            bool: True se apenas o conteúdo do documento mudou.
+        """
+        if saved is None:
+            return False
+        return all(
+            saved.get(key) == expected[key]
+            for key in ("version", "embedding_model", "chunk_params")
+        )
+
+    def update(self, documents, incremental):
+        """
+        Sincroniza o índice com os chunks atuais do documento, vetorizando apenas
+        os chunks cujo hash ainda não está no índice e removendo os obsoletos.
+        Os chunks são consumidos em fluxo e os novos são vetorizados em lotes
+        concorrentes à medida que aparecem.
+
+        Args:
+            documents (Iterable[Document]): Chunks atuais do documento.
+            incremental (bool): Se False, descarta o índice salvo e reconstrói do zero.
+
+        Returns:
+            tuple: Índice FAISS atualizado e a nova lista de entradas da docstore.
+        """
+        index = None
+        existing = {}
+        next_id = 0
+        if incremental:
+            index = faiss.read_index(self._path(INDEX_FILE))
+            existing = {entry["id"]: entry for entry in self.read_entries()}
+            next_id = max((entry["faiss_id"] for entry in existing.values()), default=-1) + 1
+
+        entries = []
+        seen = set()
+
+        def new_entries():
+            nonlocal next_id
+            for doc in documents:
+                doc_id = chunk_hash(doc.page_content)
+                if doc_id in seen:
+                    # Chunks repetidos são indexados uma única vez
+                    continue
+                seen.add(doc_id)
+                if doc_id in existing:
+                    # Conteúdo já vetorizado: apenas os metadados são atualizados
+                    entries.append(dict(existing[doc_id], metadata=doc.metadata))
+                    continue
+                entry = {"id": doc_id, "faiss_id": next_id, "page_content": doc.page_content, "metadata": doc.metadata}
+                next_id += 1
+                entries.append(entry)
+                yield entry
+
+        embedded = 0
+        batches = embed_in_batches(
+            new_entries(),
+            self.embeddings,
+            text_of=lambda entry: entry["page_content"],
+            batch_size=self.batch_size,
+            max_workers=self.max_workers,
+            progress=ProgressReporter(),
+        )
+        for batch, vectors in batches:
+            vectors = np.array(vectors, dtype='float32')
+            if index is None:
+                index = faiss.IndexIDMap2(faiss.IndexFlatL2(vectors.shape[1]))
+            index.add_with_ids(vectors, np.array([entry["faiss_id"] for entry in batch], dtype='int64'))
+            embedded += len(batch)
+
+        stale_ids = [entry["faiss_id"] for doc_id, entry in existing.items() if doc_id not in seen]
+        if stale_ids:
+            index.remove_ids(np.array(stale_ids, dtype='int64'))
+
+        if index is None:
+            raise ValueError(f"Nenhum chunk encontrado em {self.source_path} para indexar.")
+
+        print(
+            f"Índice atualizado em {self.index_dir}: {embedded} chunks vetorizados, "
+            f"{len(stale_ids)} removidos, {len(entries) - embedded} reaproveitados."
+        )
+        return index, entries
+
+    def load_or_build(self, load_documents):
+        """
+        Carrega o índice salvo ou, se o documento mudou, atualiza apenas os chunks
+        alterados. Se o modelo de embeddings ou o chunking mudaram, reconstrói o
+        índice inteiro.
+
+        Args:
+            load_documents (Callable[[], Iterable[Document]]): Função que carrega e divide
+                o documento em chunks; só é chamada quando o índice precisa ser atualizado.
+
+        Returns:
+            FAISS: Base vetorial pronta para consultas.
+        """
+        expected = self.expected_manifest()
+        saved = self.read_manifest()
+        if self.is_fresh(expected, saved):
+            return self.load()
+
+        incremental = self.can_update_incrementally(saved, expected)
+        if not incremental:
+            print(f"Índice ausente ou incompatível em {self.index_dir}. Reconstruindo...")
+        index, entries = self.update(load_documents(), incremental)
+        self.save(index, entries, expected)
+        # Recarrega do disco para que as consultas usem o índice mapeado em memória
+        return self.load()
@@ -0,0 +1,233 @@
+"""
+Pipeline de vetorização em lotes para a ingestão de PDFs e Markdown.
+
+Os chunks são consumidos de forma incremental, agrupados em lotes do tamanho
+adequado ao backend e enviados com concorrência limitada. Falhas transitórias
+(limite de requisições, timeout, conexão, erros 5xx) são repetidas com backoff
+exponencial; as demais interrompem a ingestão imediatamente. O progresso é
+reportado periodicamente e os resultados são devolvidos na mesma ordem de entrada.
+"""
+
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from .embedding_backends import BACKEND_BATCH_SIZES
+
+# Nomes das classes de embeddings de cada backend, para escolher o tamanho de lote
+BACKEND_CLASSES = {
+    "OpenAIEmbeddings": "openai",
+    "OllamaEmbeddings": "ollama",
+    "FakeEmbeddings": "fake",
+}
+
+DEFAULT_BATCH_SIZE = 64
+
+# Códigos HTTP que indicam falha transitória: timeout, limite de requisições e erros do servidor
+TRANSIENT_STATUS_CODES = frozenset({408, 409, 429})
+
+
+def _transient_error_types():
+    # Erros de rede e timeout dos clientes HTTP usados pelos backends (importados se instalados)
+    types = [TimeoutError, ConnectionError]
+    try:
+        import openai
+        types.append(openai.APIConnectionError)  # inclui APITimeoutError
+    except ImportError:
+        pass
+    try:
+        import httpx
+        types.append(httpx.TransportError)
+    except ImportError:
+        pass
+    try:
+        import requests
+        types.extend((requests.ConnectionError, requests.Timeout))
+    except ImportError:
+        pass
+    return tuple(types)
+
+
+TRANSIENT_ERROR_TYPES = _transient_error_types()
+
+
+def is_transient(error):
+    """
+    Indica se uma falha do backend de embeddings pode ser resolvida com uma nova tentativa.
+
+    Args:
+        error (Exception): Falha da chamada ao backend.
+
+    Returns:
+        bool: True para limite de requisições, timeout, erro de conexão ou erro 5xx;
+        False para os demais (ex.: chave inválida, requisição inválida, texto longo demais).
+    """
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status in TRANSIENT_STATUS_CODES or status >= 500
+    return isinstance(error, TRANSIENT_ERROR_TYPES)
+
+
+def batch_size_for(embeddings):
+    """
+    Escolhe o tamanho de lote adequado ao backend de embeddings.
+
+    Args:
+        embeddings (Embeddings): Backend, possivelmente envolvido por CachedEmbeddings.
+
+    Returns:
+        int: Número de textos por chamada ao backend.
+    """
+    # Desembrulha wrappers (ex.: CachedEmbeddings) até o backend real
+    while hasattr(embeddings, "embeddings"):
+        embeddings = embeddings.embeddings
+    backend = BACKEND_CLASSES.get(type(embeddings).__name__)
+    return BACKEND_BATCH_SIZES.get(backend, DEFAULT_BATCH_SIZE)
+
+
+def iter_batches(items, size):
+    """
+    Agrupa um iterável em listas de até `size` elementos, sem materializá-lo.
+
+    Args:
+        items (Iterable): Elementos de entrada.
+        size (int): Tamanho máximo de cada lote.
+
+    Yields:
+        list: Lote de elementos.
+    """
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def embed_with_retry(embeddings, texts, max_retries=5, base_delay=1.0, max_delay=60.0):
+    """
+    Vetoriza um lote, repetindo a chamada com backoff exponencial em caso de falha
+    transitória. As demais falhas são propagadas imediatamente.
+
+    Args:
+        embeddings (Embeddings): Backend de embeddings.
+        texts (list[str]): Textos do lote.
+        max_retries (int): Número máximo de novas tentativas.
+        base_delay (float): Espera inicial entre tentativas, em segundos.
+        max_delay (float): Espera máxima entre tentativas, em segundos.
+
+    Returns:
+        list[list[float]]: Vetores do lote.
+
+    Raises:
+        Exception: A falha não transitória, ou a última, se todas as tentativas se esgotarem.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return embeddings.embed_documents(texts)
+        except Exception as e:
+            if attempt == max_retries or not is_transient(e):
+                raise
+            # Jitter evita que todos os lotes repitam a chamada ao mesmo tempo
+            delay = min(max_delay, base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+            print(f"Falha ao vetorizar lote ({e}). Nova tentativa em {delay:.1f}s...")
+            time.sleep(delay)
+
+
+class ProgressReporter:
+    """
+    Reporta periodicamente o número de chunks vetorizados e a vazão.
+
+    Attributes:
+        total (int | None): Número total de chunks, se conhecido.
+        interval (float): Intervalo mínimo entre relatórios, em segundos.
+        done (int): Chunks vetorizados até agora.
+    """
+    def __init__(self, total=None, interval=5.0, output=print):
+        """
+        Inicializa o reporter.
+
+        Args:
+            total (int | None): Número total de chunks, se conhecido.
+            interval (float): Intervalo mínimo entre relatórios, em segundos.
+            output (Callable[[str], None]): Função que exibe o relatório.
+        """
+        self.total = total
+        self.interval = interval
+        self.output = output
+        self.done = 0
+        self.started = time.monotonic()
+        self._last_report = self.started
+
+    def update(self, count):
+        """
+        Registra chunks vetorizados e reporta se o intervalo já passou.
+
+        Args:
+            count (int): Chunks vetorizados desde a última atualização.
+        """
+        self.done += count
+        now = time.monotonic()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.report()
+
+    def report(self):
+        """
+        Exibe o progresso atual.
+        """
+        elapsed = time.monotonic() - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        total = f"/{self.total}" if self.total is not None else ""
+        self.output(f"Embeddings: {self.done}{total} chunks ({rate:.1f} chunks/s)")
+
+
+def embed_in_batches(items, embeddings, text_of=None, batch_size=None, max_workers=4,
+                     max_retries=5, progress=None):
+    """
+    Vetoriza um fluxo de itens em lotes, com concorrência limitada.
+
+    No máximo `2 * max_workers` lotes ficam em memória ao mesmo tempo, de modo que
+    a entrada pode ser um gerador arbitrariamente grande.
+
+    Args:
+        items (Iterable): Itens a vetorizar (textos ou objetos com texto).
+        embeddings (Embeddings): Backend de embeddings.
+        text_of (Callable): Extrai o texto de cada item (padrão: o próprio item).
+        batch_size (int): Textos por chamada (padrão: adequado ao backend).
+        max_workers (int): Chamadas simultâneas ao backend.
+        max_retries (int): Novas tentativas por lote em caso de falha.
+        progress (ProgressReporter): Reporter de progresso (opcional).
+
+    Yields:
+        tuple: (lote de itens, vetores correspondentes), na ordem de entrada.
+    """
+    text_of = text_of or (lambda item: item)
+    batch_size = batch_size or batch_size_for(embeddings)
+    max_in_flight = max_workers * 2
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for batch in iter_batches(items, batch_size):
+            texts = [text_of(item) for item in batch]
+            pending.append((batch, executor.submit(embed_with_retry, embeddings, texts, max_retries)))
+            # Backpressure: só lê novos lotes quando há espaço na janela
+            while len(pending) >= max_in_flight:
+                yield _collect(pending, progress)
+        while pending:
+            yield _collect(pending, progress)
+
+    if progress is not None and progress.done:
+        progress.report()
+
+
+def _collect(pending, progress):
+    batch, future = pending.popleft()
+    vectors = future.result()
+    if progress is not None:
+        progress.update(len(batch))
+    return batch, vectors
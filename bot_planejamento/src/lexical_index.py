@@ -0,0 +1,206 @@
+"""
+Índice lexical BM25 sobre os chunks da base de conhecimento.
+
+Os tokens são normalizados sem acentos e em minúsculas ("Ocupação" e "ocupacao"
+são o mesmo termo), o que permite encontrar termos exatos em português, como
+nomes de indicadores e sistemas (SIGH, TASY), sem chamar o modelo de embeddings.
+O índice invertido é pré-calculado e salvo ao lado do índice FAISS.
+"""
+
+import math
+import re
+import unicodedata
+from collections import Counter
+
+# Palavras muito frequentes em português, ignoradas na indexação (já sem acento)
+STOPWORDS = frozenset("""
+a o as os um uma uns umas de da do das dos e ou em no na nos nas ao aos
+por pela pelo pelas pelos para pra com sem sob sobre que qual quais quem como
+onde quando se me te lhe nos eu tu ele ela eles elas voce voces meu minha seu
+sua isso isto esse essa este esta aquele aquela ser sao foi era ha mais muito
+""".split())
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def fold(text):
+    """
+    Remove acentos e converte o texto para minúsculas.
+
+    Args:
+        text (str): Texto original.
+
+    Returns:
+        str: Texto normalizado.
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def tokenize(text):
+    """
+    Divide o texto em tokens normalizados, sem stopwords.
+
+    Args:
+        text (str): Texto original.
+
+    Returns:
+        list[str]: Tokens normalizados.
+    """
+    return [token for token in TOKEN_PATTERN.findall(fold(text)) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Índice invertido com ranqueamento BM25.
+
+    Attributes:
+        doc_ids (list[str]): Identificadores dos documentos indexados.
+        postings (dict): Termo -> lista de [posição do documento, frequência do termo].
+        idf (dict): Termo -> IDF pré-calculado.
+    """
+    def __init__(self, doc_ids, doc_lengths, postings, k1=1.5, b=0.75):
+        """
+        Inicializa o índice a partir das estruturas pré-calculadas.
+
+        Args:
+            doc_ids (list[str]): Identificadores dos documentos.
+            doc_lengths (list[int]): Número de tokens de cada documento.
+            postings (dict): Termo -> lista de [posição do documento, frequência].
+            k1 (float): Parâmetro de saturação da frequência do termo.
+            b (float): Parâmetro de normalização pelo tamanho do documento.
+        """
+        self.doc_ids = doc_ids
+        self.doc_lengths = doc_lengths
+        self.postings = postings
+        self.k1 = k1
+        self.b = b
+        self._positions = {doc_id: position for position, doc_id in enumerate(doc_ids)}
+        total = len(doc_ids)
+        self.avg_length = (sum(doc_lengths) / total) if total else 0.0
+        self.idf = {
+            term: math.log(1 + (total - len(entries) + 0.5) / (len(entries) + 0.5))
+            for term, entries in postings.items()
+        }
+        # IDF de um termo ausente do índice (o maior possível)
+        self.missing_idf = math.log(1 + (total + 0.5) / 0.5)
+
+    @classmethod
+    def build(cls, documents, k1=1.5, b=0.75):
+        """
+        Constrói o índice a partir dos documentos.
+
+        Args:
+            documents (Iterable[tuple[str, str]]): Pares (id, texto).
+            k1 (float): Parâmetro de saturação da frequência do termo.
+            b (float): Parâmetro de normalização pelo tamanho do documento.
+
+        Returns:
+            BM25Index: Índice construído.
+        """
+        doc_ids = []
+        doc_lengths = []
+        postings = {}
+        for position, (doc_id, text) in enumerate(documents):
+            tokens = tokenize(text)
+            doc_ids.append(doc_id)
+            doc_lengths.append(len(tokens))
+            for term, frequency in Counter(tokens).items():
+                postings.setdefault(term, []).append([position, frequency])
+        return cls(doc_ids, doc_lengths, postings, k1=k1, b=b)
+
+    def search(self, query, k=10):
+        """
+        Ranqueia os documentos para a consulta.
+
+        Args:
+            query (str): Consulta do usuário.
+            k (int): Número máximo de resultados.
+
+        Returns:
+            list[tuple[str, float]]: Pares (id, score) em ordem decrescente de score.
+        """
+        scores = {}
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for position, frequency in self.postings[term]:
+                length_norm = 1 - self.b + self.b * self.doc_lengths[position] / (self.avg_length or 1)
+                gain = idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+                scores[position] = scores.get(position, 0.0) + gain
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.doc_ids[position], score) for position, score in ranked]
+
+    def coverage(self, query, doc_id):
+        """
+        Calcula a fração do peso (IDF) dos termos da consulta presente em um documento.
+
+        Args:
+            query (str): Consulta do usuário.
+            doc_id (str): Documento avaliado.
+
+        Returns:
+            float: Valor entre 0 e 1.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return 0.0
+        position = self._positions[doc_id]
+        total = matched = 0.0
+        for term in terms:
+            idf = self.idf.get(term, self.missing_idf)
+            total += idf
+            if term in self.idf and any(p == position for p, _ in self.postings[term]):
+                matched += idf
+        return matched / total
+
+    def is_confident(self, query, results, min_coverage=0.8, min_margin=1.5):
+        """
+        Indica se o melhor resultado lexical é confiável o bastante para dispensar a
+        busca vetorial: ele precisa conter a maior parte dos termos da consulta e
+        se destacar do segundo colocado.
+
+        Args:
+            query (str): Consulta do usuário.
+            results (list[tuple[str, float]]): Resultado de `search`.
+            min_coverage (float): Cobertura mínima dos termos da consulta.
+            min_margin (float): Razão mínima entre o primeiro e o segundo score.
+
+        Returns:
+            bool: True se a resposta lexical é confiável.
+        """
+        if not results:
+            return False
+        top_id, top_score = results[0]
+        if len(results) > 1 and top_score < min_margin * results[1][1]:
+            return False
+        return self.coverage(query, top_id) >= min_coverage
+
+    def to_dict(self):
+        """
+        Serializa o índice para gravação em disco.
+
+        Returns:
+            dict: Estruturas do índice.
+        """
+        return {
+            "k1": self.k1,
+            "b": self.b,
+            "doc_ids": self.doc_ids,
+            "doc_lengths": self.doc_lengths,
+            "postings": self.postings,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Restaura o índice serializado por `to_dict`.
+
+        Args:
+            data (dict): Estruturas do índice.
+
+        Returns:
+            BM25Index: Índice restaurado.
+        """
+        return cls(data["doc_ids"], data["doc_lengths"], data["postings"], k1=data["k1"], b=data["b"])
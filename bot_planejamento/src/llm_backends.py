@@ -0,0 +1,235 @@
+"""
+Backends de modelo de linguagem (LLM) disponíveis para o bot.
+
+O backend é escolhido pela variável de ambiente LLM_BACKEND:
+
+- openai: API da OpenAI (gpt-4o por padrão);
+- ollama: modelo local servido pelo Ollama (llama3.2:1b por padrão);
+- llamacpp: servidor do llama.cpp, pela sua API compatível com a da OpenAI;
+- fake: modelo local e determinístico, com latência configurável, para testes
+  de carga offline.
+
+Cada backend tem seu próprio pool de conexões HTTP, timeout e limite de chamadas
+simultâneas: um modelo local atende poucas requisições por vez, enquanto a API
+da OpenAI suporta muitas em paralelo.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Iterator, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from common.config import env_float, env_int
+
+# Modelo padrão de cada backend
+DEFAULT_MODELS = {
+    "openai": "gpt-4o",
+    "ollama": "llama3.2:1b",
+    "llamacpp": "local",
+    "fake": "fake-chat",
+}
+
+# Chamadas simultâneas padrão de cada backend
+DEFAULT_CONCURRENCY = {
+    "openai": 16,
+    "ollama": 2,
+    "llamacpp": 2,
+    "fake": 64,
+}
+
+# Timeout padrão de cada chamada, em segundos (modelos locais em CPU são mais lentos)
+DEFAULT_TIMEOUTS = {
+    "openai": 60.0,
+    "ollama": 180.0,
+    "llamacpp": 180.0,
+    "fake": 60.0,
+}
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Modelo de chat local e determinístico, usado em benchmarks e testes de carga.
+    Simula o tempo até o primeiro token e o tempo de geração de cada token.
+
+    Attributes:
+        latency (float): Tempo até o primeiro token, em segundos.
+        token_latency (float): Tempo de geração de cada token seguinte, em segundos.
+        tokens (int): Número de tokens de cada resposta.
+    """
+    latency: float = 0.0
+    token_latency: float = 0.0
+    tokens: int = 50
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _tokens(self, messages):
+        # Resposta determinística: depende apenas da última mensagem do prompt
+        digest = hashlib.sha256(messages[-1].content.encode('utf-8')).hexdigest()
+        words = [f"Resposta simulada {digest[:8]}."]
+        words.extend(f"palavra{i}" for i in range(self.tokens - 1))
+        return [word + " " for word in words]
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        for index, token in enumerate(self._tokens(messages)):
+            if index:
+                time.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        content = "".join(chunk.message.content for chunk in self._stream(messages))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+
+class ChatBackend:
+    """
+    Modelo de chat com limite de chamadas simultâneas. Chamadas acima do limite
+    aguardam a liberação de uma vaga, em vez de sobrecarregar o backend.
+
+    Attributes:
+        name (str): Nome do backend.
+        model (BaseChatModel): Modelo de chat do LangChain.
+        max_concurrency (int): Número máximo de chamadas simultâneas.
+    """
+    def __init__(self, name, model, max_concurrency):
+        """
+        Inicializa o backend.
+
+        Args:
+            name (str): Nome do backend.
+            model (BaseChatModel): Modelo de chat do LangChain.
+            max_concurrency (int): Número máximo de chamadas simultâneas.
+        """
+        self.name = name
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def invoke(self, messages):
+        """
+        Gera a resposta completa do modelo.
+
+        Args:
+            messages (list[BaseMessage]): Prompt.
+
+        Returns:
+            BaseMessage: Resposta do modelo.
+        """
+        with self._slots:
+            return self.model.invoke(messages)
+
+    def stream(self, messages):
+        """
+        Gera a resposta do modelo em fluxo. A vaga é mantida até o fim do fluxo.
+
+        Args:
+            messages (list[BaseMessage]): Prompt.
+
+        Yields:
+            BaseMessageChunk: Trechos da resposta.
+        """
+        with self._slots:
+            yield from self.model.stream(messages)
+
+
+def _http_client(max_connections, timeout):
+    # Pool de conexões dedicado ao backend, com conexões persistentes
+    import httpx
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        timeout=httpx.Timeout(timeout, connect=10.0),
+    )
+
+
+def create_llm(backend, model=None, temperature=0.5, timeout=None, max_concurrency=None):
+    """
+    Cria o backend de LLM configurado.
+
+    Args:
+        backend (str): Nome do backend (openai, ollama, llamacpp ou fake).
+        model (str): Modelo a usar (por padrão, o modelo padrão do backend).
+        temperature (float): Temperatura de amostragem.
+        timeout (float): Timeout de cada chamada, em segundos.
+        max_concurrency (int): Chamadas simultâneas permitidas.
+
+    Returns:
+        ChatBackend: Backend de LLM.
+
+    Raises:
+        ValueError: Se o backend não for reconhecido.
+    """
+    if backend not in DEFAULT_MODELS:
+        raise ValueError(f"Backend de LLM desconhecido: {backend}")
+    model = model or DEFAULT_MODELS[backend]
+    timeout = timeout or DEFAULT_TIMEOUTS[backend]
+    max_concurrency = max_concurrency or DEFAULT_CONCURRENCY[backend]
+
+    if backend == "openai":
+        from langchain_openai import ChatOpenAI
+        chat_model = ChatOpenAI(
+            model=model,
+            temperature=temperature,
+            timeout=timeout,
+            max_retries=2,
+            # Em fluxo, o uso de tokens (inclusive os do cache de prompt) só é
+            # informado pela API quando solicitado, no último trecho da resposta
+            stream_usage=True,
+            http_client=_http_client(max_concurrency, timeout),
+        )
+    elif backend == "llamacpp":
+        from langchain_openai import ChatOpenAI
+        chat_model = ChatOpenAI(
+            model=model,
+            temperature=temperature,
+            base_url=os.getenv("LLAMACPP_BASE_URL", "http://localhost:8080/v1"),
+            api_key=os.getenv("LLAMACPP_API_KEY", "sem-chave"),
+            timeout=timeout,
+            max_retries=1,
+            http_client=_http_client(max_concurrency, timeout),
+        )
+    elif backend == "ollama":
+        import httpx
+        from langchain_ollama import ChatOllama
+        chat_model = ChatOllama(
+            model=model,
+            temperature=temperature,
+            base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
+            # Mantém o modelo carregado entre as mensagens
+            keep_alive=os.getenv("OLLAMA_KEEP_ALIVE", "30m"),
+            client_kwargs={
+                "timeout": httpx.Timeout(timeout, connect=10.0),
+                "limits": httpx.Limits(max_connections=max_concurrency,
+                                       max_keepalive_connections=max_concurrency),
+            },
+        )
+    else:
+        chat_model = FakeChatModel(
+            latency=env_float("FAKE_LLM_LATENCY", 0.0, minimum=0),
+            token_latency=env_float("FAKE_LLM_TOKEN_LATENCY", 0.0, minimum=0),
+            tokens=env_int("FAKE_LLM_TOKENS", 50, minimum=1),
+        )
+
+    return ChatBackend(backend, chat_model, max_concurrency)
@@ -0,0 +1,137 @@
+"""
+Montagem dos prompts enviados ao LLM.
+
+Os templates são compilados uma única vez, na importação do módulo. O prompt de
+resposta é dividido em duas partes:
+
+- um prefixo estático (persona, instruções e formato da resposta), idêntico em
+  todas as chamadas e enviado primeiro, para que provedores com cache de prompt
+  (ex.: OpenAI) reaproveitem o processamento desse trecho;
+- uma parte variável com o nome do usuário, o histórico, o contexto recuperado
+  e a pergunta.
+
+O contexto é formado pelo texto dos chunks recuperados, com a origem de cada um.
+"""
+
+import hashlib
+
+from langchain.schema import HumanMessage, SystemMessage
+
+SYSTEM_PROMPT = """Você é **Zé**, um chatbot especializado em responder perguntas sobre o Planejamento Estratégico da Fhemig 2024-2027. Use as informações fornecidas no contexto para responder de forma assertiva, clara e objetiva. Caso não encontre informações relevantes no contexto, informe que não pode responder e sugira acessar o planejamento estratégico no site oficial: [Planejamento Estratégico Fhemig](https://www.fhemig.mg.gov.br/sobre-o-orgao/planejamento-estrategico).
+
+---
+
+### Instruções:
+1. Utilize o histórico da conversa para garantir consistência e continuidade.
+2. Baseie-se exclusivamente nas informações do contexto para responder.
+3. Seja claro e direto, utilizando exemplos práticos quando aplicável.
+4. Caso a pergunta seja ambígua ou incompleta, solicite esclarecimentos.
+5. Nunca forneça informações inventadas ou que não estejam no contexto.
+6. Adapte a linguagem para ser acessível, mas mantenha a tecnicidade quando necessário.
+7. Use o nome do usuário de forma natural e apropriada na interação.
+
+---
+
+### Formato da Resposta:
+1. Responda diretamente à pergunta do usuário.
+2. Forneça explicações ou exemplos adicionais para enriquecer a resposta.
+3. Quando relevante, conecte a resposta a outros aspectos do Planejamento Estratégico.
+4. Apresente as respostas organizadas e formatadas em **Markdown**."""
+
+QUESTION_TEMPLATE = """O nome completo do usuário é "{sender_full_name}".
+
+### Histórico da Conversa:
+{chat_history}
+
+### Contexto:
+{context}
+
+---
+
+Agora, responda à seguinte pergunta:
+
+**Pergunta do Usuário:** {pergunta}"""
+
+SUMMARY_TEMPLATE = """Atualize o resumo de uma conversa entre um usuário e o Zé, chatbot do Planejamento Estratégico da Fhemig.
+Mantenha os assuntos tratados, as dúvidas do usuário e as informações já fornecidas, em no máximo {max_words} palavras.
+
+### Resumo atual:
+{summary}
+
+### Novas mensagens:
+{messages}
+
+Responda apenas com o novo resumo."""
+
+# Prefixo estático: o mesmo objeto é reutilizado em todas as mensagens
+STATIC_PREFIX = SystemMessage(content=SYSTEM_PROMPT)
+STATIC_PREFIX_HASH = hashlib.sha256(SYSTEM_PROMPT.encode('utf-8')).hexdigest()[:12]
+
+
+def _describe_source(metadata):
+    # Origem do chunk: página (PDFs, numerada a partir de 1) ou arquivo
+    if "page" in metadata:
+        return f"página {metadata['page'] + 1}"
+    source = metadata.get("source")
+    return str(source).replace("\\", "/").rsplit("/", 1)[-1] if source else ""
+
+
+def format_context(documents):
+    """
+    Formata os chunks recuperados para o espaço de contexto do prompt.
+
+    Args:
+        documents (list[Document]): Chunks recuperados, em ordem de relevância.
+
+    Returns:
+        str: Trechos numerados, com a origem de cada um.
+    """
+    sections = []
+    for number, doc in enumerate(documents, start=1):
+        source = _describe_source(doc.metadata or {})
+        header = f"[Trecho {number} - {source}]" if source else f"[Trecho {number}]"
+        sections.append(f"{header}\n{doc.page_content}")
+    return "\n\n".join(sections)
+
+
+def build_prompt(user_message, sender_full_name, context, chat_history):
+    """
+    Monta o prompt de resposta: prefixo estático seguido da parte variável.
+
+    Args:
+        user_message (str): Pergunta do usuário.
+        sender_full_name (str): Nome completo do usuário.
+        context (str): Contexto formatado por `format_context`.
+        chat_history (str): Histórico da conversa formatado.
+
+    Returns:
+        list[BaseMessage]: Mensagens prontas para o modelo.
+    """
+    return [
+        STATIC_PREFIX,
+        HumanMessage(content=QUESTION_TEMPLATE.format(
+            sender_full_name=sender_full_name,
+            chat_history=chat_history,
+            context=context,
+            pergunta=user_message,
+        )),
+    ]
+
+
+def build_summary_prompt(summary, messages, max_words):
+    """
+    Monta o prompt de atualização do resumo da conversa.
+
+    Args:
+        summary (str): Resumo atual.
+        messages (str): Mensagens a incorporar, já formatadas.
+        max_words (int): Tamanho máximo do resumo, em palavras.
+
+    Returns:
+        list[BaseMessage]: Mensagens prontas para o modelo.
+    """
+    return [HumanMessage(content=SUMMARY_TEMPLATE.format(
+        max_words=max_words,
+        summary=summary or "(vazio)",
+        messages=messages,
+    ))]
@@ -1,73 +1,145 @@
 ## Loader do PDF
 
-from langchain_community.document_loaders import PyMuPDFLoader
-from langchain_community.document_loaders import UnstructuredMarkdownLoader
-from langchain.embeddings.openai import OpenAIEmbeddings
-from langchain.vectorstores import FAISS
 import os
 from dotenv import load_dotenv
-from langchain.text_splitter import CharacterTextSplitter
+from common.config import env_int
+from .document_pipeline import iter_chunks, process_pool
+from .index_store import IndexStore
+from .embedding_cache import CachedEmbeddings
+from .embedding_backends import DEFAULT_MODELS, create_embeddings
+from .hybrid_retriever import MODES, HybridRetriever
+
+# Carregar as variáveis de ambiente do arquivo .env antes de ler as configurações
+# abaixo (este módulo é importado antes do load_dotenv de config_bot.py)
+load_dotenv(dotenv_path="env\\.env")
 
 # Caminho do PDF a ser processado
-path = "data\\planejamento_estrategico.md"
+path = os.getenv("SOURCE_PATH", "data\\planejamento_estrategico.md")
 
-# Carrega o PDF usando PyMuPDFLoader
-# PyMuPDFLoader é eficiente para extrair texto estruturado de documentos PDF.
-# loader_structured = PyMuPDFLoader(path)
+# Diretório onde o índice FAISS é persistido entre reinicializações
+index_dir = os.getenv("INDEX_DIR", "data\\faiss_index")
 
-# Markdown
-loader_structured = UnstructuredMarkdownLoader(path)
+# Backend (openai, ollama ou fake) e modelo de embeddings; mudar o modelo força
+# a reconstrução do índice
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai").strip().lower()
+if EMBEDDING_BACKEND not in DEFAULT_MODELS:
+    raise ValueError(f"EMBEDDING_BACKEND inválido: {EMBEDDING_BACKEND!r}. Use um de: {', '.join(DEFAULT_MODELS)}")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", DEFAULT_MODELS[EMBEDDING_BACKEND])
+EMBEDDING_ID = f"{EMBEDDING_BACKEND}:{EMBEDDING_MODEL}"
 
+# Modo de recuperação: "hybrid" (BM25 + FAISS), "lexical" (só BM25) ou "dense" (só FAISS)
+RETRIEVER_MODE = os.getenv("RETRIEVER_MODE", "hybrid").strip().lower()
+# Validado antes da construção do índice, que pode ser demorada
+if RETRIEVER_MODE not in MODES:
+    raise ValueError(f"RETRIEVER_MODE inválido: {RETRIEVER_MODE!r}. Use um de: {', '.join(MODES)}")
 
+# Parâmetros de chunking, registrados no manifesto do índice
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 0
 
+# Processos que extraem as páginas de um PDF de origem (1 extrai no próprio processo)
+PDF_WORKERS = env_int("PDF_WORKERS", os.cpu_count() or 1, minimum=1)
 
-# Carrega todas as páginas do PDF em uma lista de documentos
-pages_str = loader_structured.load()
+# Chamadas simultâneas ao backend de embeddings durante a construção do índice
+EMBEDDING_WORKERS = env_int("EMBEDDING_WORKERS", 4, minimum=1)
 
-# Criar o TextSplitter para dividir os documentos em chunks menores
-text_splitter = CharacterTextSplitter(
-    separator="\n",  # Define o separador de texto
-    chunk_size=1000,  # Define o tamanho máximo de cada chunk em caracteres
-    chunk_overlap=0   # Define a sobreposição entre os chunks
-)
+def load_documents(executor=None):
+    """
+    Carrega o documento de origem (Markdown ou PDF), divide em chunks e remove as
+    quebras de linha, em fluxo. Só é chamada quando o índice salvo em disco
+    precisa ser atualizado.
 
-# Dividir os documentos carregados em chunks menores
-texts = text_splitter.split_documents(pages_str)
+    Args:
+        executor (ProcessPoolExecutor | None): Pool que extrai as páginas de PDFs.
 
-def remove_ws(d):
+    Returns:
+        Iterator[Document]: Chunks limpos, prontos para vetorização.
     """
-    Remove quebras de linha do conteúdo do documento para limpeza.
+    return iter_chunks(path, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, newline_replacement="",
+                       executor=executor)
 
-    Args:
-        d (Document): Documento com conteúdo a ser limpo.
+# Acessar a chave da OpenAI do arquivo .env
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+# O índice e o retriever são criados pelas funções abaixo, e não na importação do
+# módulo, que também ocorre nos workers de extração de páginas
+
+def create_embeddings_cache():
+    """
+    Cria as embeddings do backend configurado, com cache persistente em disco
+    compartilhado entre construção do índice e vetorização das perguntas.
 
     Returns:
-        Document: Documento com quebras de linha removidas.
+        CachedEmbeddings: Embeddings com cache.
     """
-    text = d.page_content.replace("\n", "")
-    d.page_content = text
-    return d
+    return CachedEmbeddings(
+        create_embeddings(EMBEDDING_BACKEND, model=EMBEDDING_MODEL, api_key=OPENAI_API_KEY),
+        model_name=EMBEDDING_ID,
+    )
 
-# Limpa os textos removendo espaços em branco e quebras de linha
-texts_cleaned = [remove_ws(d) for d in texts]
+def create_index_store(embeddings):
+    """
+    Cria o acesso ao índice FAISS salvo em disco.
 
-# Carregar as variáveis de ambiente do arquivo .env
-load_dotenv(dotenv_path="env\\.env")
+    Args:
+        embeddings (Embeddings): Embeddings usadas na vetorização dos chunks.
 
-# Acessar a chave da OpenAI do arquivo .env
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    Returns:
+        IndexStore: Índice persistido em INDEX_DIR.
+    """
+    return IndexStore(
+        index_dir,
+        embeddings,
+        embedding_model=EMBEDDING_ID,
+        source_path=path,
+        chunk_params={"chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP},
+        max_workers=EMBEDDING_WORKERS,
+    )
+
+def load_or_build_index(index_store):
+    """
+    Carrega a base FAISS salva em disco (memory-map) ou, se o documento ou o modelo
+    de embeddings mudaram, vetoriza os chunks uma única vez e salva o novo índice.
 
-# Inicializa as embeddings usando o modelo OpenAI
-embeddings = OpenAIEmbeddings(api_key=OPENAI_API_KEY)
+    Args:
+        index_store (IndexStore): Índice persistido.
 
-# Cria a base de dados FAISS para armazenar os chunks de texto vetorizados
-db = FAISS.from_documents(texts_cleaned, embeddings)
+    Returns:
+        FAISS: Base vetorial pronta para consultas.
+    """
+    # O pool de extração de páginas é criado antes das threads de vetorização (seus
+    # processos só são iniciados se o índice precisar ser atualizado)
+    page_pool = process_pool(PDF_WORKERS) if path.lower().endswith(".pdf") else None
+    try:
+        return index_store.load_or_build(lambda: load_documents(page_pool))
+    finally:
+        if page_pool is not None:
+            page_pool.shutdown()
+
+def prepare_index():
+    """
+    Atualiza o índice salvo em disco, se necessário, sem criar o retriever. Usada pelo
+    processo principal antes de iniciar os workers do supervisor, que apenas o carregam.
+    """
+    load_or_build_index(create_index_store(create_embeddings_cache()))
 
-# Cria o retriever usando o banco de dados FAISS
-# O retriever será usado para buscar textos semelhantes com base na consulta
-retriever = db.as_retriever(search_kwargs={'k': 3})
+def create_retriever():
+    """
+    Cria o retriever usando o banco de dados FAISS e o índice lexical BM25. O
+    retriever busca os chunks mais relevantes para cada pergunta; perguntas com
+    termos exatos (ex.: "Taxa de Ocupação", SIGH, TASY) são respondidas só pelo
+    BM25, sem a chamada de embedding da pergunta.
 
-# Comentários adicionais:
-# O `retriever` permite buscar os chunks mais relevantes no banco de dados 
-# para qualquer consulta realizada no modelo. Isso é útil para responder perguntas
-# com base no conteúdo do PDF carregado.
+    Returns:
+        tuple: Retriever (HybridRetriever) e embeddings (CachedEmbeddings) usadas por ele.
+    """
+    embeddings = create_embeddings_cache()
+    index_store = create_index_store(embeddings)
+    db = load_or_build_index(index_store)
+    retriever = HybridRetriever(
+        vectorstore=db,
+        lexical=index_store.load_lexical(),
+        k=3,
+        mode=RETRIEVER_MODE,
+    )
+    return retriever, embeddings
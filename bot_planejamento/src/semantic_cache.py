@@ -0,0 +1,234 @@
+"""
+Cache semântico de respostas do LLM.
+
+Perguntas frequentes ("Qual é a missão da Fhemig?") são respondidas a partir de
+respostas anteriores, sem nova chamada ao modelo. Uma resposta é reaproveitada
+quando a pergunta é equivalente (mesmo texto normalizado ou embedding com
+similaridade acima do limiar) e o contexto recuperado é o mesmo. As entradas
+expiram após um TTL e o cache tem tamanho limitado (LRU).
+
+Respostas que mencionam o nome de quem perguntou não são armazenadas: trocar o
+nome por outro corromperia nomes de unidades e pessoas ("Hospital João XXIII").
+Perguntas que dependem do histórico da conversa (ex.: "e a visão?", "explique
+melhor isso") não passam pelo cache.
+"""
+
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from .lexical_index import fold
+
+# Perguntas que fazem referência à conversa anterior ou ao próprio usuário
+REFERENTIAL_PATTERN = re.compile(
+    r"^e\s|\b(isso|isto|disso|disto|nisso|nisto|esse|essa|esses|essas|ele|ela|eles|elas|dele|dela|"
+    r"anterior|acima|mencionad\w*|falou|disse|continue|continua|melhor|detalhe\w*|"
+    r"eu|meu|minha|meus|minhas|mim|comigo)\b"
+)
+
+# Perguntas muito curtas só fazem sentido no contexto da conversa
+MIN_STANDALONE_TOKENS = 3
+
+
+def mentions_name(answer, sender_full_name):
+    """
+    Verifica se a resposta menciona o nome (completo ou primeiro nome) de quem perguntou.
+
+    Args:
+        answer (str): Resposta gerada.
+        sender_full_name (str): Nome completo de quem perguntou.
+
+    Returns:
+        bool: True se o nome aparece como palavra inteira na resposta.
+    """
+    names = sender_full_name.split() if sender_full_name else []
+    if not names:
+        return False
+    pattern = rf"\b({re.escape(sender_full_name.strip())}|{re.escape(names[0])})\b"
+    return re.search(pattern, answer, re.IGNORECASE) is not None
+
+
+def normalize_question(question):
+    """
+    Normaliza a pergunta para comparação exata: sem acentos, pontuação ou caixa.
+
+    Args:
+        question (str): Pergunta do usuário.
+
+    Returns:
+        str: Pergunta normalizada.
+    """
+    return " ".join(re.findall(r"\w+", fold(question)))
+
+
+def context_fingerprint(documents):
+    """
+    Calcula a impressão digital do contexto recuperado para a pergunta.
+
+    Args:
+        documents (list[Document]): Chunks recuperados.
+
+    Returns:
+        str: Hash do conteúdo dos chunks, na ordem recuperada.
+    """
+    digest = hashlib.sha256()
+    for doc in documents:
+        digest.update(doc.page_content.encode('utf-8'))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def is_personalized(question, chat_history):
+    """
+    Indica se a resposta depende da conversa ou do usuário e, portanto, não deve
+    ser reaproveitada de nem para outros usuários.
+
+    Args:
+        question (str): Pergunta do usuário.
+        chat_history (list): Mensagens anteriores da conversa.
+
+    Returns:
+        bool: True se a pergunta não deve passar pelo cache.
+    """
+    normalized = normalize_question(question)
+    if REFERENTIAL_PATTERN.search(normalized):
+        return True
+    return bool(chat_history) and len(normalized.split()) < MIN_STANDALONE_TOKENS
+
+
+def _unit(vector):
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+class CacheEntry:
+    """
+    Resposta armazenada no cache.
+
+    Attributes:
+        vector (list[float]): Embedding normalizado da pergunta.
+        answer (str): Resposta gerada (nunca menciona o nome de quem perguntou).
+        created_at (float): Instante do armazenamento.
+    """
+    __slots__ = ("vector", "answer", "created_at")
+
+    def __init__(self, vector, answer, created_at):
+        self.vector = vector
+        self.answer = answer
+        self.created_at = created_at
+
+
+class SemanticCache:
+    """
+    Cache de respostas indexado pelo embedding da pergunta e pelo contexto recuperado.
+
+    Attributes:
+        embed (Callable[[str], list[float]]): Função que vetoriza a pergunta.
+        threshold (float): Similaridade de cosseno mínima para reaproveitar uma resposta.
+        ttl (float): Validade das entradas, em segundos.
+        max_entries (int): Número máximo de respostas armazenadas.
+    """
+    def __init__(self, embed, threshold=0.95, ttl=24 * 3600, max_entries=1000):
+        """
+        Inicializa o cache.
+
+        Args:
+            embed (Callable[[str], list[float]]): Função que vetoriza a pergunta.
+            threshold (float): Similaridade de cosseno mínima.
+            ttl (float): Validade das entradas, em segundos.
+            max_entries (int): Número máximo de respostas armazenadas.
+        """
+        self.embed = embed
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # (contexto, pergunta normalizada) -> CacheEntry, em ordem de uso (LRU)
+        self._entries = OrderedDict()
+        # contexto -> chaves das entradas com esse contexto
+        self._by_context = {}
+        self._lock = threading.Lock()
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        keys = self._by_context.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_context[key[0]]
+
+    def _valid(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now - entry.created_at > self.ttl:
+            self._remove(key)
+            return None
+        return entry
+
+    def lookup(self, question, fingerprint, personalized=False):
+        """
+        Busca uma resposta reaproveitável para a pergunta.
+
+        Args:
+            question (str): Pergunta do usuário.
+            fingerprint (str): Impressão digital do contexto recuperado.
+            personalized (bool): Se True, a pergunta não passa pelo cache.
+
+        Returns:
+            str | None: Resposta armazenada, ou None se não houver.
+        """
+        if personalized:
+            return None
+
+        now = time.time()
+        key = (fingerprint, normalize_question(question))
+        with self._lock:
+            # Caminho rápido: mesma pergunta normalizada, sem calcular embedding
+            entry = self._valid(key, now)
+            candidates = list(self._by_context.get(fingerprint, ()))
+
+        if entry is None and candidates:
+            vector = _unit(self.embed(question))
+            with self._lock:
+                best_score = self.threshold
+                for candidate_key in candidates:
+                    candidate = self._valid(candidate_key, now)
+                    if candidate is None:
+                        continue
+                    score = sum(a * b for a, b in zip(vector, candidate.vector))
+                    if score >= best_score:
+                        best_score, key, entry = score, candidate_key, candidate
+
+        if entry is None:
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return entry.answer
+
+    def store(self, question, fingerprint, answer, sender_full_name, personalized=False):
+        """
+        Armazena a resposta gerada pelo LLM.
+
+        Args:
+            question (str): Pergunta do usuário.
+            fingerprint (str): Impressão digital do contexto recuperado.
+            answer (str): Resposta gerada.
+            sender_full_name (str): Nome completo de quem perguntou.
+            personalized (bool): Se True, a resposta não é armazenada.
+        """
+        if personalized or mentions_name(answer, sender_full_name):
+            return
+
+        vector = _unit(self.embed(question))
+        key = (fingerprint, normalize_question(question))
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = CacheEntry(vector, answer, time.time())
+            self._by_context.setdefault(fingerprint, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
@@ -0,0 +1,164 @@
+"""
+Entrega progressiva das respostas do LLM no Zulip.
+
+A resposta é enviada como uma mensagem assim que o modelo produz o primeiro
+trecho de texto e, em seguida, atualizada no lugar (edição de mensagem) à medida
+que novos tokens chegam. As edições respeitam um intervalo mínimo entre si e o
+tempo de espera indicado pelo servidor quando o limite de requisições é atingido;
+a última edição sempre contém a resposta completa. A edição final é repetida
+enquanto o servidor limitar as requisições ou a conexão falhar; se não for aceita,
+a mensagem parcial é apagada e a resposta é enviada inteira em outra mensagem.
+"""
+
+import time
+
+import requests
+import zulip
+
+# Indicador exibido no fim da mensagem enquanto a resposta está sendo gerada
+TYPING_INDICATOR = " ▌"
+
+# Nota acrescentada à resposta parcial quando a geração é interrompida por um erro
+STREAM_ERROR_NOTE = "_(A geração da resposta foi interrompida por um erro. Por favor, tente novamente.)_"
+
+# Código atribuído às falhas de rede, que, como o limite de requisições, são temporárias
+CONNECTION_ERROR = "CONNECTION_ERROR"
+RETRYABLE_CODES = ("RATE_LIMIT_HIT", CONNECTION_ERROR)
+
+
+class ZulipStreamWriter:
+    """
+    Acumula os tokens da resposta e os publica em uma única mensagem do Zulip.
+
+    Attributes:
+        client (zulip.Client): Cliente do Zulip.
+        recipient (dict): Destino da mensagem (type e to), como em `send_message`.
+        min_interval (float): Intervalo mínimo entre edições, em segundos.
+        message_id (int | None): ID da mensagem enviada, após o primeiro trecho.
+        edits (int): Número de edições realizadas.
+    """
+    def __init__(self, client, recipient, min_interval=1.5, final_timeout=60.0, clock=time.monotonic):
+        """
+        Inicializa o escritor.
+
+        Args:
+            client (zulip.Client): Cliente do Zulip.
+            recipient (dict): Destino da mensagem, ex.: {"type": "private", "to": [sender_id]}.
+            min_interval (float): Intervalo mínimo entre edições, em segundos.
+            final_timeout (float): Tempo máximo, em segundos, de novas tentativas da edição final.
+            clock (Callable[[], float]): Relógio monotônico.
+        """
+        self.client = client
+        self.recipient = recipient
+        self.min_interval = min_interval
+        self.final_timeout = final_timeout
+        self.clock = clock
+        self.message_id = None
+        self.edits = 0
+        self._parts = []
+        self._published = ""
+        self._next_edit_at = 0.0
+        self._failed = False
+        self._retryable = True
+
+    @property
+    def text(self):
+        """
+        Texto acumulado da resposta.
+        """
+        return "".join(self._parts)
+
+    def _retry_after(self, result):
+        # Em caso de limite de requisições, respeita o tempo indicado pelo servidor
+        if result.get("code") == "RATE_LIMIT_HIT":
+            return float(result.get("retry-after", self.min_interval))
+        return self.min_interval
+
+    def _call(self, method, request):
+        # Exceções contam como falha da requisição; só as de rede são repetidas
+        try:
+            return method(request)
+        except (requests.RequestException, zulip.UnrecoverableNetworkError) as e:
+            return {"result": "error", "code": CONNECTION_ERROR, "msg": str(e)}
+        except Exception as e:
+            return {"result": "error", "msg": str(e)}
+
+    def _publish(self, content):
+        if self.message_id is None:
+            result = self._call(self.client.send_message, {**self.recipient, "content": content})
+            if result.get("result") != "success":
+                # Sem a mensagem inicial, a resposta será enviada inteira no final
+                self._failed = True
+                return
+            self.message_id = result["id"]
+        else:
+            result = self._call(self.client.update_message, {"message_id": self.message_id, "content": content})
+            if result.get("result") != "success":
+                self._retryable = result.get("code") in RETRYABLE_CODES
+                self._next_edit_at = self.clock() + self._retry_after(result)
+                return
+            self.edits += 1
+        self._published = content
+        self._next_edit_at = self.clock() + self.min_interval
+
+    def write(self, token):
+        """
+        Adiciona um trecho da resposta. A primeira parte não vazia é enviada
+        imediatamente; as seguintes são publicadas em edições espaçadas.
+
+        Args:
+            token (str): Trecho gerado pelo modelo.
+        """
+        if not token:
+            return
+        self._parts.append(token)
+        if self._failed:
+            return
+        if self.message_id is None:
+            if token.strip():
+                self._publish(self.text + TYPING_INDICATOR)
+        elif self.clock() >= self._next_edit_at:
+            self._publish(self.text + TYPING_INDICATOR)
+
+    def close(self, error_note=None):
+        """
+        Publica a resposta completa, sem o indicador de digitação.
+
+        Args:
+            error_note (str | None): Se informada, a geração foi interrompida: a nota é
+                acrescentada à resposta parcial já publicada.
+
+        Returns:
+            bool: True se a resposta foi entregue pela mensagem em fluxo; False se o
+            chamador deve enviá-la normalmente.
+        """
+        if self.message_id is None:
+            return False
+        text = self.text
+        if error_note:
+            text = f"{text}\n\n{error_note}" if text.strip() else error_note
+        # Repete a edição final, respeitando o intervalo e o retry-after do servidor,
+        # apenas em falhas temporárias e até esgotar o tempo; as demais (mensagem
+        # apagada, sem permissão etc.) não melhoram com novas tentativas
+        deadline = self.clock() + self.final_timeout
+        while self._published != text:
+            delay = self._next_edit_at - self.clock()
+            if self.clock() + max(delay, 0.0) > deadline:
+                break
+            if delay > 0:
+                time.sleep(delay)
+            self._publish(text)
+            if self._published != text and not self._retryable:
+                break
+        if self._published == text:
+            return True
+
+        # Apaga a mensagem parcial (com o indicador de digitação) para que a resposta seja
+        # enviada normalmente. Se não for possível, a resposta completa é enviada mesmo
+        # assim: uma cópia a mais é melhor que uma resposta incompleta
+        print(f"Edição final da mensagem {self.message_id} não foi aceita; apagando a mensagem parcial")
+        result = self._call(self.client.delete_message, self.message_id)
+        if result.get("result") != "success":
+            print(f"Não foi possível apagar a mensagem parcial {self.message_id}: {result.get('msg')}")
+        self.message_id = None
+        return False
@@ -0,0 +1,164 @@
+"""
+Micro-benchmark do despacho de mensagens do FhemigChatbot.
+
+Compara a cadeia if/elif anterior (estados e listas de opções fixos no código)
+com src/state_machine.py (tabela de fluxos compilada em dicionários). As
+sessões são percursos válidos pelos menus, os mesmos do teste de carga
+(benchmarks/sessions.py, na raiz do repositório). O bot é criado contra o
+servidor Zulip simulado do teste de carga e, na medição, o envio é substituído
+por um cliente que apenas descarta as respostas. A versão atual inclui a
+gravação de cada sessão no SQLite (src/session_store.py).
+
+Uso (a partir de chat-informacoes/):
+    python benchmarks/bench_dispatch.py --sessions 2000
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT = os.path.dirname(BOT_DIR)
+sys.path.insert(0, BOT_DIR)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from fake_zulip import FakeZulipServer  # noqa: E402
+from sessions import informacoes_sessions, write_informacoes_fixtures  # noqa: E402
+from src.bot import FhemigChatbot  # noqa: E402
+from src.session_store import SessionStore  # noqa: E402
+from src.state_machine import StateMachine  # noqa: E402
+
+
+class DiscardClient:
+    def send_message(self, request):
+        return {"result": "success"}
+
+
+def legacy_process_message(bot, message):
+    # Cadeia if/elif anterior à máquina de estados; "6" em unidades TASY, que
+    # antes não tinha resposta definida, responde como opção inválida
+    content = message['content']
+    sender_id = message['sender_id']
+    sender_full_name = message['sender_full_name']
+
+    if sender_id not in bot.user_states:
+        bot.user_states[sender_id] = {'state': 'initial'}
+        bot.send_response(message, bot.unit_handler.get_initial_message(nome_usuario=sender_full_name))
+        return
+
+    current_state = bot.user_states[sender_id]['state']
+
+    if current_state == 'initial':
+        response = bot.unit_handler.handle(content)
+        if response['success']:
+            bot.user_states[sender_id].update({
+                'state': 'unit_selected',
+                'unit': response['selected_unit'],
+                'system': response['system']
+            })
+            bot.send_response(message, response['message'])
+    elif current_state == 'unit_selected':
+        if content in ['1', '2', '3', '4', '5']:
+            response = bot.information_handler.handle_indicator_fhemig_futuro(content, bot.user_states[sender_id]['unit'])
+            bot.user_states[sender_id]['state'] = 'feedback'
+        elif content == '6' and bot.user_states[sender_id]['system'] == 'SIGH':
+            response = bot.information_handler.handle_other_sigh(indicator_name=content, unit=bot.user_states[sender_id]['unit'])
+            bot.user_states[sender_id]['state'] = 'sigh_indicator_selection'
+        else:
+            response = "Opção inválida."
+        bot.send_response(message, response['message'] if isinstance(response, dict) else response)
+    elif current_state == 'sigh_indicator_selection':
+        if content in ['1', '2', '3', '4', '5', '8', '9', '10', '11', '12', '13', '14']:
+            response = bot.information_handler.handle_fhemig_em_numeros(content, bot.user_states[sender_id]['unit'])
+            if response['success']:
+                bot.user_states[sender_id]['state'] = 'feedback'
+        elif content == '15':
+            response = bot.information_handler.handle_other_than_fhemig_numeros(bot.user_states[sender_id]['unit'], bot.user_states[sender_id]['system'])
+        else:
+            response = bot.information_handler.handle_fhemig_em_numeros(content, bot.user_states[sender_id]['unit'])
+            bot.user_states[sender_id]['state'] = 'feedback'
+        bot.send_response(message, response['message'])
+    elif current_state == 'feedback':
+        if content == '1':
+            response = "Como posso ajudar você agora?\n1. Consultar indicadores/informações\n2. Buscar outras informações"
+            bot.user_states[sender_id]['state'] = 'unit_selected'
+        elif content == '2':
+            response = "Obrigado por usar nosso serviço! Se precisar de mais alguma coisa, é só me chamar. Tenha um ótimo dia!"
+            bot.user_states[sender_id] = {'state': 'initial'}
+        else:
+            response = "Opção inválida. Digite 1 para continuar ou 2 para encerrar."
+        bot.send_response(message, response)
+
+
+def make_messages(sessions):
+    messages = []
+    for user_id, steps in enumerate(sessions, 1):
+        for content in steps:
+            messages.append({"type": "private", "sender_id": user_id, "sender_email": f"user{user_id}@fhemig",
+                             "sender_full_name": f"Usuário {user_id}", "content": content})
+    return messages
+
+
+def bench(label, bot, process, messages, repeat, data_dir):
+    best = float("inf")
+    for _ in range(repeat):
+        # Cada repetição começa sem sessões (em memória e no SQLite)
+        bot.user_states = {}
+        bot.sessions.close()
+        bot.sessions = SessionStore(tempfile.mktemp(suffix=".sqlite3", dir=data_dir))
+        # Os handlers imprimem diagnósticos a cada seleção de unidade
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            started = time.perf_counter()
+            for message in messages:
+                process(message)
+            elapsed = time.perf_counter() - started
+        best = min(best, elapsed)
+    print(f"{label:<28} {best / len(messages) * 1e6:9.2f} µs/mensagem")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        units = write_informacoes_fixtures(data_dir, os.path.join(BOT_DIR, "data", "units.json"))
+        server = FakeZulipServer()
+        server.start()
+        try:
+            zuliprc = os.path.join(data_dir, "zuliprc")
+            server.write_zuliprc(zuliprc)
+            bot = FhemigChatbot(config_file=zuliprc, data_dir=data_dir)
+        finally:
+            server.stop()
+        bot.client = DiscardClient()
+        bot.outbound = None
+
+        messages = make_messages(informacoes_sessions(units, args.sessions, seed=args.seed))
+        print(f"{len(messages)} mensagens em {args.sessions} sessões")
+        legacy = bench("cadeia if/elif", bot, lambda m: legacy_process_message(bot, m), messages, args.repeat, data_dir)
+        table = bench("máquina de estados", bot, bot.process_message, messages, args.repeat, data_dir)
+        bench("máquina de estados + métricas", bot, bot.handle_message, messages, args.repeat, data_dir)
+        print(f"máquina de estados / cadeia if/elif: {table / legacy:.2f}x (inclui a gravação da sessão)")
+
+        # Custo do despacho isolado: a mesma tabela com ações que não fazem nada
+        machine = StateMachine(bot.state_machine.flows)
+        for name in bot.state_machine._actions:
+            machine.register(name, lambda content, session, message: {"success": True, "message": "ok"})
+        machine.compile()
+
+        def dispatch_only(message):
+            session = bot.user_states.setdefault(message["sender_id"], {"state": machine.initial_state})
+            machine.dispatch(session, message["content"], message)
+
+        bench("despacho da tabela (isolado)", bot, dispatch_only, messages, args.repeat, data_dir)
+
+
+if __name__ == "__main__":
+    main()
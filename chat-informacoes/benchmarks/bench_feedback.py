@@ -0,0 +1,96 @@
+"""
+Micro-benchmark da gravação e do resumo das avaliações.
+
+Compara o arquivo feedback.json anterior (lido e reescrito por inteiro a cada
+avaliação e varrido a cada resumo) com src/feedback_store.py (INSERT por
+avaliação e contagens agregadas mantidas a cada gravação), para históricos de
+tamanhos crescentes.
+
+Uso (a partir de chat-informacoes/):
+    python benchmarks/bench_feedback.py --sizes 100 1000 10000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.handlers.feedback_handler import FeedbackHandler  # noqa: E402
+
+RATINGS = ['Muito Satisfeito', 'Satisfeito', 'Neutro', 'Insatisfeito', 'Muito Insatisfeito']
+UNITS = ['Hospital João XXIII', 'Hospital Alberto Cavalcanti', 'Maternidade Odete Valadares']
+
+
+def legacy_save(feedback_file, feedback):
+    # Gravação anterior: lê o arquivo inteiro, acrescenta e reescreve
+    try:
+        with open(feedback_file, 'r+') as file:
+            try:
+                data = json.load(file)
+            except json.JSONDecodeError:
+                data = []
+            data.append(feedback)
+            file.seek(0)
+            json.dump(data, file, indent=4)
+            file.truncate()
+    except FileNotFoundError:
+        with open(feedback_file, 'w') as file:
+            json.dump([feedback], file, indent=4)
+
+
+def legacy_summary(feedback_file):
+    with open(feedback_file, 'r') as file:
+        data = json.load(file)
+    counts = {rating: 0 for rating in RATINGS}
+    for feedback in data:
+        counts[feedback['rating']] += 1
+    return counts
+
+
+def make_feedback(rng, index):
+    day = datetime(2024, 1, 1) + timedelta(minutes=index * 7)
+    return {'timestamp': day.isoformat(), 'user_id': rng.randrange(1000), 'unit': rng.choice(UNITS),
+            'rating': rng.choice(RATINGS), 'interaction_details': {}}
+
+
+def timed(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'avaliações':>10} {'json grav. ms':>14} {'sqlite grav. ms':>16} {'json resumo ms':>15} {'sqlite resumo ms':>17}")
+    for size in args.sizes:
+        rng = random.Random(size)
+        history = [make_feedback(rng, i) for i in range(size)]
+        with tempfile.TemporaryDirectory() as workdir:
+            feedback_file = os.path.join(workdir, "feedback.json")
+            with open(feedback_file, 'w') as file:
+                json.dump(history, file, indent=4)
+            # O handler importa o histórico JSON para o SQLite na inicialização
+            handler = FeedbackHandler(feedback_file)
+            new = [make_feedback(rng, size + i) for i in range(args.repeat)]
+
+            json_write = timed(lambda: legacy_save(feedback_file, new[0]), args.repeat)
+            sqlite_write = timed(lambda: handler.save_feedback(new[0]), args.repeat)
+            json_summary = timed(lambda: legacy_summary(feedback_file), args.repeat)
+            sqlite_summary = timed(handler.get_feedback_summary, args.repeat)
+            handler.store.close()
+        print(f"{size:>10} {json_write:14.3f} {sqlite_write:16.3f} {json_summary:15.3f} {sqlite_summary:17.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Micro-benchmark do atalho por intenção do FhemigChatbot.
+
+Mede o custo de src/intent_classifier.py (autômato dos nomes dos indicadores e
+busca da unidade) para mensagens de texto livre, e o número de mensagens que o
+usuário envia para chegar ao indicador: pelos menus (saudação, unidade,
+categoria, indicador) ou em uma única mensagem. Os arquivos de indicadores são
+os mesmos do teste de carga (benchmarks/sessions.py, na raiz do repositório).
+
+Uso (a partir de chat-informacoes/):
+    python benchmarks/bench_intent.py --repeat 20000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT = os.path.dirname(BOT_DIR)
+sys.path.insert(0, BOT_DIR)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from sessions import write_informacoes_fixtures  # noqa: E402
+from src.handlers.information_handler import InformationHandler  # noqa: E402
+from src.handlers.unit_handler import UnitHandler  # noqa: E402
+from src.intent_classifier import FHEMIG_FUTURO, FHEMIG_NUMEROS, IntentClassifier  # noqa: E402
+
+MESSAGES = [
+    "taxa de ocupação do João XXIII",
+    "Qual a taxa de ocupação do hospital joão xxiii?",
+    "média de permanência do HJXXIII",
+    "quero saber o número de cirurgias da maternidade odete valadares",
+    "taxa de ocupação hospitalar do Instituto Raul Soares",
+    "óbitos institucionais no joão",
+    "Bom dia",
+]
+
+
+def timed(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        write_informacoes_fixtures(data_dir, os.path.join(BOT_DIR, "data", "units.json"))
+        units = UnitHandler(os.path.join(data_dir, "units.json"))
+        information = InformationHandler(*(os.path.join(data_dir, name) for name in (
+            "indicators.json", "fhemig_numeros.json", "sigh_reports.json", "tasy_reports.json")))
+    catalogs = {FHEMIG_NUMEROS: information.fhemig_numeros_names, FHEMIG_FUTURO: information.fhemig_futuro_names}
+    started = time.perf_counter()
+    classifier = IntentClassifier(units.index, units.units, catalogs)
+    print(f"Autômato compilado em {(time.perf_counter() - started) * 1e3:.2f} ms\n")
+
+    print(f"{'mensagem':<66} {'µs':>7} {'msgs':>5}  resultado")
+    for message in MESSAGES:
+        elapsed = timed(lambda: classifier.classify(message), args.repeat)
+        intent = classifier.classify(message)
+        if intent is None:
+            print(f"{message:<66} {elapsed:7.2f} {'-':>5}  segue pelos menus")
+            continue
+        unit = units.units[intent.unit]
+        # Pelos menus: saudação, unidade, (categoria "6" no Fhemig em Números) e indicador
+        menu_turns = 4 if intent.catalog == FHEMIG_NUMEROS else 3
+        print(f"{message:<66} {elapsed:7.2f} {f'{menu_turns}->1':>5}  "
+              f"{catalogs[intent.catalog][intent.choice]} / {unit['name']}")
+
+
+if __name__ == "__main__":
+    main()
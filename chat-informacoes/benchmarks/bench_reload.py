@@ -0,0 +1,131 @@
+"""
+Teste de recarga dos arquivos de dados do FhemigChatbot durante o atendimento.
+
+Processa continuamente as sessões do teste de carga (benchmarks/sessions.py, na
+raiz do repositório) enquanto units.json e fhemig_numeros.json são reescritos:
+versões válidas (unidade nova, indicador renomeado) e inválidas (JSON truncado).
+Compara a latência das mensagens sem e com recargas e confere que nenhuma
+mensagem falhou e que as versões inválidas foram rejeitadas.
+
+Uso (a partir de chat-informacoes/):
+    python benchmarks/bench_reload.py --seconds 10
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT = os.path.dirname(BOT_DIR)
+sys.path.insert(0, BOT_DIR)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from fake_zulip import FakeZulipServer  # noqa: E402
+from sessions import informacoes_sessions, write_informacoes_fixtures  # noqa: E402
+from src.bot import FhemigChatbot  # noqa: E402
+
+
+class DiscardClient:
+    def send_message(self, request):
+        return {"result": "success"}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)] * 1e6
+
+
+def run_messages(bot, sessions, seconds):
+    # Percorre as sessões em ciclo, com um remetente novo a cada volta
+    latencies, errors, round_ = [], 0, 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        round_ += 1
+        for user, steps in enumerate(sessions):
+            for content in steps:
+                message = {"type": "private", "sender_id": f"{round_}-{user}", "sender_email": "u@fhemig",
+                           "sender_full_name": "Usuário", "content": content}
+                started = time.perf_counter()
+                try:
+                    bot.handle_message(message)
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+    return latencies, errors
+
+
+def rewrite_files(data_dir, stop, interval):
+    # Alterna versões válidas e inválidas dos arquivos de dados
+    units_file = os.path.join(data_dir, "units.json")
+    numeros_file = os.path.join(data_dir, "fhemig_numeros.json")
+    with open(units_file, encoding="utf-8") as f:
+        units = json.load(f)
+    with open(numeros_file, encoding="utf-8") as f:
+        numeros = json.load(f)
+    version = 0
+    while not stop.wait(interval):
+        version += 1
+        if version % 3 == 0:
+            with open(units_file, "w", encoding="utf-8") as f:
+                f.write(json.dumps(units, ensure_ascii=False)[:-20])
+            continue
+        new_units = units + [{"name": f"Unidade Nova {version}", "system": "SIGH"}]
+        new_numeros = dict(numeros, indicador_1={"nome": f"Pacientes Dia (versão {version})"})
+        for path, data in ((units_file, new_units), (numeros_file, new_numeros)):
+            # Gravação atômica: arquivo temporário e rename
+            temporary = f"{path}.tmp"
+            with open(temporary, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temporary, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--rewrite-interval", type=float, default=0.5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        units = write_informacoes_fixtures(data_dir, os.path.join(BOT_DIR, "data", "units.json"))
+        os.environ["DATA_RELOAD_INTERVAL"] = str(args.rewrite_interval / 5)
+        os.environ["SESSION_DB"] = os.path.join(data_dir, "sessions.sqlite3")
+        server = FakeZulipServer()
+        server.start()
+        try:
+            zuliprc = os.path.join(data_dir, "zuliprc")
+            server.write_zuliprc(zuliprc)
+            bot = FhemigChatbot(config_file=zuliprc, data_dir=data_dir)
+        finally:
+            server.stop()
+        bot.client = DiscardClient()
+        bot.outbound = None
+        sessions = informacoes_sessions(units, args.sessions)
+
+        # Os handlers imprimem diagnósticos; a saída é descartada durante a medição
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            baseline, baseline_errors = run_messages(bot, sessions, args.seconds / 2)
+            stop = threading.Event()
+            writer = threading.Thread(target=rewrite_files, args=(data_dir, stop, args.rewrite_interval))
+            writer.start()
+            reloading, reloading_errors = run_messages(bot, sessions, args.seconds / 2)
+            stop.set()
+            writer.join()
+        bot.data.stop()
+
+        print(f"{'':<16} {'mensagens':>10} {'erros':>6} {'p50 µs':>9} {'p99 µs':>9} {'máx. µs':>10}")
+        for label, latencies, errors in (("sem recarga", baseline, baseline_errors),
+                                         ("com recargas", reloading, reloading_errors)):
+            print(f"{label:<16} {len(latencies):>10} {errors:>6} {percentile(latencies, 0.5):9.1f} "
+                  f"{percentile(latencies, 0.99):9.1f} {max(latencies) * 1e6:10.1f}")
+        print(f"\nRecargas aplicadas: {bot.data.reloads}; versões rejeitadas: {bot.data.failures}; "
+              f"unidades em uso: {len(bot.unit_handler.units)}")
+
+
+if __name__ == "__main__":
+    main()
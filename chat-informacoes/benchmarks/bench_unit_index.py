@@ -0,0 +1,76 @@
+"""
+Micro-benchmark da busca de unidades por texto livre.
+
+Compara src/unit_index.py (mapa de siglas e apelidos, índice invertido de
+palavras e trigramas montados uma vez) com uma busca ingênua que normaliza e
+compara a consulta com todos os nomes a cada mensagem (difflib), para consultas
+exatas, siglas, nomes com erros de digitação e consultas ambíguas.
+
+Uso (a partir de chat-informacoes/):
+    python benchmarks/bench_unit_index.py --repeat 20000
+"""
+
+import argparse
+import difflib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.handlers.unit_handler import UnitHandler  # noqa: E402
+from src.unit_index import normalize  # noqa: E402
+
+QUERIES = [
+    ("nome completo", "Hospital Júlia Kubitschek"),
+    ("sem acentos", "hospital julia kubitschek"),
+    ("parte do nome", "João XXIII"),
+    ("sigla", "HJXXIII"),
+    ("sigla", "CHPB"),
+    ("erro de digitação", "kubitchek"),
+    ("ambígua", "barbacena"),
+    ("sem correspondência", "bom dia"),
+]
+
+
+def naive_search(names, query):
+    # Busca sem índice: normaliza todos os nomes e compara um a um a cada consulta
+    normalized = normalize(query)
+    scored = [(i, difflib.SequenceMatcher(None, normalized, normalize(name)).ratio()) for i, name in enumerate(names)]
+    return sorted(scored, key=lambda item: -item[1])[:5]
+
+
+def timed(function, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--units", default=os.path.join("data", "units.json"))
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    handler = UnitHandler(args.units)
+    print(f"Handler e índice montados em {(time.perf_counter() - started) * 1e3:.2f} ms "
+          f"({len(handler.units)} unidades)\n")
+
+    print(f"{'consulta':<28} {'tipo':<20} {'índice µs':>10} {'ingênua µs':>11}  resultado")
+    for kind, query in QUERIES:
+        indexed = timed(lambda: handler.index.resolve(query), args.repeat)
+        naive = timed(lambda: naive_search(handler.unit_names, query), max(args.repeat // 20, 1))
+        match = handler.index.resolve(query)
+        if match.unit is not None:
+            result = handler.unit_names[match.unit]
+        elif match.candidates:
+            result = f"{len(match.candidates)} candidatas"
+        else:
+            result = "-"
+        print(f"{query:<28} {kind:<20} {indexed:10.2f} {naive:11.2f}  {result}")
+
+
+if __name__ == "__main__":
+    main()
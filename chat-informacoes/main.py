@@ -2,7 +2,7 @@ import os
 import sys
 import logging
 from dotenv import load_dotenv
-from src.bot import FhemigChatbot
+from src.bot import main as run_chatbot
 
 # Configuração de logging
 def setup_logging():
@@ -39,13 +39,9 @@ def main():
 
     try:
 
-        # Inicializar o chatbot
-        bot = FhemigChatbot()
-        logger.info("Chatbot Fhemig inicializado com sucesso.")
-
-        # Executar o bot
+        # Inicializar e executar o chatbot (em vários processos, com BOT_PROCESSES > 1)
         logger.info("Iniciando o loop principal do chatbot...")
-        bot.run()
+        run_chatbot()
 
     except EnvironmentError as e:
         logger.error(f"Erro de configuração: {str(e)}")
@@ -1,143 +1,331 @@
 import os
+import sys
+import time
 import zulip
 from dotenv import load_dotenv
-from typing import Dict, Any
+from typing import Dict, Any, NamedTuple, Optional
 from src.handlers.unit_handler import UnitHandler
 from src.handlers.information_handler import InformationHandler
 from src.handlers.feedback_handler import FeedbackHandler
+from src.data_reloader import DataReloader, validate_indicators, validate_object, validate_units
+from src.intent_classifier import FHEMIG_FUTURO, FHEMIG_NUMEROS, IntentClassifier
+from src.session_store import SessionStore
+from src.state_machine import StateMachine
+
+# Componentes compartilhados entre os bots ficam na raiz do repositório
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from common.config import env_float, env_int
+from common.metrics import REGISTRY, start_metrics_server_from_env
+from common.outbound import OutboundSender
+from common.supervisor import Supervisor
+
+# Arquivo zuliprc do bot, se a variável ZULIPRC não for configurada
+DEFAULT_ZULIPRC = "chat-informacoes\\zuliprc"
+
+# Métricas exportadas em /metrics quando METRICS_PORT é configurada
+stage_seconds = REGISTRY.histogram(
+    "informacoes_stage_seconds", "Duração de cada etapa do processamento da mensagem, em segundos", ["stage"])
+transitions_total = REGISTRY.counter(
+    "informacoes_transitions_total", "Transições de estado da conversa", ["from_state", "to_state"])
+messages_total = REGISTRY.counter(
+    "informacoes_messages_total", "Mensagens processadas, por estado e resultado", ["state", "result"])
+
+class HandlerSnapshot(NamedTuple):
+    """
+    Handlers montados a partir de uma mesma versão dos arquivos de dados, trocados
+    juntos quando os arquivos mudam.
+    """
+    unit_handler: UnitHandler
+    information_handler: InformationHandler
+    intent_classifier: Optional[IntentClassifier]
+
 
 class FhemigChatbot:
     """
     Classe principal do chatbot Fhemig, responsável por gerenciar a interação com os usuários.
     """
 
-    def __init__(self):
+    def __init__(self, config_file: str = None, data_dir: str = None):
         """
         Inicializa o chatbot Fhemig, carregando configurações e inicializando handlers.
+
+        :param config_file: Arquivo zuliprc do bot (padrão: variável ZULIPRC ou chat-informacoes\\zuliprc).
+        :param data_dir: Diretório dos arquivos de dados (padrão: variável DATA_DIR ou chat-informacoes\\data).
         """
         # Carrega variáveis de ambiente
         load_dotenv()
+        config_file = config_file or os.getenv("ZULIPRC", DEFAULT_ZULIPRC)
+        data_dir = data_dir or os.getenv("DATA_DIR", "chat-informacoes\\data")
         # Inicializa o cliente Zulip
-        self.client = zulip.Client(config_file="chat-informacoes\\zuliprc")
-        # Inicializa os handlers para diferentes funcionalidades
-        self.unit_handler = UnitHandler('chat-informacoes\\data\\units.json')
-        self.information_handler = InformationHandler(
-            'chat-informacoes\\data\\indicators.json',
-            'chat-informacoes\\data\\fhemig_numeros.json',
-            'chat-informacoes\\data\\sigh_reports.json',
-            'chat-informacoes\\data\\tasy_reports.json'
+        self.client = zulip.Client(config_file=config_file)
+        # Respostas enviadas em segundo plano: um Zulip lento não atrasa as demais mensagens
+        self.outbound = OutboundSender(
+            self.client, workers=env_int("OUTBOUND_WORKERS", 4, minimum=1)
+        ) if os.getenv("OUTBOUND_ASYNC", "1") == "1" else None
+        # Inicializa os handlers para diferentes funcionalidades; os dados das unidades e
+        # dos indicadores são recarregados quando os arquivos mudam, sem reiniciar o bot
+        # (verificados a cada DATA_RELOAD_INTERVAL segundos; 0 desativa a recarga)
+        self.units_file = os.path.join(data_dir, 'units.json')
+        self.information_files = (
+            os.path.join(data_dir, 'indicators.json'),
+            os.path.join(data_dir, 'fhemig_numeros.json'),
+            os.path.join(data_dir, 'sigh_reports.json'),
+            os.path.join(data_dir, 'tasy_reports.json')
         )
-        self.feedback_handler = FeedbackHandler()
-        # Dicionário para armazenar o estado da conversa de cada usuário
-        self.user_states = {}
+        self.intent_fast_path = os.getenv("INTENT_FAST_PATH", "1") == "1"
+        validators = dict(zip(
+            (self.units_file, *self.information_files),
+            (validate_units, validate_indicators, validate_indicators, validate_object, validate_object),
+        ))
+        self.data = DataReloader(
+            (self.units_file, *self.information_files),
+            self._build_handlers,
+            validators=validators,
+            interval=env_float("DATA_RELOAD_INTERVAL", 5.0, minimum=0),
+        )
+        self.feedback_handler = FeedbackHandler(os.path.join(data_dir, 'feedback.json'))
+        # Máquina de estados da conversa, compilada uma vez a partir da tabela de fluxos
+        self.state_machine = StateMachine.from_file(os.path.join(data_dir, 'flows.json'))
+        self._register_actions()
+        self.state_machine.compile()
+        # Estado da conversa de cada usuário, persistido e com expiração por inatividade
+        self.sessions = SessionStore(
+            os.getenv("SESSION_DB", os.path.join(data_dir, 'sessions.sqlite3')),
+            ttl=env_float("SESSION_TTL", 86400.0, minimum=1),
+            max_cached=env_int("SESSION_CACHE_SIZE", 10000, minimum=1),
+        )
+
+    def _build_handlers(self, preloaded: Dict[str, Any]) -> HandlerSnapshot:
+        """
+        Monta os handlers a partir dos arquivos de dados.
+
+        :param preloaded: Conteúdo já lido e validado dos arquivos, por caminho (os demais são lidos pelos handlers).
+        :return: Novo snapshot dos handlers.
+        """
+        unit_handler = UnitHandler(self.units_file, preloaded)
+        information_handler = InformationHandler(*self.information_files, preloaded=preloaded)
+        # Atalho: mensagens como "taxa de ocupação do João XXIII" são respondidas sem os menus
+        intent_classifier = IntentClassifier(
+            unit_handler.index,
+            unit_handler.units,
+            {
+                FHEMIG_NUMEROS: information_handler.fhemig_numeros_names,
+                FHEMIG_FUTURO: information_handler.fhemig_futuro_names,
+            },
+        ) if self.intent_fast_path else None
+        return HandlerSnapshot(unit_handler, information_handler, intent_classifier)
+
+    @property
+    def unit_handler(self) -> UnitHandler:
+        """
+        Handler de unidades do snapshot em uso.
+        """
+        return self.data.current.unit_handler
+
+    @property
+    def information_handler(self) -> InformationHandler:
+        """
+        Handler de informações do snapshot em uso.
+        """
+        return self.data.current.information_handler
+
+    @property
+    def intent_classifier(self) -> Optional[IntentClassifier]:
+        """
+        Classificador de intenções do snapshot em uso (None se o atalho estiver desativado).
+        """
+        return self.data.current.intent_classifier
 
     def handle_message(self, message: Dict[str, Any]) -> None:
         """
-        Processa cada mensagem recebida e gerencia o fluxo da conversa.
+        Processa cada mensagem recebida, registrando a duração e a transição de estado.
         
         :param message: Dicionário contendo detalhes da mensagem recebida
         """
-        content = message['content']
-        sender_id = message['sender_id']
-        sender_full_name = message['sender_full_name']
-        
-        # Inicializa o estado do usuário se for a primeira interação
-        if sender_id not in self.user_states:
-            self.user_states[sender_id] = {'state': 'initial'}
-            self.send_response(message, self.unit_handler.get_initial_message(nome_usuario=sender_full_name))
-            return
-
-        # Associa o id especifico ao state
-        current_state = self.user_states[sender_id]['state']
-
-        # Lógica para o estado inicial (seleção de unidade)
-        if current_state == 'initial':
-            response = self.unit_handler.handle(content)
-            if response['success']: ## Response é sempre o return das funções
-                self.user_states[sender_id].update({
-                    'state': 'unit_selected',
-                    'unit': response['selected_unit'],
-                    'system': response['system']
-                })
-                self.send_response(message, response['message'])
-                print(f"Estado atual: {current_state}, Entrada do usuário: {content}")
+        started = time.perf_counter()
+        session = self.load_session(message['sender_id'])
+        state = session['state']
+        result = "error"
+        try:
+            self.process_message(message, session)
+            result = "ok"
+        finally:
+            transitions_total.labels(state, session['state']).inc()
+            messages_total.labels(state, result).inc()
+            stage_seconds.labels("total").observe(time.perf_counter() - started)
+
+    def load_session(self, sender_id: Any) -> Dict[str, Any]:
+        """
+        Obtém a sessão do usuário; usuários novos ou com sessão expirada começam no
+        estado inicial da máquina (saudação).
+
+        :param sender_id: Identificador do usuário.
+        :return: Sessão do usuário.
+        """
+        with stage_seconds.time("session_load"):
+            return self.sessions.get(sender_id) or {'state': self.state_machine.initial_state}
+
+    def process_message(self, message: Dict[str, Any], session: Dict[str, Any] = None) -> None:
+        """
+        Aplica a transição do estado atual do usuário, grava a sessão e envia a resposta.
         
-        # Lógica para o estado após a seleção da unidade
-        elif current_state == 'unit_selected':
-            if content in ['1', '2', '3', '4', '5']:
-                # Opção para consultar indicadores/informações
-                response = self.information_handler.handle_indicator_fhemig_futuro(content, self.user_states[sender_id]['unit'])
-                self.user_states[sender_id]['state'] = 'feedback'
-            elif content == '6':
-                # Opção para buscar outras informações ## Aqui entra a lógica if SIGH (fhemig em numeros -> pentaho)| TASY
-                if self.user_states[sender_id]['system'] == 'SIGH':
-                    response = self.information_handler.handle_other_sigh(indicator_name = content, unit = self.user_states[sender_id]['unit'])                 
-                    self.user_states[sender_id]['state'] = 'sigh_indicator_selection'
-            else:
-                # Mensagem de erro para entrada inválida
-                response = "Opção inválida."
-            self.send_response(message, response['message'] if isinstance(response, dict) else response)
-
-        # Lógica para seleção de indicador específico no SIGH
-        elif current_state == 'sigh_indicator_selection':
-            if content in ['1', '2', '3', '4', '5',
-                           '8', '9', '10', '11', '12',
-                           '13', '14']:
-                response = self.information_handler.handle_fhemig_em_numeros(content, self.user_states[sender_id]['unit'])
-                if response['success']:
-                    self.user_states[sender_id]['state'] = 'feedback'
-            elif content == '15':
-                response = self.information_handler.handle_other_than_fhemig_numeros(self.user_states[sender_id]['unit'], self.user_states[sender_id]['system'])
-                ## relatórios pentaho
-            else: ## Se colocar qualquer outro a função vai retornar mensagem de erro
-                response = self.information_handler.handle_fhemig_em_numeros(content, self.user_states[sender_id]['unit'])
-                self.user_states[sender_id]['state'] = 'feedback'
-            self.send_response(message, response['message'])
-
-        # Lógica para busca de informações no Tasy ou outras informações
-        elif current_state == 'tasy_info_request' or current_state == 'other_info':
-            system = self.user_states[sender_id]['system']
-            unit = self.user_states[sender_id]['unit']
-            response = self.information_handler.handle_other_info_request(content, unit, system)
-            self.user_states[sender_id]['state'] = 'feedback'
-            self.send_response(message, response['message'])
-
-        # Lógica para feedback e continuação ou encerramento da conversa
-        elif current_state == 'feedback':
-            if content == '1':
-                # Usuário deseja continuar
-                response = "Como posso ajudar você agora?\n1. Consultar indicadores/informações\n2. Buscar outras informações"
-                self.user_states[sender_id]['state'] = 'unit_selected'
-            elif content == '2':
-                # Usuário deseja encerrar
-                response = "Obrigado por usar nosso serviço! Se precisar de mais alguma coisa, é só me chamar. Tenha um ótimo dia!"
-                self.user_states[sender_id] = {'state': 'initial'}
-            else:
-                # Mensagem de erro para entrada inválida
-                response = "Opção inválida. Digite 1 para continuar ou 2 para encerrar."
+        :param message: Dicionário contendo detalhes da mensagem recebida
+        :param session: Sessão do usuário (carregada do armazenamento se não informada)
+        """
+        sender_id = message['sender_id']
+        if session is None:
+            session = self.load_session(sender_id)
+        response = self.answer_intent(session, message['content'])
+        if response is None:
+            response = self.state_machine.dispatch(session, message['content'], message)
+        with stage_seconds.time("session_save"):
+            self.sessions.save(sender_id, session)
+        if response:
             self.send_response(message, response)
 
+    def answer_intent(self, session: Dict[str, Any], content: str) -> Optional[str]:
+        """
+        Responde diretamente, em qualquer estado, a uma mensagem que cite um indicador
+        (e a unidade, se ainda não selecionada), levando a sessão ao estado de feedback.
+
+        :param session: Sessão do usuário; atualizada no lugar.
+        :param content: Entrada do usuário.
+        :return: Resposta do indicador, ou None se a mensagem deve seguir pelos menus.
+        """
+        content = content.strip()
+        # Um único snapshot: as posições das unidades do classificador valem para os mesmos handlers
+        data = self.data.current
+        if data.intent_classifier is None or content.isdigit():
+            return None
+        with stage_seconds.time("intent"):
+            intent = data.intent_classifier.classify(content, session.get('system'))
+        if intent is None:
+            return None
+        if intent.unit is not None:
+            unit = data.unit_handler.units[intent.unit]
+            unit_name, system = unit['name'], unit['system']
+        elif 'unit' in session:
+            unit_name, system = session['unit'], session['system']
+        else:
+            return None
+
+        if intent.catalog == FHEMIG_NUMEROS:
+            result = data.information_handler.handle_fhemig_em_numeros(intent.choice, unit_name)
+        else:
+            result = data.information_handler.handle_indicator_fhemig_futuro(intent.choice, unit_name)
+        if not result['success']:
+            return None
+        session.update({'unit': unit_name, 'system': system, 'state': result['next_state']})
+        return result['message']
+
+    def _register_actions(self) -> None:
+        """
+        Registra as ações referenciadas pela tabela de fluxos (flows.json).
+        """
+        actions = {
+            'greet': lambda content, session, message: {
+                'success': True,
+                'message': self.unit_handler.get_initial_message(nome_usuario=message['sender_full_name']),
+            },
+            'select_unit': self._select_unit,
+            'fhemig_futuro_indicator': lambda content, session, message:
+                self.information_handler.handle_indicator_fhemig_futuro(content, session['unit']),
+            'sigh_menu': lambda content, session, message:
+                self.information_handler.handle_other_sigh(indicator_name=content, unit=session['unit']),
+            'tasy_reports': lambda content, session, message:
+                self.information_handler.handle_tasy_request("Outros", session['unit']),
+            'fhemig_em_numeros_indicator': lambda content, session, message:
+                self.information_handler.handle_fhemig_em_numeros(content, session['unit']),
+            'sigh_other_reports': lambda content, session, message:
+                self.information_handler.handle_other_than_fhemig_numeros(session['unit'], session['system']),
+        }
+        for name, action in actions.items():
+            self.state_machine.register(name, action)
+
+    def _select_unit(self, content: str, session: Dict[str, Any], message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Seleciona a unidade do usuário e guarda a unidade e o sistema na sessão.
+
+        :param content: Entrada do usuário (número, nome ou sigla da unidade).
+        :param session: Sessão do usuário.
+        :param message: Mensagem original recebida.
+        :return: Resposta do UnitHandler.
+        """
+        response = self.unit_handler.handle(content)
+        if response['success']:
+            session.update({'unit': response['selected_unit'], 'system': response['system']})
+        return response
+
     def send_response(self, original_message: Dict[str, Any], response_content: str) -> None:
         """
-        Envia uma resposta para o usuário através do Zulip.
+        Envia uma resposta para o usuário através do Zulip (enfileirada, com OUTBOUND_ASYNC).
         
         :param original_message: Mensagem original recebida
         :param response_content: Conteúdo da resposta a ser enviada
         """
-        self.client.send_message({
-            "type": original_message["type"],
-            "to": original_message["sender_email"],
-            "content": response_content,
-        })
+        with stage_seconds.time("send"):
+            (self.outbound or self.client).send_message({
+                "type": original_message["type"],
+                "to": original_message["sender_email"],
+                "content": response_content,
+            })
 
     def run(self) -> None:
         """
-        Inicia o bot e configura o processamento contínuo de mensagens.
+        Inicia o bot e processa as mensagens neste processo, uma por vez.
         """
         print("Fhemig Chatbot está rodando. Pressione Ctrl-C para sair.")
-        self.client.call_on_each_message(self.handle_message)
+        start_metrics_server_from_env()
+        try:
+            self.client.call_on_each_message(self.handle_message)
+        finally:
+            if self.outbound:
+                self.outbound.shutdown(timeout=30)
 
-if __name__ == "__main__":
-    bot = FhemigChatbot()
-    bot.run()
 
+def create_worker() -> FhemigChatbot:
+    """
+    Cria o bot de um processo worker do supervisor.
+
+    :return: Instância do chatbot.
+    """
+    return FhemigChatbot()
+
+
+def run_supervisor(processes: int) -> None:
+    """
+    Distribui as mensagens entre processos worker pelo remetente. Este processo cria
+    apenas o cliente Zulip; cada worker cria o próprio chatbot (create_worker).
+
+    :param processes: Número de processos worker.
+    """
+    client = zulip.Client(config_file=os.getenv("ZULIPRC", DEFAULT_ZULIPRC))
+    supervisor = Supervisor(
+        create_worker,
+        workers=processes,
+        threads_per_worker=env_int("BOT_WORKERS", 4, minimum=1),
+        max_pending=env_int("BOT_MAX_PENDING", 100, minimum=1),
+    )
+    print("Fhemig Chatbot está rodando. Pressione Ctrl-C para sair.")
+    start_metrics_server_from_env()
+    try:
+        client.call_on_each_message(supervisor.submit)
+    finally:
+        supervisor.shutdown()
+
+
+def main() -> None:
+    """
+    Inicia o chatbot: com BOT_PROCESSES > 1, em processos worker coordenados por
+    este processo; caso contrário, neste processo.
+    """
+    load_dotenv()
+    processes = env_int("BOT_PROCESSES", 1, minimum=1)
+    if processes > 1:
+        run_supervisor(processes)
+    else:
+        FhemigChatbot().run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+from typing import Any, Callable, Dict, Generic, Mapping, Optional, Sequence, Tuple, TypeVar
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Identificação da versão de um arquivo: (mtime em ns, tamanho), ou None se ausente
+Signature = Optional[Tuple[int, int]]
+
+
+def validate_units(units: Any, file_path: str) -> None:
+    """
+    Valida o conteúdo de units.json.
+
+    :param units: Conteúdo do arquivo.
+    :param file_path: Caminho do arquivo (para a mensagem de erro).
+    :raises ValueError: Se a lista de unidades for inválida.
+    """
+    if not isinstance(units, list) or not units:
+        raise ValueError(f"{file_path}: a lista de unidades está vazia ou não é uma lista")
+    names = set()
+    for position, unit in enumerate(units, 1):
+        if not isinstance(unit, dict) or not isinstance(unit.get('name'), str) or not isinstance(unit.get('system'), str):
+            raise ValueError(f"{file_path}: unidade {position} sem 'name' ou 'system'")
+        aliases = unit.get('aliases', [])
+        if not isinstance(aliases, list) or not all(isinstance(alias, str) for alias in aliases):
+            raise ValueError(f"{file_path}: 'aliases' da unidade {unit['name']} deve ser uma lista de textos")
+        if unit['name'] in names:
+            raise ValueError(f"{file_path}: unidade repetida: {unit['name']}")
+        names.add(unit['name'])
+
+
+def validate_indicators(indicators: Any, file_path: str) -> None:
+    """
+    Valida um arquivo de indicadores (indicators.json, fhemig_numeros.json).
+
+    :param indicators: Conteúdo do arquivo.
+    :param file_path: Caminho do arquivo (para a mensagem de erro).
+    :raises ValueError: Se algum indicador não tiver nome.
+    """
+    validate_object(indicators, file_path)
+    for key, indicator in indicators.items():
+        if not isinstance(indicator, dict) or not isinstance(indicator.get('nome'), str):
+            raise ValueError(f"{file_path}: indicador '{key}' sem 'nome'")
+
+
+def validate_object(data: Any, file_path: str) -> None:
+    """
+    Valida um arquivo cujo conteúdo deve ser um objeto JSON (relatórios do SIGH e do Tasy).
+
+    :param data: Conteúdo do arquivo.
+    :param file_path: Caminho do arquivo (para a mensagem de erro).
+    :raises ValueError: Se o conteúdo não for um objeto.
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"{file_path}: o conteúdo deve ser um objeto JSON")
+
+
+class DataReloader(Generic[T]):
+    """
+    Recarrega dados a partir de arquivos JSON quando eles mudam, sem interromper o
+    atendimento.
+
+    Uma thread verifica periodicamente a data de modificação e o tamanho dos
+    arquivos. Quando algum muda, os arquivos são lidos e validados e um novo
+    snapshot é montado por `build`, tudo fora do processamento das mensagens; o
+    snapshot em uso é então substituído em uma única atribuição. As mensagens em
+    andamento terminam com o snapshot anterior, e arquivos inválidos (ou ainda em
+    gravação) são ignorados até a próxima modificação, mantendo os dados atuais.
+    Um arquivo apagado é aguardado por `missing_grace` segundos (editores e deploys
+    costumam apagá-lo e recriá-lo); depois disso, as mudanças nos demais arquivos
+    são aplicadas com o último conteúdo lido do arquivo ausente.
+    """
+
+    def __init__(self, paths: Sequence[str], build: Callable[[Dict[str, Any]], T],
+                 validators: Optional[Mapping[str, Callable[[Any, str], None]]] = None, interval: float = 5.0,
+                 missing_grace: float = 30.0):
+        """
+        Monta o snapshot inicial e, se `interval` for positivo, inicia a verificação periódica.
+
+        :param paths: Arquivos monitorados.
+        :param build: Monta o snapshot a partir do conteúdo dos arquivos, por caminho; os
+            arquivos ausentes do dicionário (inexistentes desde o início) devem ser
+            tratados pelo próprio `build`.
+        :param validators: Validador do conteúdo de cada arquivo, por caminho.
+        :param interval: Intervalo, em segundos, entre as verificações (0 desativa).
+        :param missing_grace: Espera, em segundos, por um arquivo apagado antes de aplicar
+            as mudanças dos demais com o último conteúdo dele.
+        :raises ValueError: Se o conteúdo inicial de algum arquivo for inválido.
+        """
+        self.paths = tuple(paths)
+        self.build = build
+        self.validators = dict(validators or {})
+        self.interval = interval
+        self.missing_grace = missing_grace
+        self.reloads = 0
+        self.failures = 0
+        self._signatures = self._stat()
+        # Último conteúdo lido de cada arquivo, usado enquanto ele estiver ausente
+        self._contents = self._read(self._signatures, {})
+        # Instante (time.monotonic) em que cada arquivo apagado foi notado
+        self._missing_since: Dict[str, float] = {}
+        self._current = build(dict(self._contents))
+        self._check_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        if interval > 0:
+            self._thread = threading.Thread(target=self._watch, name="data-reloader", daemon=True)
+            self._thread.start()
+
+    @property
+    def current(self) -> T:
+        """
+        Snapshot em uso.
+        """
+        return self._current
+
+    def _stat(self) -> Tuple[Signature, ...]:
+        signatures = []
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                signatures.append(None)
+            else:
+                signatures.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(signatures)
+
+    def _read(self, signatures: Tuple[Signature, ...], previous: Dict[str, Any]) -> Dict[str, Any]:
+        # Lê e valida os arquivos presentes; os ausentes mantêm o conteúdo anterior, se houver
+        contents = {}
+        for path, signature in zip(self.paths, signatures):
+            if signature is None:
+                if path in previous:
+                    contents[path] = previous[path]
+                continue
+            with open(path, 'r', encoding='utf-8') as file:
+                contents[path] = json.load(file)
+            validator = self.validators.get(path)
+            if validator is not None:
+                validator(contents[path], path)
+        return contents
+
+    def _waiting_for_missing(self, signatures: Tuple[Signature, ...]) -> bool:
+        # Editores e deploys costumam apagar e recriar o arquivo: espera ele voltar por
+        # `missing_grace` segundos antes de seguir sem ele
+        now = time.monotonic()
+        waiting = False
+        for path, old, new in zip(self.paths, self._signatures, signatures):
+            if new is not None:
+                self._missing_since.pop(path, None)
+            elif old is not None:
+                since = self._missing_since.setdefault(path, now)
+                if since == now:
+                    logger.warning("Arquivo de dados ausente: %s; aguardando até %.0fs antes de recarregar "
+                                   "os demais com o conteúdo anterior", path, self.missing_grace)
+                if now - since < self.missing_grace:
+                    waiting = True
+        return waiting
+
+    def check(self) -> bool:
+        """
+        Recarrega os dados se algum arquivo mudou desde a última verificação.
+
+        :return: True se um novo snapshot passou a ser usado.
+        """
+        with self._check_lock:
+            signatures = self._stat()
+            if signatures == self._signatures or self._waiting_for_missing(signatures):
+                return False
+            for path, old, new in zip(self.paths, self._signatures, signatures):
+                if old is not None and new is None:
+                    logger.warning("Arquivo de dados ainda ausente: %s; usando o conteúdo anterior", path)
+                    self._missing_since.pop(path, None)
+            # A versão é registrada mesmo se for inválida, para não repetir o erro a cada verificação
+            self._signatures = signatures
+            try:
+                contents = self._read(signatures, self._contents)
+                snapshot = self.build(dict(contents))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                self.failures += 1
+                logger.error("Dados não recarregados; mantendo os atuais: %s", e)
+                return False
+            self._current = snapshot
+            self._contents = contents
+            self.reloads += 1
+            logger.info("Dados recarregados (%d)", self.reloads)
+            return True
+
+    def _watch(self) -> None:
+        while not self._stopping.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Falha na verificação dos arquivos de dados")
+
+    def stop(self) -> None:
+        """
+        Encerra a verificação periódica.
+        """
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,136 @@
+from typing import Any, Dict, Optional
+import json
+import os
+import sqlite3
+import threading
+
+# Valor das agregações que abrangem todas as unidades ou todos os dias
+ALL = "*"
+
+
+class FeedbackStore:
+    """
+    Armazena as avaliações dos usuários em SQLite, com contagens agregadas mantidas
+    a cada gravação.
+
+    Cada avaliação é um INSERT (custo constante, sem reescrever o histórico), e as
+    contagens por unidade, avaliação e dia são incrementadas na mesma transação,
+    inclusive os totais gerais (unidade e/ou dia "*"). Assim, um resumo é uma
+    consulta pela chave primária, qualquer que seja o volume de avaliações. O
+    bloqueio de arquivo do SQLite serializa as gravações de vários processos.
+    """
+
+    def __init__(self, path: str = "feedback.sqlite3"):
+        """
+        Abre (ou cria) o banco de avaliações.
+
+        :param path: Caminho do arquivo SQLite.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS feedback (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                unit TEXT NOT NULL,
+                rating TEXT NOT NULL,
+                interaction_details TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS feedback_counts (
+                unit TEXT NOT NULL,
+                rating TEXT NOT NULL,
+                day TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (unit, day, rating)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def add(self, feedback: Dict[str, Any]) -> None:
+        """
+        Grava uma avaliação e atualiza as contagens agregadas, em uma única transação.
+
+        :param feedback: Avaliação com timestamp (ISO 8601), user_id, unit, rating e interaction_details.
+        """
+        with self._lock, self._conn:
+            self._insert(feedback)
+
+    def _insert(self, feedback: Dict[str, Any]) -> None:
+        # Chamado com o lock adquirido, dentro de uma transação
+        unit, rating, day = str(feedback['unit']), feedback['rating'], feedback['timestamp'][:10]
+        self._conn.execute(
+            "INSERT INTO feedback (timestamp, user_id, unit, rating, interaction_details) VALUES (?, ?, ?, ?, ?)",
+            (feedback['timestamp'], str(feedback['user_id']), unit, rating,
+             json.dumps(feedback.get('interaction_details', {}), ensure_ascii=False)),
+        )
+        self._conn.executemany(
+            "INSERT INTO feedback_counts (unit, rating, day, count) VALUES (?, ?, ?, 1) "
+            "ON CONFLICT (unit, day, rating) DO UPDATE SET count = count + 1",
+            [(unit, rating, day), (unit, rating, ALL), (ALL, rating, day), (ALL, rating, ALL)],
+        )
+
+    def counts(self, unit: Optional[str] = None, day: Optional[str] = None) -> Dict[str, int]:
+        """
+        Contagem de avaliações por nota.
+
+        :param unit: Unidade (todas, se None).
+        :param day: Dia no formato AAAA-MM-DD (todos, se None).
+        :return: Nota -> número de avaliações.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rating, count FROM feedback_counts WHERE unit = ? AND day = ?",
+                (unit or ALL, day or ALL),
+            ).fetchall()
+        return dict(rows)
+
+    def __len__(self) -> int:
+        return sum(self.counts().values())
+
+    def migrate_from_json(self, json_path: str) -> int:
+        """
+        Importa as avaliações do antigo arquivo feedback.json, uma única vez e em uma
+        única transação, mesmo que vários processos a iniciem ao mesmo tempo. O
+        arquivo JSON não é alterado.
+
+        :param json_path: Caminho do arquivo JSON legado.
+        :return: Número de avaliações importadas.
+        """
+        if not os.path.exists(json_path):
+            return 0
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_json'").fetchone():
+                return 0
+        try:
+            with open(json_path, 'r', encoding='utf-8') as file:
+                records = json.load(file)
+        except json.JSONDecodeError:
+            print(f"Erro: Falha ao decodificar o arquivo de feedback: {json_path}")
+            return 0
+        with self._lock, self._conn:
+            # O bloqueio de escrita é obtido antes de verificar de novo: outro processo que
+            # importe o mesmo arquivo aguarda esta transação e não repete a importação
+            self._conn.execute("BEGIN IMMEDIATE")
+            if self._conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_json'").fetchone():
+                return 0
+            for feedback in records:
+                self._insert(feedback)
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('migrated_json', ?)", (os.path.abspath(json_path),)
+            )
+        return len(records)
+
+    def close(self) -> None:
+        """
+        Fecha a conexão com o banco.
+        """
+        with self._lock:
+            self._conn.close()
@@ -1,26 +1,40 @@
-import json
+import os
+from types import MappingProxyType
 from typing import Dict, Any
 from datetime import datetime
+from src.feedback_store import FeedbackStore
 
 class FeedbackHandler:
     """
     Classe responsável por gerenciar o feedback dos usuários do chatbot Fhemig.
     """
 
-    def __init__(self, feedback_file: str = 'data/feedback.json'):
+    def __init__(self, feedback_file: str = 'data/feedback.json', store_file: str = None):
         """
-        Inicializa o FeedbackHandler.
+        Inicializa o FeedbackHandler. As avaliações são gravadas em SQLite; o antigo
+        arquivo JSON, se existir, é importado na primeira inicialização.
 
-        :param feedback_file: Caminho para o arquivo JSON onde o feedback será armazenado.
+        :param feedback_file: Caminho do arquivo JSON legado de feedback.
+        :param store_file: Banco SQLite das avaliações (padrão: feedback_file com extensão .sqlite3).
         """
         self.feedback_file = feedback_file
-        self.feedback_options = {
+        self.store = FeedbackStore(store_file or os.path.splitext(feedback_file)[0] + '.sqlite3')
+        migrated = self.store.migrate_from_json(feedback_file)
+        if migrated:
+            print(f"{migrated} avaliações importadas de {feedback_file} para {self.store.path}")
+        self.feedback_options = MappingProxyType({
             '1': 'Muito Satisfeito',
             '2': 'Satisfeito',
             '3': 'Neutro',
             '4': 'Insatisfeito',
             '5': 'Muito Insatisfeito'
-        }
+        })
+        # Mensagem de solicitação montada uma única vez
+        self.feedback_message = (
+            "Por favor, avalie sua experiência com o chatbot:\n\n"
+            + "".join(f"{key}. {value}\n" for key, value in self.feedback_options.items())
+            + "\nDigite o número correspondente à sua avaliação."
+        )
 
     def get_feedback_message(self) -> str:
         """
@@ -28,11 +42,7 @@ class FeedbackHandler:
 
         :return: Mensagem de solicitação de feedback.
         """
-        message = "Por favor, avalie sua experiência com o chatbot:\n\n"
-        for key, value in self.feedback_options.items():
-            message += f"{key}. {value}\n"
-        message += "\nDigite o número correspondente à sua avaliação."
-        return message
+        return self.feedback_message
 
     def handle_feedback(self, user_input: str, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -65,51 +75,29 @@ class FeedbackHandler:
 
     def save_feedback(self, feedback: Dict[str, Any]) -> None:
         """
-        Salva o feedback no arquivo JSON.
+        Salva o feedback e atualiza as contagens agregadas.
 
         :param feedback: Dicionário contendo os detalhes do feedback.
         """
-        try:
-            with open(self.feedback_file, 'r+') as file:
-                try:
-                    data = json.load(file)
-                except json.JSONDecodeError:
-                    data = []
-
-                data.append(feedback)
-                file.seek(0)
-                json.dump(data, file, indent=4)
-                file.truncate()
-        except FileNotFoundError:
-            with open(self.feedback_file, 'w') as file:
-                json.dump([feedback], file, indent=4)
+        self.store.add(feedback)
 
-    def get_feedback_summary(self) -> Dict[str, Any]:
+    def get_feedback_summary(self, unit: str = None, day: str = None) -> Dict[str, Any]:
         """
-        Gera um resumo do feedback coletado.
+        Gera um resumo do feedback coletado, a partir das contagens agregadas.
 
+        :param unit: Unidade a resumir (todas, se None).
+        :param day: Dia a resumir, no formato AAAA-MM-DD (todos, se None).
         :return: Dicionário contendo um resumo das avaliações.
         """
-        try:
-            with open(self.feedback_file, 'r') as file:
-                data = json.load(file)
-
-            total_feedback = len(data)
-            ratings_count = {option: 0 for option in self.feedback_options.values()}
-
-            for feedback in data:
-                ratings_count[feedback['rating']] += 1
+        counts = self.store.counts(unit, day)
+        total_feedback = sum(counts.values())
+        if not total_feedback:
+            return {'error': 'Nenhum feedback coletado ainda.'}
 
-            summary = {
-                'total_feedback': total_feedback,
-                'ratings_distribution': {
-                    rating: f"{count} ({count/total_feedback*100:.2f}%)"
-                    for rating, count in ratings_count.items()
-                }
+        return {
+            'total_feedback': total_feedback,
+            'ratings_distribution': {
+                rating: f"{counts.get(rating, 0)} ({counts.get(rating, 0)/total_feedback*100:.2f}%)"
+                for rating in self.feedback_options.values()
             }
-
-            return summary
-        except FileNotFoundError:
-            return {'error': 'Nenhum feedback coletado ainda.'}
-        except json.JSONDecodeError:
-            return {'error': 'Erro ao ler o arquivo de feedback.'}
+        }
@@ -1,13 +1,73 @@
-from typing import Dict, Any, List
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional, Tuple
 import json
 
+# Marcador da unidade nos templates pré-compilados: cada mensagem é guardada como os
+# trechos fixos entre as ocorrências da unidade, unidos a ela em cada solicitação
+UNIT_PLACEHOLDER = "\x00unidade\x00"
+
+PAINEL_FHEMIG_FUTURO_URL = "https://app.powerbi.com/view?r=eyJrIjoiZmY0NmIxZmYtMDdkMy00Yzg1LTkxY2ItZjBhOWEwMTJlNDVhIiwidCI6IjM4ZjAxMzYyLTRiMWMtNGU2ZS05MDE0LTAzN2M1ZDA0MTMyNyJ9"
+FHEMIG_EM_NUMEROS_URL = "pentaho.fhemig.mg.gov.br:8080"
+
+# Menu dos indicadores do Fhemig em Números (SIGH)
+FHEMIG_EM_NUMEROS_MENU = (
+    "Qual informação você deseja obter?\n\n"
+    "1: Pacientes Dia\n"
+    "2: Saídas Hospitalares\n"
+    "3: Óbitos Hospitalares\n"
+    "4: Óbitos Institucionais\n"
+    "5: Leitos Dia\n"
+    "6: Internações Hospitalares\n"
+    "7: Consultas Médicas Eletivas\n"
+    "8: Consultas Médicas de Urgência\n"
+    "9: Saídas por Clínicas\n"
+    "10: Média de Permanência (Dias)\n"
+    "11: Taxa de Ocupação (%)\n"
+    "12: Taxa de Mortalidade Hospitalar Geral (%)\n"
+    "13: Taxa de Mortalidade Institucional (%)\n"
+    "14: Índice de Renovação de Leitos\n"
+    "15: Outros"
+)
+
+PENTAHO_ACCESS_MESSAGE = (
+    "Para buscar outras informações além das mencionadas dentro do SIGH, "
+    "acesse os relatórios do Pentaho.\n\n"
+    "Caso não possua acesso ao Pentaho, envie um e-mail com:\n"
+    "* Nome completo\n"
+    "* CPF\n"
+    "Para o endereço: nucleo.informacao@fhemig.mg.gov.br, solicitando "
+    "acesso ao sistema."
+)
+
+
+def compile_template(template: str) -> Tuple[str, ...]:
+    """
+    Pré-compila uma mensagem com a unidade marcada por UNIT_PLACEHOLDER.
+
+    :param template: Mensagem com o marcador no lugar da unidade.
+    :return: Trechos fixos da mensagem, entre as ocorrências da unidade.
+    """
+    return tuple(template.split(UNIT_PLACEHOLDER))
+
+
+def render_template(segments: Tuple[str, ...], unit: str) -> str:
+    """
+    Preenche a unidade em uma mensagem pré-compilada.
+
+    :param segments: Trechos fixos retornados por compile_template.
+    :param unit: Nome da unidade.
+    :return: Mensagem final.
+    """
+    return unit.join(segments)
+
 class InformationHandler:
     """
     Classe responsável por gerenciar solicitações de informações,
     incluindo indicadores do Fhemig em Números e outros relatórios do SIGH e Tasy.
     """
 
-    def __init__(self, indicators_file: str, fhemig_numeros_file: str, sigh_reports_file: str, tasy_reports_file: str):
+    def __init__(self, indicators_file: str, fhemig_numeros_file: str, sigh_reports_file: str, tasy_reports_file: str,
+                 preloaded: Optional[Mapping[str, Any]] = None):
         """
         Inicializa o InformationHandler.
 
@@ -15,19 +75,94 @@ class InformationHandler:
         :param sigh_reports_file: Caminho para o arquivo JSON contendo informações indicadores Fhemig do Futuro.
         :param sigh_reports_file: Caminho para o arquivo JSON contendo informações sobre relatórios do SIGH.
         :param tasy_reports_file: Caminho para o arquivo JSON contendo informações sobre relatórios do Tasy.
+        :param preloaded: Conteúdo já lido e validado dos arquivos, por caminho (esses arquivos não são lidos de novo).
         """
+        self.preloaded = preloaded or {}
         self.indicators_fhemig_futuro = self.load_data(indicators_file)
         self.indicators_fhemig_numeros = self.load_data(fhemig_numeros_file)
         self.sigh_reports = self.load_data(sigh_reports_file)
         self.tasy_reports = self.load_data(tasy_reports_file)
-        self.fhemig_em_numeros_indicators = {
+        self.fhemig_em_numeros_indicators = MappingProxyType({
             "1": "Taxa de Ocupação Hospitalar",
             "2": "Tempo Médio de Permanência",
             "3": "Número de Internações",
             "4": "Número de Cirurgias",
             "5": "Número de Doadores Efetivos",
             "6": "Outros"
-        }
+        })
+        # Mapas de indicadores e mensagens pré-compilados na carga dos dados: em cada
+        # solicitação, apenas a unidade é inserida
+        self.fhemig_futuro_names = self.build_indicator_map(self.indicators_fhemig_futuro)
+        self.fhemig_numeros_names = self.build_indicator_map(self.indicators_fhemig_numeros)
+        self.fhemig_futuro_messages = MappingProxyType({
+            choice: compile_template(self._fhemig_futuro_message(name))
+            for choice, name in self.fhemig_futuro_names.items()
+        })
+        self.fhemig_numeros_messages = MappingProxyType({
+            choice: compile_template(self._fhemig_numeros_message(name))
+            for choice, name in self.fhemig_numeros_names.items()
+        })
+        self.sigh_indicator_list = "\n".join(f"{key}. {value}" for key, value in self.fhemig_em_numeros_indicators.items())
+        pentaho_info = self.sigh_reports.get("pentaho", {})
+        self.sigh_other_reports_instructions = (
+            f"1. Acesse: {pentaho_info.get('url', 'URL não disponível')}\n"
+            f"2. {pentaho_info.get('instrucoes', 'Instruções não disponíveis')}\n\n"
+            "Se você tiver dificuldades em encontrar o relatório específico, "
+            "por favor, entre em contato com o Núcleo de Informação para assistência adicional."
+        )
+        self.tasy_instructions = (
+            f"{self.tasy_reports.get('instrucoes_gerais', 'Informações não disponíveis')}\n\n"
+            "Lembre-se de procurar por relatórios com o prefixo 'FHEMIG - NI'.\n"
+            "Se você não encontrar a informação desejada, por favor, entre em contato com o Núcleo de Informação para assistência adicional."
+        )
+
+    @staticmethod
+    def build_indicator_map(indicators: Dict[str, Any]) -> Mapping[str, str]:
+        """
+        Monta o mapa imutável opção -> nome do indicador, na ordem do arquivo.
+
+        :param indicators: Indicadores carregados do JSON.
+        :return: Mapa da opção do menu ("1", "2", ...) para o nome do indicador.
+        """
+        return MappingProxyType({str(i): indicator['nome'] for i, indicator in enumerate(indicators.values(), 1)})
+
+    @staticmethod
+    def _fhemig_futuro_message(indicator_name: str) -> str:
+        return (
+            f"Para visualizar o indicador **{indicator_name}** para a unidade **{UNIT_PLACEHOLDER}**, "
+            "siga estas instruções:\n\n"
+            f"1. Acesse o [Painel Fhemig do Futuro]({PAINEL_FHEMIG_FUTURO_URL})\n"
+            "2. Na barra superior, selecione sua unidade\n"
+            f"3. Procure pelo indicador '{indicator_name}' no painel\n\n"
+            "Se você tiver dificuldades para encontrar o indicador, entre em contato com o Núcleo de Informação, por meio do endereço: nucleo.informacao@fhemig.mg.gov.br.\n\n"
+        )
+
+    @staticmethod
+    def _fhemig_numeros_message(indicator_name: str) -> str:
+        return (
+            ## Mensagem para instruir Fhemig em Números
+            f"Para visualizar o indicador **{indicator_name}** para a unidade **{UNIT_PLACEHOLDER}**, "
+            "siga estas instruções:\n\n"
+            f"1. Acesse o **[Fhemig em Números]({FHEMIG_EM_NUMEROS_URL})**\n"
+            "2. Clique em 'Create a new query'\n"
+            "3. Selecione o cubo 'Atendimentos'\n"
+            f"4. Selecione o indicador '{indicator_name}'\n"
+            "5. Clique no campo 'Datas'\n"
+            "6. Arraste o campo 'Mês' para o espaço com título 'Colunas' na tela principal\n"
+            "7. Arrastte também o campo 'Ano'\n"
+            "8. Dentro do campo 'Colunas', na tela, clique em 'Ano' duas vezes\n"
+            "9. Escolha os anos desejados\n"
+            "10. Clique em '>'\n"
+            "11. Clique em 'OK'\n"
+            "12. Agora, de novo no canto inferior esquerdo, clique na setinha com campo 'Hospitais'\n"
+            "13. Agora no campo 'Linhas', arraste para lá o campo 'Hospitais' que foi aberto\n"
+            "14. Clique em 'Hospital' duas vezes para abrir o filtro\n"
+            f"15. Selecione '{UNIT_PLACEHOLDER}'\n"
+            "16. Clique em '>'\n"
+            "17. Clique em 'OK'\n\n"
+            "Abaixo, segue vídeo com passo a passo ilustrado. Como exemplo, é demonstrado como tirar "
+            "o indicador 'Taxa de Ocupação Hospitalar'.\n\n"
+        )
 
 
     def load_data(self, file_path: str) -> Dict[str, Any]:
@@ -37,6 +172,8 @@ class InformationHandler:
         :param file_path: Caminho para o arquivo JSON.
         :return: Dicionário contendo os dados carregados.
         """
+        if file_path in self.preloaded:
+            return self.preloaded[file_path]
         try:
             with open(file_path, 'r', encoding='utf-8') as file:
                 return json.load(file)
@@ -55,22 +192,9 @@ class InformationHandler:
         :param unit: Unidade selecionada pelo usuário.
         :return: Dicionário contendo a resposta formatada em Markdown.
         """
-        indicator_map = {str(i): indicator['nome'] for i, indicator in enumerate(self.indicators_fhemig_futuro.values(), 1)}
-        
-        
-        if indicator_choice in indicator_map:
-            indicator_name = indicator_map[indicator_choice]
-            painel_url = "https://app.powerbi.com/view?r=eyJrIjoiZmY0NmIxZmYtMDdkMy00Yzg1LTkxY2ItZjBhOWEwMTJlNDVhIiwidCI6IjM4ZjAxMzYyLTRiMWMtNGU2ZS05MDE0LTAzN2M1ZDA0MTMyNyJ9"
-            
-            message = (
-                f"Para visualizar o indicador **{indicator_name}** para a unidade **{unit}**, "
-                "siga estas instruções:\n\n"
-                f"1. Acesse o [Painel Fhemig do Futuro]({painel_url})\n"
-                "2. Na barra superior, selecione sua unidade\n"
-                f"3. Procure pelo indicador '{indicator_name}' no painel\n\n"
-                "Se você tiver dificuldades para encontrar o indicador, entre em contato com o Núcleo de Informação, por meio do endereço: nucleo.informacao@fhemig.mg.gov.br.\n\n"               
-            )
-            
+        segments = self.fhemig_futuro_messages.get(indicator_choice)
+        if segments is not None:
+            message = render_template(segments, unit)
             return {
                 "success": True,
                 "message": message,
@@ -91,25 +215,7 @@ class InformationHandler:
         :param unit: Nome da unidade.
         :return: Valor do indicador (como string).
         """
-        # Messagem indicadores fhemig em numeros
-
-        message = ("Qual informação você deseja obter?\n\n"
-                    "1: Pacientes Dia\n"
-                    "2: Saídas Hospitalares\n"
-                    "3: Óbitos Hospitalares\n"
-                    "4: Óbitos Institucionais\n"
-                    "5: Leitos Dia\n"
-                    "6: Internações Hospitalares\n"
-                    "7: Consultas Médicas Eletivas\n"
-                    "8: Consultas Médicas de Urgência\n"
-                    "9: Saídas por Clínicas\n"
-                    "10: Média de Permanência (Dias)\n"
-                    "11: Taxa de Ocupação (%)\n"
-                    "12: Taxa de Mortalidade Hospitalar Geral (%)\n"
-                    "13: Taxa de Mortalidade Institucional (%)\n"
-                    "14: Índice de Renovação de Leitos\n"
-                    "15: Outros")
-
+        message = FHEMIG_EM_NUMEROS_MENU
 
         return {
                 "success": True,
@@ -127,16 +233,7 @@ class InformationHandler:
         :return: Dicionário contendo a resposta formatada.
         """
         if system == "SIGH":
-            message =(
-                "Para buscar outras informações além das mencionadas dentro do SIGH, "
-                "acesse os relatórios do Pentaho.\n\n"
-                "Caso não possua acesso ao Pentaho, envie um e-mail com:\n"
-                "* Nome completo\n"
-                "* CPF\n"
-                "Para o endereço: nucleo.informacao@fhemig.mg.gov.br, solicitando "
-                "acesso ao sistema."
-
-            )
+            message = PENTAHO_ACCESS_MESSAGE
             return {
                 "success": True,
                 "message": message,
@@ -160,11 +257,10 @@ class InformationHandler:
         :param unit: Nome da unidade.
         :return: Dicionário com a resposta formatada.
         """
-        indicator_list = "\n".join([f"{key}. {value}" for key, value in self.fhemig_em_numeros_indicators.items()])
         message = (
             f"Para sua solicitação sobre '{info_request}' na unidade {unit}, "
             "temos os seguintes indicadores disponíveis no Fhemig em Números:\n\n"
-            f"{indicator_list}\n\n"
+            f"{self.sigh_indicator_list}\n\n"
             "Por favor, escolha o número do indicador desejado ou '7' para outros relatórios."
         )
         return {
@@ -207,38 +303,9 @@ class InformationHandler:
         :param unit: Nome da unidade.
         :return: Dicionário com a resposta formatada.
         """
-        
-        indicator_map = {str(i): indicator['nome'] for i, indicator in enumerate(self.indicators_fhemig_numeros.values(), 1)}
-        url_fhemig_numeros = "pentaho.fhemig.mg.gov.br:8080"
-
-        if indicator in indicator_map:
-            indicator_name = indicator_map[indicator]
-            message = (
-                ## Mensagem para instruir Fhemig em Números
-                f"Para visualizar o indicador **{indicator_name}** para a unidade **{unit}**, "
-                "siga estas instruções:\n\n"
-                f"1. Acesse o **[Fhemig em Números]({url_fhemig_numeros})**\n"
-                "2. Clique em 'Create a new query'\n"
-                "3. Selecione o cubo 'Atendimentos'\n"
-                f"4. Selecione o indicador '{indicator_name}'\n"
-                "5. Clique no campo 'Datas'\n"
-                "6. Arraste o campo 'Mês' para o espaço com título 'Colunas' na tela principal\n"
-                "7. Arrastte também o campo 'Ano'\n"
-                "8. Dentro do campo 'Colunas', na tela, clique em 'Ano' duas vezes\n"
-                "9. Escolha os anos desejados\n"
-                "10. Clique em '>'\n"
-                "11. Clique em 'OK'\n"
-                "12. Agora, de novo no canto inferior esquerdo, clique na setinha com campo 'Hospitais'\n"
-                "13. Agora no campo 'Linhas', arraste para lá o campo 'Hospitais' que foi aberto\n"
-                "14. Clique em 'Hospital' duas vezes para abrir o filtro\n"
-                f"15. Selecione '{unit}'\n"
-                "16. Clique em '>'\n"
-                "17. Clique em 'OK'\n\n"
-                "Abaixo, segue vídeo com passo a passo ilustrado. Como exemplo, é demonstrado como tirar "
-                "o indicador 'Taxa de Ocupação Hospitalar'.\n\n"
-
-
-            )
+        segments = self.fhemig_numeros_messages.get(indicator)
+        if segments is not None:
+            message = render_template(segments, unit)
             return {
                 "success": True,
                 "message": message,
@@ -259,13 +326,9 @@ class InformationHandler:
         :param unit: Nome da unidade.
         :return: Dicionário com a resposta formatada.
         """
-        pentaho_info = self.sigh_reports.get("pentaho", {})
         message = (
             f"Para acessar outros relatórios sobre '{info_request}' para a unidade {unit} no Pentaho Azul:\n\n"
-            f"1. Acesse: {pentaho_info.get('url', 'URL não disponível')}\n"
-            f"2. {pentaho_info.get('instrucoes', 'Instruções não disponíveis')}\n\n"
-            "Se você tiver dificuldades em encontrar o relatório específico, "
-            "por favor, entre em contato com o Núcleo de Informação para assistência adicional."
+            f"{self.sigh_other_reports_instructions}"
         )
         return {
             "success": True,
@@ -281,12 +344,9 @@ class InformationHandler:
         :param unit: Nome da unidade.
         :return: Dicionário com a resposta formatada.
         """
-        tasy_info = self.tasy_reports.get("instrucoes_gerais", "Informações não disponíveis")
         message = (
             f"Para obter informações sobre '{info_request}' na unidade {unit}, que utiliza o sistema Tasy:\n\n"
-            f"{tasy_info}\n\n"
-            "Lembre-se de procurar por relatórios com o prefixo 'FHEMIG - NI'.\n"
-            "Se você não encontrar a informação desejada, por favor, entre em contato com o Núcleo de Informação para assistência adicional."
+            f"{self.tasy_instructions}"
         )
         return {
             "success": True,
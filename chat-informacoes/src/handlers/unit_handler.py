@@ -1,19 +1,38 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Mapping, Optional, Tuple
 import json
+from src.unit_index import UnitIndex
+
+# Menu de informações exibido após a seleção da unidade
+INFORMATION_MENU = (
+    "Qual informação você deseja obter?	\n\n"
+    "1: Taxa de Ocupação Hospitalar\n"
+    "2: Tempo Médio de Permanência\n"
+    "3: Número de Internações\n"
+    "4: Número de Cirurgias\n"
+    "5: Número de Doadores Efetivos\n"
+    "6: Outros"
+)
 
 class UnitHandler:
     """
     Classe responsável por gerenciar a seleção de unidades da Fhemig.
     """
 
-    def __init__(self, units_file: str):
+    def __init__(self, units_file: str, preloaded: Optional[Mapping[str, Any]] = None):
         """
         Inicializa o UnitHandler.
 
         :param units_file: Caminho para o arquivo JSON contendo as informações das unidades.
+        :param preloaded: Conteúdo já lido e validado dos arquivos, por caminho (o arquivo não é lido de novo).
         """
-        self.units = self.load_units(units_file)
-        self.unit_names = [unit['name'] for unit in self.units]
+        self.preloaded = preloaded or {}
+        self.units = tuple(self.load_units(units_file))
+        self.unit_names = tuple(unit['name'] for unit in self.units)
+        # Menus e respostas pré-montados: por mensagem, apenas o nome do usuário é inserido
+        self.unit_list = "\n".join(f"{i+1}. {unit['name']}" for i, unit in enumerate(self.units))
+        self.selection_messages: Tuple[str, ...] = tuple(self._selection_message(unit) for unit in self.units)
+        # Busca por nome aproximado, sigla ou apelido, para quem digita o nome em vez do número
+        self.index = UnitIndex(self.units)
 
     def load_units(self, file_path: str) -> List[Dict[str, Any]]:
         """
@@ -22,6 +41,8 @@ class UnitHandler:
         :param file_path: Caminho para o arquivo JSON das unidades.
         :return: Lista de dicionários contendo informações das unidades.
         """
+        if file_path in self.preloaded:
+            return self.preloaded[file_path]
         try:
             with open(file_path, 'r', encoding='utf-8') as file:
                 return json.load(file)
@@ -38,51 +59,61 @@ class UnitHandler:
 
         :return: String contendo a mensagem de boas-vindas e a lista de unidades.
         """
-        unit_list = "\n".join([f"{i+1}. {unit['name']}" for i, unit in enumerate(self.units)])
         return (
             f"Olá, {nome_usuario}! Para eu te ajudar, vamos primeiro selecionar sua unidade. "
-            f"Escolha na lista abaixo, o número da sua unidade:\n\n{unit_list}"
+            f"Escolha na lista abaixo, o número (ou digite o nome) da sua unidade:\n\n{self.unit_list}"
         )
 
     def handle(self, user_input: str) -> Dict[str, Any]:
         """
         Processa a entrada do usuário para seleção de unidade.
 
-        :param user_input: Entrada do usuário (número da unidade).
+        :param user_input: Entrada do usuário (número, nome ou sigla da unidade).
         :return: Dicionário contendo o resultado do processamento.
         """
+        user_input = user_input.strip()
         if user_input.isdigit():
             index = int(user_input) - 1
-            print(f"User input: {user_input}, Calculated index: {index}")
             if 0 <= index < len(self.units):
-                selected_unit = self.units[index]
-                print(f"Selected unit: {selected_unit}")
-                return self.create_success_response(selected_unit)
-        
-        return self.create_error_response("Por favor, digite apenas o número da unidade desejada.")
+                return self.create_success_response(self.units[index], self.selection_messages[index])
+            return self.create_error_response("Por favor, digite o número ou o nome da unidade desejada.")
+
+        match = self.index.resolve(user_input)
+        if match.unit is not None:
+            return self.create_success_response(self.units[match.unit], self.selection_messages[match.unit])
+        if match.candidates:
+            options = "\n".join(f"{position+1}. {self.unit_names[position]}" for position, _ in match.candidates)
+            return self.create_error_response(
+                f"Não encontrei exatamente essa unidade. Digite o número da sua unidade:\n\n{options}"
+            )
+        return self.create_error_response("Por favor, digite o número ou o nome da unidade desejada.")
+
+    def _selection_message(self, unit: Dict[str, str]) -> str:
+        """
+        Monta a mensagem de confirmação da unidade selecionada.
 
-    def create_success_response(self, unit: Dict[str, str]) -> Dict[str, Any]:
+        :param unit: Dicionário contendo informações da unidade.
+        :return: Mensagem com a unidade, o sistema e o menu de informações.
+        """
+        return (
+            f"Ótimo! Você selecionou a unidade {unit['name']}. "
+            f"Esta unidade utiliza o sistema {unit['system']}. "
+            f"{INFORMATION_MENU}"
+        )
+
+    def create_success_response(self, unit: Dict[str, str], message: str = None) -> Dict[str, Any]:
         """
         Cria uma resposta de sucesso para a seleção de unidade.
 
         :param unit: Dicionário contendo informações da unidade selecionada.
+        :param message: Mensagem pré-montada da unidade (montada na hora se não informada).
         :return: Dicionário com a resposta formatada de sucesso.
         """
         return {
             "success": True,
             "selected_unit": unit['name'],
             "system": unit['system'],
-            "message": (
-                f"Ótimo! Você selecionou a unidade {unit['name']}. "
-                f"Esta unidade utiliza o sistema {unit['system']}. "
-                "Qual informação você deseja obter?	\n\n"
-                "1: Taxa de Ocupação Hospitalar\n"
-                "2: Tempo Médio de Permanência\n"
-                "3: Número de Internações\n"
-                "4: Número de Cirurgias\n"
-                "5: Número de Doadores Efetivos\n"
-                "6: Outros"
-            )
+            "message": message or self._selection_message(unit)
         }
 
     def create_error_response(self, error_message: str) -> Dict[str, Any]:
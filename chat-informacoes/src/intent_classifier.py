@@ -0,0 +1,128 @@
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from src.unit_index import UnitIndex, UnitMatch, tokenize
+
+# Catálogos de indicadores que podem ser respondidos diretamente
+FHEMIG_NUMEROS = "fhemig_numeros"
+FHEMIG_FUTURO = "fhemig_futuro"
+
+# Catálogos disponíveis para cada sistema, na ordem de preferência: o Fhemig em
+# Números só existe para as unidades do SIGH; o Painel Fhemig do Futuro, para todas
+SYSTEM_CATALOGS = {"SIGH": (FHEMIG_NUMEROS, FHEMIG_FUTURO)}
+DEFAULT_CATALOGS = (FHEMIG_FUTURO,)
+
+# Palavras que podem ser omitidas ao citar um indicador ("taxa de ocupação" para
+# "Taxa de Ocupação Hospitalar", "internações" para "Número de Internações")
+OPTIONAL_WORDS = frozenset({"numero", "hospitalar", "hospitalares", "geral", "dias"})
+
+# Chave dos nós finais do autômato
+_END = None
+
+
+class Intent(NamedTuple):
+    """
+    Intenção reconhecida em uma mensagem de texto livre.
+
+    :param catalog: Catálogo do indicador (FHEMIG_NUMEROS ou FHEMIG_FUTURO).
+    :param choice: Opção do indicador no menu do catálogo ("1", "2", ...).
+    :param unit: Posição da unidade citada na lista de unidades, ou None se nenhuma foi citada.
+    """
+    catalog: str
+    choice: str
+    unit: Optional[int]
+
+
+class IntentClassifier:
+    """
+    Reconhece, em uma única mensagem, o indicador e a unidade desejados ("taxa de
+    ocupação do João XXIII"), para responder sem passar pelos menus.
+
+    Os nomes dos indicadores são compilados uma vez em um autômato sobre as palavras
+    normalizadas (sem acentos e sem preposições), que encontra o nome mais longo
+    citado em uma só passada pela mensagem; a unidade é procurada nas palavras
+    restantes com o UnitIndex.
+    """
+
+    def __init__(self, unit_index: UnitIndex, units: Sequence[Mapping[str, Any]],
+                 catalogs: Mapping[str, Mapping[str, str]]):
+        """
+        Compila o autômato dos indicadores.
+
+        :param unit_index: Índice de busca das unidades.
+        :param units: Unidades, na ordem do menu (com 'name' e 'system').
+        :param catalogs: Catálogo -> opção do menu -> nome do indicador.
+        """
+        self.unit_index = unit_index
+        self.units = units
+        self._automaton: Dict[Any, Any] = {}
+        # Nomes completos primeiro: as formas abreviadas não substituem um nome completo
+        for catalog, indicators in catalogs.items():
+            for choice, name in indicators.items():
+                self._add(tokenize(name), catalog, choice)
+        for catalog, indicators in catalogs.items():
+            for choice, name in indicators.items():
+                short = [token for token in tokenize(name) if token not in OPTIONAL_WORDS]
+                self._add(short, catalog, choice)
+
+    def _add(self, tokens: List[str], catalog: str, choice: str) -> None:
+        if not tokens:
+            return
+        node = self._automaton
+        for token in tokens:
+            node = node.setdefault(token, {})
+        # Um mesmo nome pode existir em mais de um catálogo; em cada um, vale o primeiro
+        matches = node.setdefault(_END, {})
+        matches.setdefault(catalog, choice)
+
+    def extract(self, text: str) -> Tuple[Dict[str, str], UnitMatch]:
+        """
+        Extrai da mensagem os indicadores e a unidade citados.
+
+        :param text: Mensagem do usuário.
+        :return: Catálogo -> opção do primeiro indicador citado, e a unidade encontrada.
+        """
+        tokens = tokenize(text)
+        indicators: Dict[str, str] = {}
+        remaining = []
+        position = 0
+        while position < len(tokens):
+            node, end, matches = self._automaton, position, None
+            for index in range(position, len(tokens)):
+                node = node.get(tokens[index])
+                if node is None:
+                    break
+                if _END in node:
+                    end, matches = index + 1, node[_END]
+            if matches is None:
+                remaining.append(tokens[position])
+                position += 1
+                continue
+            for catalog, choice in matches.items():
+                indicators.setdefault(catalog, choice)
+            position = end
+
+        # Siglas e apelidos de uma palavra ("HJXXIII") no meio da frase
+        for token in remaining:
+            exact = self.unit_index.exact.get(token)
+            if exact and len(exact) == 1:
+                return indicators, UnitMatch(exact[0], ((exact[0], 1.0),))
+        return indicators, self.unit_index.resolve(" ".join(remaining), ignore_unknown=True)
+
+    def classify(self, text: str, system: Optional[str] = None) -> Optional[Intent]:
+        """
+        Reconhece o indicador e a unidade de uma mensagem.
+
+        :param text: Mensagem do usuário.
+        :param system: Sistema da unidade já selecionada, usado se a mensagem não citar a unidade.
+        :return: Intenção reconhecida, ou None se a mensagem não citar um indicador
+            disponível para a unidade ou se a unidade citada for ambígua.
+        """
+        indicators, match = self.extract(text)
+        if not indicators or (match.unit is None and match.candidates):
+            return None
+        if match.unit is not None:
+            system = self.units[match.unit]['system']
+        for catalog in SYSTEM_CATALOGS.get(system, DEFAULT_CATALOGS):
+            if catalog in indicators:
+                return Intent(catalog, indicators[catalog], match.unit)
+        return None
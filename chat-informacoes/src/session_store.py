@@ -0,0 +1,156 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+import json
+import sqlite3
+import threading
+import time
+
+
+class SessionStore:
+    """
+    Armazena o estado da conversa de cada usuário em SQLite, com expiração por
+    inatividade (TTL) e um cache LRU limitado dos usuários ativos.
+
+    Cada sessão é uma linha com o JSON compacto do estado e o instante da última
+    mensagem; apenas as sessões recentes ficam em memória. O SQLite em modo WAL
+    permite que vários processos do bot usem o mesmo arquivo. O cache supõe que
+    cada usuário é atendido por um único processo; com `max_cached=0`, toda
+    leitura vai ao banco.
+    """
+
+    def __init__(self, path: str = "sessions.sqlite3", ttl: float = 86400.0, max_cached: int = 10000,
+                 purge_interval: float = 600.0, clock: Callable[[], float] = time.time):
+        """
+        Abre (ou cria) o banco de sessões e remove as sessões expiradas.
+
+        :param path: Caminho do arquivo SQLite (":memory:" para uma sessão só em memória).
+        :param ttl: Tempo de inatividade, em segundos, após o qual a sessão expira.
+        :param max_cached: Número máximo de sessões mantidas em memória.
+        :param purge_interval: Intervalo mínimo, em segundos, entre as limpezas das sessões expiradas.
+        :param clock: Relógio (em segundos desde a época) usado para a expiração.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_cached = max_cached
+        self.purge_interval = purge_interval
+        self._clock = clock
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                sender_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions(updated_at);
+        """)
+        self._conn.commit()
+        self._last_purge = 0.0
+        self.purge_expired()
+
+    def get(self, sender_id: Any) -> Optional[Dict[str, Any]]:
+        """
+        Obtém a sessão de um usuário.
+
+        :param sender_id: Identificador do usuário.
+        :return: Cópia da sessão, ou None se não houver sessão ou se ela tiver expirado.
+        """
+        key = str(sender_id)
+        now = self._clock()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+            else:
+                row = self._conn.execute(
+                    "SELECT data, updated_at FROM sessions WHERE sender_id = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                entry = (json.loads(row[0]), row[1])
+                self._remember(key, entry)
+            session, updated_at = entry
+            if now - updated_at > self.ttl:
+                self._forget(key)
+                return None
+        return dict(session)
+
+    def save(self, sender_id: Any, session: Dict[str, Any]) -> None:
+        """
+        Grava a sessão de um usuário e renova o seu prazo de expiração.
+
+        :param sender_id: Identificador do usuário.
+        :param session: Sessão (dicionário serializável em JSON).
+        """
+        key = str(sender_id)
+        now = self._clock()
+        session = dict(session)
+        data = json.dumps(session, ensure_ascii=False, separators=(',', ':'))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (sender_id, data, updated_at) VALUES (?, ?, ?)",
+                (key, data, now),
+            )
+            self._remember(key, (session, now))
+        if now - self._last_purge > self.purge_interval:
+            self.purge_expired()
+
+    def delete(self, sender_id: Any) -> None:
+        """
+        Remove a sessão de um usuário.
+
+        :param sender_id: Identificador do usuário.
+        """
+        with self._lock:
+            self._forget(str(sender_id))
+
+    def purge_expired(self) -> int:
+        """
+        Remove do banco e do cache as sessões inativas há mais do que o TTL.
+
+        :return: Número de sessões removidas do banco.
+        """
+        now = self._clock()
+        cutoff = now - self.ttl
+        with self._lock, self._conn:
+            removed = self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,)).rowcount
+            for key in [key for key, (_, updated_at) in self._cache.items() if updated_at < cutoff]:
+                del self._cache[key]
+            self._last_purge = now
+        return removed
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    @property
+    def cached(self) -> int:
+        """
+        Número de sessões mantidas em memória.
+        """
+        return len(self._cache)
+
+    def close(self) -> None:
+        """
+        Fecha a conexão com o banco.
+        """
+        with self._lock:
+            self._conn.close()
+
+    def _remember(self, key: str, entry: tuple) -> None:
+        # Chamado com o lock adquirido
+        if self.max_cached <= 0:
+            return
+        self._cache[key] = entry
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+
+    def _forget(self, key: str) -> None:
+        # Chamado com o lock adquirido
+        self._cache.pop(key, None)
+        with self._conn:
+            self._conn.execute("DELETE FROM sessions WHERE sender_id = ?", (key,))
@@ -0,0 +1,164 @@
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Ação de uma transição: recebe a entrada do usuário, a sessão e a mensagem original
+# e retorna um dicionário com 'success' e 'message', como os handlers do bot.
+Action = Callable[[str, Dict[str, Any], Dict[str, Any]], Dict[str, Any]]
+
+
+class Transition(NamedTuple):
+    """
+    Transição compilada de um estado.
+
+    :param action: Ação executada (None para respostas fixas).
+    :param reply: Resposta fixa, usada quando não há ação.
+    :param next_state: Estado após a transição bem-sucedida (None mantém o estado).
+    :param failure_state: Estado quando a ação falha (None mantém o estado).
+    :param reset: Se os dados da sessão são descartados antes da troca de estado.
+    :param branch: Campo da sessão que seleciona a transição em `cases`.
+    :param cases: Transições por valor do campo `branch`.
+    """
+    action: Optional[Action] = None
+    reply: Optional[str] = None
+    next_state: Optional[str] = None
+    failure_state: Optional[str] = None
+    reset: bool = False
+    branch: Optional[str] = None
+    cases: Optional[Dict[str, "Transition"]] = None
+
+
+class StateMachine:
+    """
+    Máquina de estados da conversa, declarada em uma tabela (arquivo flows.json).
+
+    Cada estado lista as opções aceitas e a transição de cada uma: a ação ou a
+    resposta fixa, o próximo estado e o estado em caso de falha. As ações são
+    registradas pelo bot com `register` e a tabela é compilada uma vez em
+    dicionários, de modo que cada mensagem custe duas buscas em dicionário.
+    """
+
+    def __init__(self, flows: Dict[str, Any]):
+        """
+        Inicializa a máquina de estados.
+
+        :param flows: Tabela de estados e transições.
+        """
+        self.flows = flows
+        self.initial_state = flows.get('initial_state', 'new')
+        self._actions: Dict[str, Action] = {}
+        self._table: Dict[str, Tuple[Dict[str, Transition], Optional[Transition]]] = {}
+
+    @classmethod
+    def from_file(cls, file_path: str) -> "StateMachine":
+        """
+        Carrega a tabela de estados a partir de um arquivo JSON.
+
+        :param file_path: Caminho para o arquivo JSON dos fluxos.
+        :return: Máquina de estados (ainda não compilada).
+        """
+        with open(file_path, 'r', encoding='utf-8') as file:
+            return cls(json.load(file))
+
+    @property
+    def states(self) -> List[str]:
+        """
+        Estados declarados na tabela.
+        """
+        return list(self.flows.get('states', {}))
+
+    def register(self, name: str, action: Action) -> None:
+        """
+        Registra uma ação que pode ser referenciada pelas transições.
+
+        :param name: Nome da ação na tabela.
+        :param action: Função executada na transição.
+        """
+        self._actions[name] = action
+
+    def compile(self) -> "StateMachine":
+        """
+        Valida a tabela e gera os mapas de despacho.
+
+        :return: A própria máquina de estados.
+        :raises ValueError: Se uma transição referenciar ação ou estado inexistente.
+        """
+        states = self.flows.get('states', {})
+        if self.initial_state not in states:
+            raise ValueError(f"Estado inicial não declarado: {self.initial_state}")
+        table = {}
+        for state, spec in states.items():
+            options = {}
+            for option in spec.get('options', []):
+                transition = self._compile_transition(state, option)
+                for user_input in option['inputs']:
+                    options[str(user_input)] = transition
+            default = spec.get('default')
+            table[state] = (options, self._compile_transition(state, default) if default else None)
+        self._table = table
+        return self
+
+    def _compile_transition(self, state: str, spec: Dict[str, Any]) -> Transition:
+        states = self.flows['states']
+        if 'cases' in spec:
+            return Transition(
+                branch=spec['branch'],
+                cases={value: self._compile_transition(state, case) for value, case in spec['cases'].items()},
+            )
+        for key in ('next', 'on_failure'):
+            if spec.get(key) is not None and spec[key] not in states:
+                raise ValueError(f"Estado '{state}': transição para estado inexistente '{spec[key]}'")
+        action = None
+        if 'action' in spec:
+            action = self._actions.get(spec['action'])
+            if action is None:
+                raise ValueError(f"Estado '{state}': ação não registrada '{spec['action']}'")
+        elif 'reply' not in spec:
+            raise ValueError(f"Estado '{state}': transição sem ação nem resposta")
+        return Transition(
+            action=action,
+            reply=spec.get('reply'),
+            next_state=spec.get('next'),
+            failure_state=spec.get('on_failure'),
+            reset=spec.get('reset', False),
+        )
+
+    def dispatch(self, session: Dict[str, Any], content: str, message: Dict[str, Any]) -> Optional[str]:
+        """
+        Processa a entrada do usuário no estado atual da sessão e aplica a transição.
+
+        :param session: Sessão do usuário (contém 'state'); atualizada no lugar.
+        :param content: Entrada do usuário.
+        :param message: Mensagem original recebida.
+        :return: Resposta a ser enviada, ou None se o estado não aceitar a entrada.
+        """
+        entry = self._table.get(session.get('state'))
+        if entry is None:
+            # Sessão persistida em um estado removido ou renomeado em flows.json: recomeça a conversa
+            logger.warning("Estado '%s' não existe mais nos fluxos; sessão reiniciada em '%s'",
+                           session.get('state'), self.initial_state)
+            session.clear()
+            session['state'] = self.initial_state
+            entry = self._table[self.initial_state]
+        options, default = entry
+        transition = options.get(content.strip(), default)
+        if transition is not None and transition.cases is not None:
+            transition = transition.cases.get(session.get(transition.branch), default)
+        if transition is None:
+            return None
+
+        if transition.action is not None:
+            result = transition.action(content, session, message)
+            success, response = result['success'], result['message']
+        else:
+            success, response = True, transition.reply
+
+        next_state = transition.next_state if success else transition.failure_state
+        if transition.reset:
+            session.clear()
+            session['state'] = self.initial_state
+        if next_state is not None:
+            session['state'] = next_state
+        return response
@@ -0,0 +1,212 @@
+from collections import defaultdict
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+import math
+import re
+import unicodedata
+
+# Palavras ignoradas na busca e nas siglas
+STOPWORDS = frozenset({"a", "as", "o", "os", "e", "de", "da", "das", "do", "dos"})
+ROMAN_NUMERAL = re.compile(r"^[ivxlcdm]+$")
+NON_ALPHANUMERIC = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """
+    Normaliza um texto para a busca: sem acentos, em minúsculas, apenas letras e
+    números separados por um espaço.
+
+    :param text: Texto original.
+    :return: Texto normalizado.
+    """
+    folded = unicodedata.normalize('NFKD', text)
+    folded = "".join(char for char in folded if not unicodedata.combining(char))
+    return NON_ALPHANUMERIC.sub(" ", folded.lower()).strip()
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Palavras significativas de um texto normalizado.
+
+    :param text: Texto original.
+    :return: Palavras, sem as de STOPWORDS.
+    """
+    return [token for token in normalize(text).split() if token not in STOPWORDS]
+
+
+def acronym(name: str) -> str:
+    """
+    Sigla de uma unidade: iniciais das palavras, com números (arábicos ou romanos)
+    mantidos por inteiro. Ex.: "Hospital João XXIII" -> "hjxxiii".
+
+    :param name: Nome da unidade.
+    :return: Sigla normalizada.
+    """
+    parts = []
+    for token in tokenize(name):
+        keep_whole = token.isdigit() or (len(token) > 1 and ROMAN_NUMERAL.match(token))
+        parts.append(token if keep_whole else token[0])
+    return "".join(parts)
+
+
+def trigrams(token: str) -> frozenset:
+    """
+    Trigramas de uma palavra, com espaços de borda (como no pg_trgm).
+
+    :param token: Palavra normalizada.
+    :return: Conjunto de trigramas.
+    """
+    padded = f"  {token} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class UnitMatch(NamedTuple):
+    """
+    Resultado da busca de uma unidade por texto livre.
+
+    :param unit: Posição da unidade encontrada na lista, ou None se a busca for ambígua ou vazia.
+    :param candidates: Unidades candidatas (posição, pontuação), da mais para a menos provável.
+    """
+    unit: Optional[int]
+    candidates: Tuple[Tuple[int, float], ...]
+
+
+class UnitIndex:
+    """
+    Índice de busca das unidades por nome aproximado, sigla ou apelido.
+
+    Montado uma vez a partir de units.json: nomes normalizados sem acentos, siglas
+    geradas e apelidos do campo opcional "aliases" vão para um mapa de busca exata;
+    as palavras dos nomes e apelidos vão para um índice invertido ponderado por IDF, e um
+    índice de trigramas sobre o vocabulário tolera erros de digitação. Uma busca
+    custa algumas buscas em dicionário por palavra da consulta.
+    """
+
+    def __init__(self, units: Sequence[Mapping[str, Any]], min_score: float = 0.75, min_margin: float = 0.15,
+                 min_candidate_score: float = 0.3, fuzzy_threshold: float = 0.6):
+        """
+        Monta o índice.
+
+        :param units: Unidades, na ordem do menu (com 'name' e, opcionalmente, 'aliases').
+        :param min_score: Pontuação mínima para aceitar a melhor unidade sem confirmação.
+        :param min_margin: Vantagem mínima da melhor unidade sobre a segunda.
+        :param min_candidate_score: Pontuação mínima para sugerir uma unidade como candidata.
+        :param fuzzy_threshold: Similaridade mínima de trigramas entre palavras parecidas.
+        """
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.min_candidate_score = min_candidate_score
+        self.fuzzy_threshold = fuzzy_threshold
+
+        exact: Dict[str, List[int]] = defaultdict(list)
+        postings: Dict[str, List[int]] = defaultdict(list)
+        unit_tokens = []
+        for position, unit in enumerate(units):
+            keys = {normalize(unit['name']), acronym(unit['name'])}
+            keys.update(normalize(alias) for alias in unit.get('aliases', []))
+            for key in keys:
+                exact[key.replace(" ", "")].append(position)
+            tokens = set(tokenize(unit['name']))
+            unit_tokens.append(tokens)
+            # As palavras dos apelidos também são buscáveis, mas o peso da unidade é o do nome
+            for alias in unit.get('aliases', []):
+                tokens = tokens.union(tokenize(alias))
+            for token in tokens:
+                postings[token].append(position)
+
+        total = max(len(units), 1)
+        self.exact = MappingProxyType({key: tuple(positions) for key, positions in exact.items()})
+        self.postings = MappingProxyType({token: tuple(positions) for token, positions in postings.items()})
+        self.idf = MappingProxyType({token: math.log(1 + total / len(positions)) for token, positions in postings.items()})
+        self.unit_weights = tuple(sum(self.idf[token] for token in tokens) or 1.0 for tokens in unit_tokens)
+        self._max_idf = max(self.idf.values(), default=1.0)
+        vocabulary_trigrams = {token: trigrams(token) for token in self.postings}
+        by_trigram: Dict[str, List[str]] = defaultdict(list)
+        for token, grams in vocabulary_trigrams.items():
+            for gram in grams:
+                by_trigram[gram].append(token)
+        self._vocabulary_trigrams = MappingProxyType(vocabulary_trigrams)
+        self._by_trigram = MappingProxyType({gram: tuple(tokens) for gram, tokens in by_trigram.items()})
+
+    def _similar_tokens(self, token: str) -> List[Tuple[str, float]]:
+        """
+        Palavras do vocabulário iguais ou parecidas com a palavra da consulta.
+        """
+        if token in self.postings:
+            return [(token, 1.0)]
+        if len(token) < 3:
+            return []
+        grams = trigrams(token)
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for candidate in self._by_trigram.get(gram, ()):
+                shared[candidate] += 1
+        similar = []
+        for candidate, count in shared.items():
+            similarity = count / (len(grams) + len(self._vocabulary_trigrams[candidate]) - count)
+            if similarity >= self.fuzzy_threshold:
+                similar.append((candidate, similarity))
+        return similar
+
+    def search(self, query: str, limit: int = 5, ignore_unknown: bool = False) -> List[Tuple[int, float]]:
+        """
+        Unidades mais parecidas com o texto, com pontuação entre 0 e 1.
+
+        :param query: Texto digitado pelo usuário.
+        :param limit: Número máximo de unidades.
+        :param ignore_unknown: Se True, palavras que não se parecem com nenhum nome são
+            ignoradas (para buscar a unidade dentro de uma frase).
+        :return: Lista de (posição da unidade, pontuação), da maior para a menor pontuação.
+        """
+        normalized = normalize(query)
+        exact = self.exact.get(normalized.replace(" ", ""))
+        if exact:
+            return [(position, 1.0) for position in exact[:limit]]
+
+        matched: Dict[int, float] = defaultdict(float)
+        query_weight = 0.0
+        for token in normalized.split():
+            if token in STOPWORDS:
+                continue
+            similar = self._similar_tokens(token)
+            if not similar and ignore_unknown:
+                continue
+            # Palavras desconhecidas contam com o peso máximo contra todas as unidades
+            query_weight += max((self.idf[candidate] for candidate, _ in similar), default=self._max_idf)
+            best: Dict[int, float] = {}
+            for candidate, similarity in similar:
+                weight = similarity * self.idf[candidate]
+                for position in self.postings[candidate]:
+                    if weight > best.get(position, 0.0):
+                        best[position] = weight
+            for position, weight in best.items():
+                matched[position] += weight
+        if not query_weight:
+            return []
+
+        # Quanto da consulta a unidade explica e quanto do nome da unidade foi citado
+        scored = [
+            (position, 0.7 * weight / query_weight + 0.3 * min(weight / self.unit_weights[position], 1.0))
+            for position, weight in matched.items()
+        ]
+        scored.sort(key=lambda item: -item[1])
+        return scored[:limit]
+
+    def resolve(self, query: str, ignore_unknown: bool = False) -> UnitMatch:
+        """
+        Resolve o texto digitado em uma unidade, se a melhor correspondência for
+        clara; caso contrário, retorna as candidatas.
+
+        :param query: Texto digitado pelo usuário.
+        :param ignore_unknown: Se True, ignora as palavras que não se parecem com nenhum nome.
+        :return: Unidade encontrada e candidatas.
+        """
+        results = [(position, score) for position, score in self.search(query, ignore_unknown=ignore_unknown)
+                   if score >= self.min_candidate_score]
+        if not results:
+            return UnitMatch(None, ())
+        best_position, best_score = results[0]
+        runner_up = results[1][1] if len(results) > 1 else 0.0
+        if best_score >= self.min_score and best_score - runner_up >= self.min_margin:
+            return UnitMatch(best_position, tuple(results))
+        return UnitMatch(None, tuple(results))
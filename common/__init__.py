@@ -0,0 +1,3 @@
+"""
+Componentes compartilhados pelos chatbots do Zulip (bot_planejamento e chat-informacoes).
+"""
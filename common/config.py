@@ -0,0 +1,60 @@
+"""
+Leitura das configurações numéricas dos bots a partir das variáveis de ambiente.
+
+Um valor inválido interrompe a inicialização com uma mensagem que nomeia a
+variável, em vez de um ValueError do int()/float() sem contexto ou de um valor
+que só falharia mais tarde (ex.: zero workers em um pool de threads).
+"""
+
+import math
+import os
+from typing import Callable, Optional, TypeVar
+
+Number = TypeVar("Number", int, float)
+
+
+def _env_number(name: str, default: Number, convert: Callable[[str], Number], description: str,
+                minimum: Optional[Number], maximum: Optional[Number]) -> Number:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        value = convert(raw)
+    except ValueError:
+        raise ValueError(f"{name} deve ser um {description}: {raw!r}") from None
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ValueError(f"{name} deve ser um {description}: {raw!r}")
+    if minimum is not None and value < minimum:
+        raise ValueError(f"{name} deve ser maior ou igual a {minimum}: {raw!r}")
+    if maximum is not None and value > maximum:
+        raise ValueError(f"{name} deve ser menor ou igual a {maximum}: {raw!r}")
+    return value
+
+
+def env_int(name: str, default: int, minimum: Optional[int] = None, maximum: Optional[int] = None) -> int:
+    """
+    Lê uma variável de ambiente inteira.
+
+    :param name: Nome da variável.
+    :param default: Valor usado se a variável estiver ausente ou vazia.
+    :param minimum: Menor valor aceito (sem limite, se None).
+    :param maximum: Maior valor aceito (sem limite, se None).
+    :return: Valor da variável.
+    :raises ValueError: Se o valor não for um inteiro ou estiver fora dos limites.
+    """
+    return _env_number(name, default, int, "número inteiro", minimum, maximum)
+
+
+def env_float(name: str, default: float, minimum: Optional[float] = None,
+              maximum: Optional[float] = None) -> float:
+    """
+    Lê uma variável de ambiente numérica (ex.: tempo em segundos).
+
+    :param name: Nome da variável.
+    :param default: Valor usado se a variável estiver ausente ou vazia.
+    :param minimum: Menor valor aceito (sem limite, se None).
+    :param maximum: Maior valor aceito (sem limite, se None).
+    :return: Valor da variável.
+    :raises ValueError: Se o valor não for um número finito ou estiver fora dos limites.
+    """
+    return _env_number(name, default, float, "número", minimum, maximum)
@@ -0,0 +1,118 @@
+"""
+Despacho concorrente de mensagens recebidas do Zulip.
+
+O laço de eventos do Zulip (call_on_each_event) processa um evento por vez: se
+um usuário espera alguns segundos pelo LLM, todos os outros esperam atrás dele.
+O MessageDispatcher recebe os eventos no laço e os distribui para um pool de
+workers, preservando a ordem das mensagens de cada remetente. Quando todos os
+workers estão ocupados e a fila atinge o limite, o envio bloqueia o laço de
+eventos (backpressure) até que haja espaço.
+"""
+
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+def sender_key(event: Dict[str, Any]) -> Hashable:
+    """
+    Chave de ordenação padrão: o remetente da mensagem.
+
+    :param event: Evento do Zulip (com a mensagem em event['message']) ou a própria mensagem.
+    :return: ID do remetente.
+    """
+    message = event.get('message', event)
+    return message['sender_id']
+
+
+class MessageDispatcher:
+    """
+    Distribui mensagens para um pool de workers, uma de cada vez por remetente.
+    """
+
+    def __init__(self, handler: Callable[[Dict[str, Any]], None], max_workers: int = 8,
+                 max_pending: int = 100, key: Callable[[Dict[str, Any]], Hashable] = sender_key):
+        """
+        Inicializa o dispatcher.
+
+        :param handler: Função que processa uma mensagem (executada nos workers).
+        :param max_workers: Número de mensagens processadas simultaneamente.
+        :param max_pending: Mensagens aceitas e ainda não concluídas antes de bloquear o envio.
+        :param key: Função que extrai a chave de ordenação (remetente) da mensagem.
+        """
+        self.handler = handler
+        self.key = key
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dispatcher")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        # Sinalizada quando não resta nenhuma mensagem pendente
+        self._idle = threading.Condition(self._lock)
+        # Fila de mensagens de cada remetente com mensagens pendentes
+        self._queues: Dict[Hashable, deque] = {}
+
+    def submit(self, event: Dict[str, Any]) -> None:
+        """
+        Enfileira uma mensagem. Bloqueia enquanto houver `max_pending` mensagens pendentes.
+
+        :param event: Mensagem ou evento a ser processado.
+        """
+        # A chave é extraída antes de ocupar a vaga: uma mensagem malformada (ex.: sem
+        # sender_id) levanta o erro sem consumir uma vaga que nunca seria liberada
+        key = self.key(event)
+        self._slots.acquire()
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue is not None:
+                # Já existe um worker responsável por este remetente
+                queue.append(event)
+                return
+            self._queues[key] = deque([event])
+        self._executor.submit(self._drain, key)
+
+    def _drain(self, key: Hashable) -> None:
+        """
+        Processa a próxima mensagem do remetente e, se houver outras, reagenda-se no
+        final da fila do pool, para que remetentes com muitas mensagens não monopolizem
+        um worker.
+        """
+        with self._lock:
+            event = self._queues[key][0]
+        try:
+            self.handler(event)
+        except Exception:
+            logger.exception("Erro ao processar mensagem do remetente %s", key)
+        finally:
+            self._slots.release()
+
+        with self._lock:
+            queue = self._queues[key]
+            queue.popleft()
+            if not queue:
+                del self._queues[key]
+                if not self._queues:
+                    self._idle.notify_all()
+                return
+        self._executor.submit(self._drain, key)
+
+    def pending(self) -> int:
+        """
+        :return: Número de mensagens aguardando ou em processamento.
+        """
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Encerra o pool de workers.
+
+        :param wait: Se True, aguarda a conclusão das mensagens pendentes.
+        """
+        if wait:
+            # Reagendamentos acontecem dentro dos workers: espera as filas esvaziarem
+            with self._idle:
+                self._idle.wait_for(lambda: not self._queues)
+        self._executor.shutdown(wait=wait)
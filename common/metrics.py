@@ -0,0 +1,328 @@
+"""
+Instrumentação leve dos bots: contadores, medidores e histogramas de latência,
+exportados no formato texto do Prometheus por um endpoint HTTP local.
+
+O custo no caminho das mensagens é de uma busca em dicionário e uma operação
+sob lock por observação; a formatação do texto só acontece quando o endpoint
+é consultado. O endpoint é iniciado apenas quando METRICS_PORT é configurada.
+"""
+
+import abc
+import bisect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Limites (em segundos) adequados desde operações locais até chamadas ao LLM
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(abc.ABC):
+    """
+    Base das métricas: nome, descrição e séries por combinação de rótulos.
+    """
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """
+        Cria a série de uma nova combinação de rótulos.
+        """
+
+    def labels(self, *values: str):
+        """
+        Obtém a série correspondente aos valores dos rótulos.
+
+        :param values: Valores dos rótulos, na ordem de `labelnames`.
+        :return: Série da métrica.
+        """
+        key = tuple(map(str, values))
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name}: esperados os rótulos {self.labelnames}, recebidos {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abc.abstractmethod
+    def _samples(self) -> Iterable[str]:
+        """
+        Linhas das séries no formato texto do Prometheus.
+        """
+
+    def render(self) -> str:
+        """
+        Formata a métrica no formato texto do Prometheus.
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """
+    Contador monotônico (ex.: mensagens processadas, transições de estado).
+    """
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """
+        Incrementa o contador sem rótulos.
+        """
+        self.labels().inc(amount)
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+
+class _GaugeChild:
+    __slots__ = ("value", "function")
+
+    def __init__(self):
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self.function = function
+
+    def get(self) -> float:
+        return self.function() if self.function is not None else self.value
+
+
+class Gauge(_Metric):
+    """
+    Medidor de um valor instantâneo, atribuído ou calculado no momento da coleta
+    (ex.: mensagens na fila do dispatcher).
+    """
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        """
+        Atribui o valor do medidor sem rótulos.
+        """
+        self.labels().set(value)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """
+        Define a função que calcula o valor do medidor sem rótulos na coleta.
+        """
+        self.labels().set_function(function)
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.get())}"
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    """
+    Histograma de latências, em segundos, com limites fixos.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """
+        Registra uma observação no histograma sem rótulos.
+        """
+        self.labels().observe(value)
+
+    def time(self, *values: str):
+        """
+        Context manager que mede a duração do bloco na série dos rótulos informados.
+
+        :param values: Valores dos rótulos.
+        """
+        return self.labels(*values).time()
+
+    def _samples(self):
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}"
+
+
+class Registry:
+    """
+    Conjunto das métricas exportadas por um processo.
+    """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """
+        Adiciona uma métrica ao registro.
+
+        :param metric: Métrica a registrar.
+        :return: A própria métrica.
+        """
+        with self._lock:
+            if any(existing.name == metric.name for existing in self._metrics):
+                raise ValueError(f"Métrica já registrada: {metric.name}")
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """
+        Cria e registra um contador.
+        """
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """
+        Cria e registra um medidor.
+        """
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """
+        Cria e registra um histograma.
+        """
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """
+        Formata todas as métricas no formato texto do Prometheus.
+        """
+        with self._lock:
+            metrics = list(self._metrics)
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def start_metrics_server(port: int, registry: Registry = REGISTRY, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Inicia, em uma thread, o endpoint HTTP que exporta as métricas em /metrics.
+
+    :param port: Porta de escuta.
+    :param registry: Registro das métricas exportadas.
+    :param host: Endereço de escuta (local por padrão).
+    :return: Servidor HTTP iniciado.
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info("Métricas disponíveis em http://%s:%s/metrics", host, server.server_address[1])
+    return server
+
+
+def start_metrics_server_from_env(registry: Registry = REGISTRY) -> Optional[ThreadingHTTPServer]:
+    """
+    Inicia o endpoint de métricas se a variável METRICS_PORT estiver configurada.
+
+    :param registry: Registro das métricas exportadas.
+    :return: Servidor HTTP iniciado, ou None se as métricas estiverem desativadas.
+    """
+    port = os.getenv("METRICS_PORT")
+    if not port:
+        return None
+    return start_metrics_server(int(port), registry, os.getenv("METRICS_HOST", "127.0.0.1"))
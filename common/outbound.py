@@ -0,0 +1,288 @@
+"""
+Envio assíncrono das respostas dos bots ao Zulip.
+
+Enviar a resposta dentro do processamento da mensagem (client.send_message) faz
+com que um Zulip lento ou com limite de requisições atrase todas as outras
+mensagens. O OutboundSender apenas enfileira a mensagem e retorna; um pool de
+threads a envia por conexões HTTP persistentes (keep-alive), uma de cada vez
+por conversa, para manter a ordem. Mensagens acumuladas para a mesma conversa
+enquanto a anterior é enviada são unidas em uma só (menos requisições). As
+respostas 429 do Zulip suspendem todos os envios pelo tempo indicado em
+Retry-After; erros do servidor e de rede são repetidos com espera exponencial.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+outbound_messages_total = REGISTRY.counter(
+    "zulip_outbound_messages_total", "Mensagens de saída, por resultado", ["result"])
+outbound_retries_total = REGISTRY.counter(
+    "zulip_outbound_retries_total", "Novas tentativas de envio ao Zulip, por motivo", ["reason"])
+outbound_send_seconds = REGISTRY.histogram(
+    "zulip_outbound_send_seconds", "Duração de cada requisição de envio ao Zulip, em segundos")
+outbound_pending = REGISTRY.gauge(
+    "zulip_outbound_pending", "Mensagens aguardando envio ou em envio ao Zulip")
+
+
+def conversation_key(request: Dict[str, Any]) -> Hashable:
+    """
+    Chave de ordenação padrão: a conversa de destino (tipo, destinatários e tópico).
+
+    :param request: Mensagem no formato de client.send_message.
+    :return: Chave da conversa.
+    """
+    to = request.get('to')
+    if isinstance(to, (list, tuple)):
+        to = tuple(sorted(str(recipient) for recipient in to))
+    return request.get('type'), to, request.get('topic', request.get('subject'))
+
+
+class OutboundSender:
+    """
+    Fila de mensagens de saída, enviadas em segundo plano, em ordem por conversa.
+    Tem o mesmo método send_message do cliente Zulip, mas não retorna o ID da
+    mensagem (use o cliente diretamente quando o ID for necessário, como nas
+    respostas em fluxo, que editam a mensagem enviada).
+    """
+
+    def __init__(self, client: Any, workers: int = 4, max_pending: int = 10000, max_attempts: int = 8,
+                 backoff: float = 0.5, max_backoff: float = 30.0, coalesce: bool = True,
+                 max_content_length: int = 10000, timeout: float = 15.0,
+                 key: Callable[[Dict[str, Any]], Hashable] = conversation_key):
+        """
+        Inicializa o envio assíncrono.
+
+        :param client: Cliente Zulip (zulip.Client) do qual são usados o servidor e as credenciais.
+        :param workers: Envios simultâneos (e conexões HTTP mantidas abertas).
+        :param max_pending: Mensagens aguardando envio antes de bloquear o send_message.
+        :param max_attempts: Tentativas de envio de cada mensagem antes de descartá-la.
+        :param backoff: Espera, em segundos, antes da primeira nova tentativa (dobra a cada tentativa).
+        :param max_backoff: Espera máxima, em segundos, entre tentativas.
+        :param coalesce: Se True, une as mensagens acumuladas para a mesma conversa.
+        :param max_content_length: Tamanho máximo do conteúdo de uma mensagem unida.
+        :param timeout: Tempo máximo, em segundos, de cada requisição.
+        :param key: Função que extrai a conversa (chave de ordenação) da mensagem.
+        """
+        self.url = f"{client.base_url}v1/messages"
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.coalesce = coalesce
+        self.max_content_length = max_content_length
+        self.timeout = timeout
+        self.key = key
+        # Sessão própria, com as credenciais do cliente e um pool de conexões por worker
+        client.ensure_session()
+        self.session = requests.Session()
+        self.session.auth = client.session.auth
+        self.session.verify = client.session.verify
+        self.session.cert = client.session.cert
+        self.session.headers.update(client.session.headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="outbound")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._stopping = threading.Event()
+        # Instante (time.monotonic) até o qual o Zulip pediu que os envios aguardem
+        self._paused_until = 0.0
+        # Fila de mensagens de cada conversa com mensagens pendentes
+        self._queues: Dict[Hashable, deque] = {}
+        outbound_pending.set_function(self.pending)
+
+    def send_message(self, request: Dict[str, Any]) -> None:
+        """
+        Enfileira uma mensagem para envio. Bloqueia apenas se houver `max_pending`
+        mensagens aguardando envio.
+
+        :param request: Mensagem no formato de client.send_message (type, to, content, ...).
+        """
+        if self._stopping.is_set():
+            raise RuntimeError("O envio de mensagens foi encerrado")
+        # A chave é extraída antes de ocupar a vaga, que não seria liberada se key() falhasse
+        key = self.key(request)
+        self._slots.acquire()
+        outbound_messages_total.labels("queued").inc()
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue is not None:
+                # Já existe um envio em andamento para esta conversa
+                queue.append(request)
+                return
+            self._queues[key] = deque([request])
+        self._executor.submit(self._drain, key)
+
+    def _drain(self, key: Hashable) -> None:
+        """
+        Envia a próxima mensagem da conversa (unida às seguintes, se possível) e, se
+        houver outras, reagenda-se no final da fila do pool.
+        """
+        with self._lock:
+            batch = self._next_batch(self._queues[key])
+        try:
+            self._deliver(self._merge(batch))
+        except Exception:
+            logger.exception("Erro ao enviar mensagem para a conversa %s", key)
+        finally:
+            for _ in batch:
+                self._slots.release()
+
+        with self._lock:
+            queue = self._queues[key]
+            for _ in batch:
+                queue.popleft()
+            if not queue:
+                del self._queues[key]
+                self._idle.notify_all()
+                return
+        self._executor.submit(self._drain, key)
+
+    def _next_batch(self, queue: deque) -> List[Dict[str, Any]]:
+        # Chamado com o lock adquirido: mensagens do início da fila que podem ser unidas
+        batch = [queue[0]]
+        if not self.coalesce:
+            return batch
+        first = {field: value for field, value in queue[0].items() if field != 'content'}
+        length = len(queue[0].get('content', ''))
+        for request in list(queue)[1:]:
+            length += len(request.get('content', '')) + 2
+            if length > self.max_content_length:
+                break
+            if {field: value for field, value in request.items() if field != 'content'} != first:
+                break
+            batch.append(request)
+        return batch
+
+    @staticmethod
+    def _merge(batch: List[Dict[str, Any]]) -> Dict[str, Any]:
+        if len(batch) == 1:
+            return batch[0]
+        outbound_messages_total.labels("coalesced").inc(len(batch) - 1)
+        return {**batch[0], 'content': "\n\n".join(request.get('content', '') for request in batch)}
+
+    def _deliver(self, request: Dict[str, Any]) -> bool:
+        """
+        Envia uma mensagem, repetindo em caso de limite de requisições, erro do
+        servidor ou de rede.
+
+        :return: True se o Zulip aceitou a mensagem.
+        """
+        # Mesma codificação do cliente Zulip: valores que não são texto vão em JSON
+        data = {field: value if isinstance(value, str) else json.dumps(value) for field, value in request.items()}
+        for attempt in range(1, self.max_attempts + 1):
+            if not self._wait_rate_limit():
+                break
+            started = time.perf_counter()
+            try:
+                response = self.session.post(self.url, data=data, timeout=self.timeout)
+            except requests.RequestException as e:
+                reason, delay, error = "network", self._backoff_delay(attempt), str(e)
+            else:
+                outbound_send_seconds.observe(time.perf_counter() - started)
+                if response.status_code == 429:
+                    reason, delay, error = "rate_limit", self._retry_after(response, attempt), "429"
+                    # O limite do Zulip vale para o bot inteiro: todos os envios aguardam
+                    with self._lock:
+                        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                    delay = 0.0
+                elif response.status_code >= 500:
+                    reason, delay, error = "server_error", self._backoff_delay(attempt), str(response.status_code)
+                else:
+                    result = self._json(response)
+                    if response.ok and result.get('result') == 'success':
+                        outbound_messages_total.labels("sent").inc()
+                        return True
+                    # Erros de requisição (destinatário inválido, etc.) não melhoram com novas tentativas
+                    outbound_messages_total.labels("failed").inc()
+                    logger.error("Mensagem para %s recusada pelo Zulip (%s): %s",
+                                 request.get('to'), response.status_code, result.get('msg'))
+                    return False
+            if attempt == self.max_attempts:
+                break
+            outbound_retries_total.labels(reason).inc()
+            # Respostas 429 são esperadas em rajadas; as demais falhas merecem atenção
+            logger.log(logging.INFO if reason == "rate_limit" else logging.WARNING,
+                       "Falha no envio para %s (%s); nova tentativa %d de %d",
+                       request.get('to'), error, attempt + 1, self.max_attempts)
+            if self._stopping.wait(delay):
+                break
+        outbound_messages_total.labels("failed").inc()
+        logger.error("Mensagem para %s descartada após %d tentativas", request.get('to'), self.max_attempts)
+        return False
+
+    def _wait_rate_limit(self) -> bool:
+        # Aguarda o fim da suspensão pedida pelo Zulip; False se o envio foi encerrado
+        while True:
+            with self._lock:
+                remaining = self._paused_until - time.monotonic()
+            if remaining <= 0:
+                return True
+            if self._stopping.wait(remaining):
+                return False
+
+    def _backoff_delay(self, attempt: int) -> float:
+        # Espera exponencial com variação aleatória, para não sincronizar as novas tentativas
+        return min(self.max_backoff, self.backoff * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+    def _retry_after(self, response: requests.Response, attempt: int) -> float:
+        # Zulip informa a espera no cabeçalho Retry-After e no campo "retry-after" do corpo
+        for value in (response.headers.get("Retry-After"), self._json(response).get("retry-after")):
+            try:
+                return min(max(float(value), 0.0), self.max_backoff)
+            except (TypeError, ValueError):
+                continue
+        return self._backoff_delay(attempt)
+
+    @staticmethod
+    def _json(response: requests.Response) -> Dict[str, Any]:
+        try:
+            result = response.json()
+        except ValueError:
+            return {}
+        return result if isinstance(result, dict) else {}
+
+    def pending(self) -> int:
+        """
+        :return: Número de mensagens aguardando envio ou em envio.
+        """
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Aguarda o envio de todas as mensagens enfileiradas.
+
+        :param timeout: Espera máxima, em segundos (None espera indefinidamente).
+        :return: True se não há mais mensagens pendentes.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._queues, timeout)
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None) -> None:
+        """
+        Encerra o envio.
+
+        :param wait: Se True, envia as mensagens pendentes antes de encerrar.
+        :param timeout: Espera máxima, em segundos, pelas mensagens pendentes.
+        """
+        if wait:
+            self.flush(timeout)
+        # Interrompe as esperas por novas tentativas; mensagens ainda pendentes são descartadas
+        self._stopping.set()
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+        self.session.close()
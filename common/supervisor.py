@@ -0,0 +1,323 @@
+"""
+Distribuição das mensagens entre vários processos do bot.
+
+Um único processo lê os eventos do Zulip (um só long polling) e entrega cada
+mensagem a um de N processos worker, escolhido por hashing consistente do
+remetente: todas as mensagens de um usuário vão para o mesmo worker, que mantém
+em memória o estado e o histórico desse usuário. Dentro de cada worker, um
+MessageDispatcher responde às mensagens em paralelo, na ordem de cada remetente.
+
+O supervisor reinicia os workers que terminam inesperadamente, com espera
+exponencial entre reinícios seguidos; um worker que não se mantém em execução
+(ex.: falha ao carregar o bot) acaba por encerrar o supervisor. O worker
+reiniciado recarrega o estado dos seus remetentes do armazenamento persistente
+(SQLite).
+"""
+
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from common.dispatcher import MessageDispatcher, sender_key
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(value: str) -> int:
+    # hash() do Python varia entre processos; o anel precisa ser o mesmo em todos
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """
+    Anel de hashing consistente: associa cada chave a um nó, de modo que incluir ou
+    remover um nó mude apenas as chaves desse nó.
+    """
+
+    def __init__(self, nodes: List[Hashable], replicas: int = 128):
+        """
+        Monta o anel.
+
+        :param nodes: Nós do anel.
+        :param replicas: Pontos de cada nó no anel (mais pontos, distribuição mais uniforme).
+        """
+        self.nodes = list(nodes)
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(replicas))
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node_for(self, key: Hashable) -> Hashable:
+        """
+        Nó responsável pela chave.
+
+        :param key: Chave (ex.: ID do remetente); 5 e "5" são a mesma chave.
+        :return: Nó do anel.
+        """
+        index = bisect.bisect(self._hashes, _hash(str(key)))
+        return self._owners[index % len(self._owners)]
+
+
+def _worker_main(shard: int, worker_factory: Callable[[], Any], inbox, pending, changed, ready,
+                 max_threads: int, metrics_port: Optional[int]) -> None:
+    """
+    Laço de um processo worker: cria o bot e processa as mensagens recebidas do supervisor.
+    """
+    worker = worker_factory()
+    if metrics_port:
+        # Cada worker exporta as próprias métricas na porta seguinte à do supervisor
+        from common.metrics import start_metrics_server
+        try:
+            start_metrics_server(metrics_port + 1 + shard, host=os.getenv("METRICS_HOST", "127.0.0.1"))
+        except OSError as e:
+            logger.warning("Métricas do worker %d indisponíveis: %s", shard, e)
+    ready.set()
+
+    def handle(event):
+        try:
+            worker.handle_message(event)
+        finally:
+            # Acorda o supervisor, que pode estar aguardando vaga neste worker
+            with changed:
+                with pending.get_lock():
+                    pending.value -= 1
+                changed.notify_all()
+
+    # O worker retira da fila apenas as mensagens que pode processar de imediato: as
+    # demais ficam na fila do supervisor e passam ao novo processo se este terminar
+    dispatcher = MessageDispatcher(handle, max_workers=max_threads, max_pending=max_threads)
+    try:
+        while True:
+            item = inbox.get()
+            if item is None:
+                break
+            kind, payload = item
+            if kind == "message":
+                dispatcher.submit(payload)
+    finally:
+        dispatcher.shutdown()
+
+
+class Supervisor:
+    """
+    Distribui mensagens entre processos worker por hashing consistente do remetente.
+    Tem a mesma interface do MessageDispatcher (submit, pending, shutdown).
+
+    O worker é criado em cada processo por `worker_factory`, uma função de nível de
+    módulo (para poder ser enviada ao processo), e deve ter o método
+    `handle_message(mensagem)`.
+    """
+
+    def __init__(self, worker_factory: Callable[[], Any], workers: int = 2, threads_per_worker: int = 8,
+                 max_pending: int = 100, key: Callable[[Dict[str, Any]], Hashable] = sender_key,
+                 replicas: int = 128, check_interval: float = 1.0, startup_timeout: float = 300.0,
+                 restart_backoff: float = 1.0, max_restart_backoff: float = 60.0, max_restarts: int = 5,
+                 stable_after: float = 300.0):
+        """
+        Inicia os processos worker.
+
+        :param worker_factory: Função que cria o worker em cada processo.
+        :param workers: Número de processos worker.
+        :param threads_per_worker: Mensagens processadas simultaneamente em cada worker.
+        :param max_pending: Mensagens pendentes por worker antes de bloquear o envio (backpressure).
+        :param key: Função que extrai o remetente da mensagem.
+        :param replicas: Pontos de cada worker no anel de hashing.
+        :param check_interval: Intervalo, em segundos, da verificação dos workers durante a
+            inicialização.
+        :param startup_timeout: Espera máxima, em segundos, pela inicialização dos workers.
+        :param restart_backoff: Espera, em segundos, antes do primeiro reinício de um worker
+            (dobra a cada reinício seguido).
+        :param max_restart_backoff: Espera máxima, em segundos, antes de um reinício.
+        :param max_restarts: Reinícios seguidos de um worker antes de encerrar o supervisor.
+        :param stable_after: Tempo, em segundos, em execução após o qual um worker deixa de
+            contar como reiniciado em sequência.
+        """
+        self.worker_factory = worker_factory
+        self.threads_per_worker = threads_per_worker
+        self.max_pending = max_pending
+        self.key = key
+        self.restart_backoff = restart_backoff
+        self.max_restart_backoff = max_restart_backoff
+        self.max_restarts = max_restarts
+        self.stable_after = stable_after
+        self.restarts = 0
+        # Erro que encerrou o supervisor (worker reiniciado em sequência além do limite)
+        self.failure: Optional[RuntimeError] = None
+        # spawn: mesmo comportamento no Windows e no Linux, sem herdar threads e conexões
+        self._context = multiprocessing.get_context("spawn")
+        metrics_port = os.getenv("METRICS_PORT")
+        self._metrics_port = int(metrics_port) if metrics_port else None
+        self._lock = threading.RLock()
+        self._processes: Dict[int, Any] = {}
+        self._inboxes: Dict[int, Any] = {}
+        self._pending: Dict[int, Any] = {}
+        self._changed: Dict[int, Any] = {}
+        self._ready: Dict[int, Any] = {}
+        self._started_at: Dict[int, float] = {}
+        # Reinícios seguidos de cada worker e instante do próximo reinício dos encerrados
+        self._crashes: Dict[int, int] = {}
+        self._restart_at: Dict[int, float] = {}
+        self._stopping = threading.Event()
+        self._ring = HashRing(range(workers), replicas)
+        for shard in range(workers):
+            self._start(shard)
+        # Os workers carregam o bot (modelos, índices) em paralelo; as mensagens só são
+        # aceitas depois que todos estiverem prontos
+        deadline = time.monotonic() + startup_timeout
+        for shard, ready in self._ready.items():
+            while not ready.wait(min(max(deadline - time.monotonic(), 0), check_interval)):
+                process = self._processes[shard]
+                if not process.is_alive():
+                    self.shutdown(wait=False)
+                    raise RuntimeError(f"O worker {shard} terminou durante a inicialização (código {process.exitcode})")
+                if time.monotonic() >= deadline:
+                    self.shutdown(wait=False)
+                    raise RuntimeError(f"O worker {shard} não iniciou em {startup_timeout:.0f}s")
+        self._monitor = threading.Thread(target=self._watch, name="supervisor", daemon=True)
+        self._monitor.start()
+
+    def _start(self, shard: int, backlog: Optional[List[Any]] = None) -> None:
+        # Chamado com o lock adquirido (ou na inicialização)
+        backlog = backlog or []
+        inbox = self._context.Queue()
+        pending = self._context.Value('i', sum(1 for kind, _ in backlog if kind == "message"))
+        # Sinalizada pelo worker a cada mensagem concluída
+        changed = self._context.Condition()
+        ready = self._context.Event()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(shard, self.worker_factory, inbox, pending, changed, ready,
+                  self.threads_per_worker, self._metrics_port),
+            name=f"bot-worker-{shard}",
+            daemon=True,
+        )
+        process.start()
+        for item in backlog:
+            inbox.put(item)
+        self._processes[shard], self._inboxes[shard], self._pending[shard] = process, inbox, pending
+        self._changed[shard], self._ready[shard] = changed, ready
+        self._started_at[shard] = time.monotonic()
+
+    def submit(self, event: Dict[str, Any]) -> None:
+        """
+        Envia a mensagem ao worker do remetente. Bloqueia enquanto esse worker tiver
+        `max_pending` mensagens pendentes.
+
+        :param event: Mensagem ou evento a ser processado.
+        :raises RuntimeError: Se o supervisor foi encerrado por falhas seguidas de um worker.
+        """
+        key = self.key(event)
+        while True:
+            with self._lock:
+                if self.failure is not None:
+                    raise self.failure
+                shard = self._ring.node_for(key)
+                pending, changed = self._pending[shard], self._changed[shard]
+                if pending.value < self.max_pending:
+                    with pending.get_lock():
+                        pending.value += 1
+                    self._inboxes[shard].put(("message", event))
+                    return
+            # Aguarda uma mensagem concluída no worker; o limite de espera cobre o
+            # reinício do worker enquanto aguarda
+            with changed:
+                changed.wait_for(lambda: pending.value < self.max_pending, timeout=1.0)
+
+    def pending(self) -> int:
+        """
+        :return: Número de mensagens aguardando ou em processamento em todos os workers.
+        """
+        with self._lock:
+            return sum(pending.value for pending in self._pending.values())
+
+    def _stop(self, shard: int) -> None:
+        # Chamado com o lock adquirido
+        self._inboxes[shard].put(None)
+        self._processes[shard].join()
+        del self._processes[shard], self._inboxes[shard], self._pending[shard], self._ready[shard]
+        del self._changed[shard], self._started_at[shard]
+        self._crashes.pop(shard, None)
+        self._restart_at.pop(shard, None)
+
+    def _watch(self) -> None:
+        # Aguarda o término de um worker (sentinela do processo) ou o próximo reinício agendado
+        while not self._stopping.is_set():
+            with self._lock:
+                sentinels = [process.sentinel for shard, process in self._processes.items()
+                             if shard not in self._restart_at]
+                restart_at = min(self._restart_at.values(), default=None)
+            timeout = None if restart_at is None else max(restart_at - time.monotonic(), 0)
+            multiprocessing.connection.wait(sentinels, timeout)
+            with self._lock:
+                if self._stopping.is_set():
+                    return
+                now = time.monotonic()
+                for shard, process in list(self._processes.items()):
+                    if process.is_alive():
+                        continue
+                    if shard not in self._restart_at:
+                        self._schedule_restart(shard, now)
+                    elif now >= self._restart_at[shard]:
+                        del self._restart_at[shard]
+                        self._restart(shard)
+
+    def _schedule_restart(self, shard: int, now: float) -> None:
+        # Chamado com o lock adquirido: espera exponencial entre reinícios seguidos; um
+        # worker que ficou em execução por `stable_after` segundos recomeça a contagem
+        if now - self._started_at[shard] >= self.stable_after:
+            self._crashes[shard] = 0
+        crashes = self._crashes[shard] = self._crashes.get(shard, 0) + 1
+        exitcode = self._processes[shard].exitcode
+        if crashes > self.max_restarts:
+            self._fail(RuntimeError(
+                f"O worker {shard} terminou {crashes} vezes seguidas (código {exitcode}); supervisor encerrado"))
+            return
+        delay = min(self.max_restart_backoff, self.restart_backoff * 2 ** (crashes - 1))
+        self._restart_at[shard] = now + delay
+        logger.error("Worker %d encerrado (código %s); reinício %d de %d em %.1fs",
+                     shard, exitcode, crashes, self.max_restarts, delay)
+
+    def _fail(self, error: RuntimeError) -> None:
+        # Chamado com o lock adquirido: os próximos submit levantam o erro
+        logger.critical("%s", error)
+        self.failure = error
+        self._stopping.set()
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+
+    def _restart(self, shard: int) -> None:
+        # Chamado com o lock adquirido: as mensagens ainda na fila do worker encerrado
+        # passam ao novo processo; as que estavam em processamento são perdidas
+        inbox, pending = self._inboxes[shard], self._pending[shard]
+        backlog = []
+        while True:
+            try:
+                backlog.append(inbox.get_nowait())
+            except queue.Empty:
+                break
+        backlog = [item for item in backlog if item is not None]
+        lost = pending.value - sum(1 for kind, _ in backlog if kind == "message")
+        logger.error("Reiniciando o worker %d. Mensagens perdidas: %d", shard, max(lost, 0))
+        self.restarts += 1
+        self._start(shard, backlog)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Encerra os workers.
+
+        :param wait: Se True, aguarda a conclusão das mensagens pendentes.
+        """
+        self._stopping.set()
+        with self._lock:
+            for shard in list(self._processes):
+                if wait:
+                    self._stop(shard)
+                else:
+                    self._processes[shard].terminate()
@@ -1,37 +1,16 @@
 # Caderno para construção e teste do BOT
 
 # Loading
-from langchain_community.document_loaders import PyMuPDFLoader
-from langchain_community.document_loaders import UnstructuredPDFLoader
+from bot_planejamento.src.document_pipeline import iter_pdf_chunks
 
 path = "data/base_conhecimento.pdf"
 
-# Loaders structured and unstructured
-loader_structured = PyMuPDFLoader(path)
-
-pages_str = loader_structured.load()
-
-# Cleaning
-from langchain.text_splitter import CharacterTextSplitter
-
-# Criando text splitter
-text_splitter = CharacterTextSplitter(
-    separator="\n",
-    chunk_size=1000,
-    chunk_overlap=0
-)
-
-# Split
-texts = text_splitter.split_documents(pages_str)
-
-# Função para remover espaço em branco
-def remove_ws(d):
-    text = d.page_content.replace("\n", " ")
-    d.page_content = text
-    return d
-
-# Clean texts by removing whitespace from each document
-texts_cleaned = [remove_ws(d) for d in texts]
+# Carrega, divide e limpa o PDF em fluxo (chamada apenas quando o índice precisa ser
+# atualizado). As páginas são processadas neste processo: o pool de processos
+# (process_pool) reimporta o script principal, e este script não é protegido por
+# if __name__ == "__main__"
+def load_documents():
+    return iter_pdf_chunks(path, chunk_size=1000, chunk_overlap=0, newline_replacement=" ")
 
 # OpenAI API
 import os
@@ -45,13 +24,26 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 # Retriever setup
 from langchain.embeddings.openai import OpenAIEmbeddings
-from langchain.vectorstores import FAISS
-
-# Usando embeddings OpenAI para criar o retriever
-embeddings = OpenAIEmbeddings(api_key=OPENAI_API_KEY)
+from bot_planejamento.src.index_store import IndexStore
+from bot_planejamento.src.embedding_cache import CachedEmbeddings
+
+# Usando embeddings OpenAI para criar o retriever (com o cache de embeddings compartilhado)
+EMBEDDING_MODEL = "text-embedding-ada-002"
+embeddings = CachedEmbeddings(
+    OpenAIEmbeddings(model=EMBEDDING_MODEL, api_key=OPENAI_API_KEY),
+    model_name=EMBEDDING_MODEL,
+)
 
-# Cria o document retriever usando FAISS
-db = FAISS.from_documents(texts_cleaned, embeddings)
+# Cria (ou atualiza incrementalmente) o índice FAISS salvo em disco:
+# apenas chunks novos ou alterados do PDF são vetorizados
+index_store = IndexStore(
+    "data/faiss_index_tasy",
+    embeddings,
+    embedding_model=EMBEDDING_MODEL,
+    source_path=path,
+    chunk_params={"chunk_size": 1000, "chunk_overlap": 0},
+)
+db = index_store.load_or_build(load_documents)
 
 # Building the retriever
 retriever = db.as_retriever(search_kwargs={'k': 3})
@@ -0,0 +1,48 @@
+"""
+Testes da leitura das configurações numéricas (common/config.py).
+
+Uso (a partir da raiz do repositório):
+    python -m pytest tests
+"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from common.config import env_float, env_int  # noqa: E402
+
+
+class EnvNumberTest(unittest.TestCase):
+
+    def test_default_when_unset_or_empty(self):
+        with mock.patch.dict(os.environ, {"WORKERS": " "}):
+            self.assertEqual(env_int("WORKERS", 4, minimum=1), 4)
+        with mock.patch.dict(os.environ, clear=True):
+            self.assertEqual(env_float("TIMEOUT", 2.5), 2.5)
+
+    def test_valid_values(self):
+        with mock.patch.dict(os.environ, {"WORKERS": "8", "TIMEOUT": "0.5"}):
+            self.assertEqual(env_int("WORKERS", 4, minimum=1), 8)
+            self.assertEqual(env_float("TIMEOUT", 2.5, minimum=0), 0.5)
+
+    def test_invalid_values_name_the_variable(self):
+        cases = [
+            (env_int, {"minimum": 1}, "abc"),
+            (env_int, {"minimum": 1}, "0"),
+            (env_int, {}, "1.5"),
+            (env_float, {"minimum": 0}, "-1"),
+            (env_float, {"maximum": 2}, "3"),
+            (env_float, {}, "nan"),
+        ]
+        for read, limits, raw in cases:
+            with self.subTest(raw=raw), mock.patch.dict(os.environ, {"SETTING": raw}):
+                with self.assertRaisesRegex(ValueError, "^SETTING "):
+                    read("SETTING", 1, **limits)
+
+
+if __name__ == "__main__":
+    unittest.main()
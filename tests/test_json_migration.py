@@ -0,0 +1,108 @@
+"""
+Testes da importação única dos arquivos JSON legados para SQLite quando vários
+processos do supervisor a iniciam ao mesmo tempo (cada um com sua conexão).
+
+Uso (a partir da raiz do repositório):
+    python -m pytest tests
+"""
+
+import importlib.util
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKERS = 4
+
+
+def load_module(name, relative_path):
+    # Os dois bots têm um pacote "src"; os módulos são carregados pelo caminho
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+feedback_store = load_module("feedback_store", "chat-informacoes/src/feedback_store.py")
+conversation_store = load_module("conversation_store", "bot_planejamento/src/conversation_store.py")
+
+
+def migrate_concurrently(stores, json_path):
+    barrier = threading.Barrier(len(stores))
+    results, errors = [], []
+
+    def run(store):
+        barrier.wait()
+        try:
+            results.append(store.migrate_from_json(json_path))
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=run, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+class JsonMigrationTest(unittest.TestCase):
+
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.workdir = workdir.name
+
+    def write_json(self, name, data):
+        path = os.path.join(self.workdir, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(data, file)
+        return path
+
+    def open_stores(self, factory):
+        stores = [factory() for _ in range(WORKERS)]
+        for store in stores:
+            self.addCleanup(store.close)
+        return stores
+
+    def test_feedback_is_imported_once_by_concurrent_processes(self):
+        records = [
+            {"timestamp": f"2024-05-0{1 + i % 3}T10:00:00", "user_id": i, "unit": "HJXXIII",
+             "rating": "bom" if i % 2 else "ruim", "interaction_details": {}}
+            for i in range(50)
+        ]
+        json_path = self.write_json("feedback.json", records)
+        db_path = os.path.join(self.workdir, "feedback.sqlite3")
+        stores = self.open_stores(lambda: feedback_store.FeedbackStore(db_path))
+
+        results, errors = migrate_concurrently(stores, json_path)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(results), [0] * (WORKERS - 1) + [len(records)])
+        self.assertEqual(len(stores[0]), len(records))
+        self.assertEqual(stores[0].counts(), {"bom": 25, "ruim": 25})
+
+    def test_conversations_are_imported_once_by_concurrent_processes(self):
+        memories = {
+            str(user_id): {"messages": [
+                {"type": "human", "content": f"pergunta {i}", "timestamp": "2024-05-01T10:00:00"}
+                for i in range(10)
+            ]}
+            for user_id in range(5)
+        }
+        json_path = self.write_json("chat_memories.json", memories)
+        db_path = os.path.join(self.workdir, "conversations.sqlite3")
+        stores = self.open_stores(lambda: conversation_store.ConversationStore(db_path))
+
+        results, errors = migrate_concurrently(stores, json_path)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(results), [0] * (WORKERS - 1) + [50])
+        for user_id in memories:
+            self.assertEqual(len(stores[0].load_user(user_id)), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
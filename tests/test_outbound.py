@@ -0,0 +1,107 @@
+"""
+Testes do envio assíncrono das respostas (common/outbound.py) contra o servidor
+Zulip simulado (benchmarks/fake_zulip.py).
+
+Uso (a partir da raiz do repositório):
+    python -m pytest tests
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+import zulip
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from fake_zulip import FakeZulipServer  # noqa: E402
+from common.outbound import OutboundSender  # noqa: E402
+
+
+def make_requests(messages, conversations):
+    return [{"type": "private", "to": [1 + i % conversations], "content": f"resposta {i}"} for i in range(messages)]
+
+
+def received_by_conversation(server):
+    # Mensagens unidas chegam como um só conteúdo, separadas por linha em branco
+    received = {}
+    for user_id, content in server.sent_log:
+        received.setdefault(user_id, []).extend(content.split("\n\n"))
+    return received
+
+
+def expected_by_conversation(requests):
+    expected = {}
+    for request in requests:
+        expected.setdefault(request["to"][0], []).append(request["content"])
+    return expected
+
+
+class OutboundSenderTest(unittest.TestCase):
+
+    def start_server(self, **kwargs):
+        server = FakeZulipServer(**kwargs)
+        server.start()
+        self.addCleanup(server.stop)
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        zuliprc = os.path.join(workdir.name, "zuliprc")
+        server.write_zuliprc(zuliprc)
+        return server, zulip.Client(config_file=zuliprc)
+
+    def start_sender(self, client, **kwargs):
+        sender = OutboundSender(client, **kwargs)
+        self.addCleanup(sender.shutdown, wait=False)
+        return sender
+
+    def test_send_message_does_not_wait_for_slow_server(self):
+        send_delay = 0.2
+        server, client = self.start_server(send_delay=send_delay)
+        sender = self.start_sender(client, workers=4)
+        requests = make_requests(60, 6)
+
+        latencies = []
+        for request in requests:
+            started = time.perf_counter()
+            sender.send_message(request)
+            latencies.append(time.perf_counter() - started)
+
+        p99 = sorted(latencies)[int(len(latencies) * 0.99) - 1]
+        self.assertLess(p99, send_delay / 20)
+        self.assertTrue(sender.flush(timeout=30))
+        self.assertEqual(received_by_conversation(server), expected_by_conversation(requests))
+
+    def test_order_is_preserved_under_rate_limit(self):
+        server, client = self.start_server(rate_limit=10)
+        sender = self.start_sender(client, workers=4, coalesce=False)
+        requests = make_requests(30, 3)
+
+        for request in requests:
+            sender.send_message(request)
+
+        self.assertTrue(sender.flush(timeout=60))
+        self.assertGreater(server.rate_limited, 0)
+        self.assertEqual(server.sent_messages, len(requests))
+        self.assertEqual(received_by_conversation(server), expected_by_conversation(requests))
+
+    def test_invalid_request_does_not_consume_a_slot(self):
+        server, client = self.start_server()
+
+        def key(request):
+            return request["to"][0]
+
+        sender = self.start_sender(client, workers=1, max_pending=1, key=key)
+        for _ in range(3):
+            with self.assertRaises(KeyError):
+                sender.send_message({"type": "private", "content": "sem destinatário"})
+        sender.send_message({"type": "private", "to": [1], "content": "ok"})
+        self.assertTrue(sender.flush(timeout=10))
+        self.assertEqual(server.sent_log, [(1, "ok")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+Testes da edição final das respostas em fluxo (bot_planejamento/src/streaming.py).
+
+Uso (a partir da raiz do repositório):
+    python -m pytest tests
+"""
+
+import importlib.util
+import os
+import unittest
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Os dois bots têm um pacote "src"; o módulo é carregado pelo caminho
+_spec = importlib.util.spec_from_file_location("streaming", os.path.join(ROOT, "bot_planejamento/src/streaming.py"))
+streaming = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(streaming)
+
+
+class FakeClient:
+    """
+    Cliente Zulip que aceita o envio inicial e responde às edições com os resultados
+    configurados, em ordem (um resultado que é uma exceção é lançado).
+    """
+    def __init__(self, update_results, delete_result=None):
+        self.update_results = list(update_results)
+        self.delete_result = delete_result or {"result": "success"}
+        self.updates = 0
+        self.deleted = []
+
+    def send_message(self, request):
+        return {"result": "success", "id": 42}
+
+    def update_message(self, request):
+        self.updates += 1
+        result = self.update_results.pop(0) if self.update_results else {"result": "success"}
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def delete_message(self, message_id):
+        self.deleted.append(message_id)
+        return self.delete_result
+
+
+def write_answer(client):
+    writer = streaming.ZulipStreamWriter(client, {"type": "private", "to": [1]}, min_interval=0.0,
+                                         final_timeout=5.0)
+    writer.write("Resposta ")
+    return writer
+
+
+class ZulipStreamWriterCloseTest(unittest.TestCase):
+
+    def test_final_edit_is_retried_on_rate_limit_and_connection_errors(self):
+        client = FakeClient([
+            {"result": "error", "code": "RATE_LIMIT_HIT", "retry-after": 0.01},
+            requests.ConnectionError("conexão recusada"),
+        ])
+        writer = write_answer(client)
+
+        self.assertTrue(writer.close())
+        self.assertEqual(client.updates, 3)
+        self.assertEqual(client.deleted, [])
+
+    def test_final_edit_fails_fast_on_other_errors(self):
+        client = FakeClient([{"result": "error", "code": "BAD_REQUEST", "msg": "Mensagem inválida"}])
+        writer = write_answer(client)
+
+        self.assertFalse(writer.close())
+        self.assertEqual(client.updates, 1)
+        self.assertEqual(client.deleted, [42])
+
+    def test_full_answer_is_sent_when_partial_message_cannot_be_deleted(self):
+        client = FakeClient([{"result": "error", "code": "BAD_REQUEST", "msg": "Mensagem inválida"}],
+                            delete_result={"result": "error", "msg": "Sem permissão"})
+        writer = write_answer(client)
+
+        self.assertFalse(writer.close())
+        self.assertEqual(client.deleted, [42])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+Testes do supervisor de processos worker (common/supervisor.py).
+
+Uso (a partir da raiz do repositório):
+    python -m pytest tests
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from common.supervisor import Supervisor  # noqa: E402
+
+# Diretório onde os workers registram as mensagens processadas (herdado pelos processos)
+OUTPUT_ENV = "SUPERVISOR_TEST_OUTPUT"
+
+
+def handle_message(event):
+    if event["content"] == "falha":
+        os._exit(3)
+    with open(os.path.join(os.environ[OUTPUT_ENV], str(os.getpid())), "a", encoding="utf-8") as file:
+        file.write(f"{event['sender_id']}:{event['content']}\n")
+
+
+def create_worker():
+    return SimpleNamespace(handle_message=handle_message)
+
+
+class SupervisorTest(unittest.TestCase):
+
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.workdir = workdir.name
+        os.environ[OUTPUT_ENV] = self.workdir
+        self.addCleanup(os.environ.pop, OUTPUT_ENV, None)
+
+    def start_supervisor(self, **kwargs):
+        supervisor = Supervisor(create_worker, startup_timeout=60, restart_backoff=0.1, **kwargs)
+        self.addCleanup(supervisor.shutdown, wait=False)
+        return supervisor
+
+    def processed(self):
+        lines = []
+        for name in os.listdir(self.workdir):
+            with open(os.path.join(self.workdir, name), encoding="utf-8") as file:
+                lines.extend(line.strip() for line in file)
+        return lines
+
+    def wait_for(self, condition, timeout=30):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("Condição não atingida no tempo limite")
+            time.sleep(0.05)
+
+    def test_messages_of_a_sender_go_to_one_worker_in_order(self):
+        supervisor = self.start_supervisor(workers=2, threads_per_worker=2)
+        for i in range(20):
+            supervisor.submit({"sender_id": i % 4, "content": str(i)})
+        supervisor.shutdown()
+
+        by_sender = {}
+        for name in os.listdir(self.workdir):
+            with open(os.path.join(self.workdir, name), encoding="utf-8") as file:
+                for line in file:
+                    sender, content = line.strip().split(":")
+                    by_sender.setdefault(sender, set()).add(name)
+                    self.assertEqual(int(content) % 4, int(sender))
+        self.assertEqual(len(self.processed()), 20)
+        self.assertTrue(all(len(workers) == 1 for workers in by_sender.values()))
+
+    def test_crashed_worker_is_restarted(self):
+        supervisor = self.start_supervisor(workers=1, threads_per_worker=1)
+        supervisor.submit({"sender_id": 1, "content": "falha"})
+        self.wait_for(lambda: supervisor.restarts == 1)
+        supervisor.submit({"sender_id": 1, "content": "depois"})
+        supervisor.shutdown()
+
+        self.assertEqual(self.processed(), ["1:depois"])
+        self.assertIsNone(supervisor.failure)
+
+    def test_supervisor_fails_after_repeated_crashes(self):
+        supervisor = self.start_supervisor(workers=1, threads_per_worker=1, max_restarts=1)
+        supervisor.submit({"sender_id": 1, "content": "falha"})
+        self.wait_for(lambda: supervisor.restarts == 1)
+        supervisor.submit({"sender_id": 1, "content": "falha"})
+        self.wait_for(lambda: supervisor.failure is not None)
+
+        with self.assertRaises(RuntimeError):
+            supervisor.submit({"sender_id": 1, "content": "depois"})
+
+
+if __name__ == "__main__":
+    unittest.main()